@@ -1,13 +1,338 @@
+import hashlib
+import heapq
+import json
+import os
 import re
-from datetime import datetime, timedelta
-from operator import itemgetter
-from dateutil.parser import parse
-from .classes import Participation
+import tempfile
+import zlib
+from datetime import timedelta, timezone
+from functools import lru_cache
+from .classes import Participation, parse_datetime
+from .dedup import Deduplicator
+from .index import ConversationIndex
+from .timezones import DAY, HOUR, WEEK, OffsetTable
 
 PERIOD_DT_FORMAT = '%A, %B %d, %Y  %-I%p'
+MINUTE_PERIOD_DT_FORMAT = '%A, %B %d, %Y  %-I:%M%p'
+ROLLUP_SECONDS = {
+    'hour': HOUR,
+    'day': DAY,
+    'week': WEEK,
+}
+ROLLUP_DT_FORMATS = {
+    'hour': PERIOD_DT_FORMAT,
+    'day': '%A, %B %d, %Y',
+    'week': 'Week of %B %d, %Y',
+}
+PERIOD_OPTIONS = ('memory_budget', 'build_index', 'target_timezone', 'period_minutes', 'rollups',
+                  'period_cap', 'sample_weight', 'duplicate_distance', 'stream_periods')
+
+
+class HourlySummary(dict):
+    """
+    Statuses keyed to hourly timestamp strings, held in memory. With a
+    ``period_minutes`` other than 60, the keys are those of the configured periods.
+    """
+    def add(self, time_key, status):
+        if time_key in self:
+            # statuses not sorted by time
+            self[time_key].append(status)
+        else:
+            self[time_key] = [status]
+
+    def tally(self, time_key, status, participation=None):
+        """
+        Notes a status before duplicates are collapsed. Only summaries that drop
+        statuses keep the tally.
+
+        Args:
+            participation: The conversion's `~.classes.Participation`, when the
+                status's participants are tallied as well.
+        """
+
+    def get_statuses(self, time_key):
+        return self[time_key]
+
+    def periods(self, settings=None, lazy=False):
+        """
+        Returns:
+            The periods, as a list, or as `LazyPeriods` assembled as they are read
+            when ``lazy`` is set.
+        """
+        if lazy:
+            return LazyPeriods(self, settings, get_time_keys(self))
+        return to_periods(self, settings)
+
+
+def get_sample_weight(status):
+    """
+    The default weight of a status in `SampledHourlySummary`. Statuses with a topic
+    header are four times as likely to be kept.
+
+    Returns:
+        float: The status's sampling weight.
+    """
+    return 4.0 if status.get('topic_header') else 1.0
 
 
-def initialize_hourly_summary(start, cutoff):
+def get_sample_key(status, weight=1.0):
+    """
+    Computes a status's weighted sampling key, as in Efraimidis and Spirakis's
+    weighted reservoir sampling. Keeping the statuses with the greatest keys keeps
+    each with a probability that grows with its weight.
+
+    The uniform variate is derived from the status identifier rather than drawn at
+    random, so a status keeps its key across runs and refreshes, and a period's
+    sample only changes when its statuses do.
+
+    Returns:
+        float: The key.
+    """
+    identifier = str(status.get('id') or (status['created_at'], status['text']))
+    variate = (zlib.crc32(identifier.encode('utf-8')) + 0.5) / 2 ** 32
+    return variate ** (1.0 / weight)
+
+
+class SampledHourlySummary(HourlySummary):
+    """
+    Statuses keyed to hourly timestamp strings, keeping at most ``period_cap``
+    statuses per period.
+
+    Each period holds a min-heap of sampling keys (see `get_sample_key`), so a
+    status that does not make a period's sample is dropped as it is added and never
+    sorted or kept. The exact count of statuses tallied for each period, before
+    duplicates are collapsed, is kept in ``counts`` and reported by each period's
+    ``count``.
+
+    The topic headers of every status added are reported by each period's
+    ``topic_headers``, so navigation recounted for a window (see
+    `~.classes.summarize_periods`) includes the statuses left out of the sample.
+    When participants are tallied, each period reports its ``period_cap`` most
+    active participants under ``participants`` and the count of distinct ones under
+    ``participant_count``, so windows count the top participants of statuses left
+    out of the sample while a period's size stays bounded.
+
+    Args:
+        period_cap (int): The most statuses kept per period.
+        weight: Callable that takes a status and returns its sampling weight.
+            Defaults to `get_sample_weight`.
+        hourly_keys: Timestamp strings to start with.
+
+    Attributes:
+        counts (dict): The count of statuses tallied, keyed to timestamp strings.
+        participation (dict): `~.classes.Participation` instances keyed to
+            timestamp strings.
+        topic_headers (dict): Sets of topic headers keyed to timestamp strings.
+    """
+    def __init__(self, period_cap, weight=None, hourly_keys=()):
+        super().__init__((time_key, []) for time_key in hourly_keys)
+        self.period_cap = period_cap
+        self.weight = weight or get_sample_weight
+        self.counts = {}
+        self.participation = {}
+        self.topic_headers = {}
+        self._heaps = {}
+        self._added = 0
+
+    def tally(self, time_key, status, participation=None):
+        self.counts[time_key] = self.counts.get(time_key, 0) + 1
+        if participation is None:
+            return
+        period_participation = self.participation.get(time_key)
+        if period_participation is None:
+            period_participation = Participation(users=participation.users)
+            self.participation[time_key] = period_participation
+        period_participation.add_tweet(status['author'])
+        if status['origin']:
+            period_participation.add_tweet(status['origin']['author'])
+
+    def add(self, time_key, status):
+        self._added += 1
+        topic_header = status.get('topic_header')
+        if topic_header:
+            self.topic_headers.setdefault(time_key, set()).add(topic_header)
+        # the order added breaks ties between equal keys, so statuses are never compared
+        entry = (get_sample_key(status, self.weight(status)), self._added, status)
+        heap = self._heaps.get(time_key)
+        if heap is None:
+            self._heaps[time_key] = [entry]
+        elif len(heap) < self.period_cap:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def sample(self):
+        """
+        Stores each period's sampled statuses under its timestamp string.
+        """
+        for time_key, heap in self._heaps.items():
+            self[time_key] = [status for key, added, status in heap]
+
+    def periods(self, settings=None, lazy=False):
+        # the cap already bounds each period, so sampled periods are built up front
+        self.sample()
+        periods = to_periods(self, settings, self.counts)
+        for period in periods:
+            time_key = period['timestamp']
+            if time_key in self.participation:
+                ranked = self.participation[time_key].get_ranked_profiles()
+                period['participants'] = {
+                    participant.name: {'exchange_count': participant.exchange_count,
+                                       'profile_url': participant.profile_url}
+                    for participant in ranked[:self.period_cap]}
+                period['participant_count'] = len(ranked)
+            period['topic_headers'] = sorted(self.topic_headers.get(time_key, ()))
+        return periods
+
+
+class SpillingHourlySummary(object):
+    """
+    Statuses keyed to hourly timestamp strings, holding at most ``memory_budget``
+    statuses in memory.
+
+    Once the budget is exceeded, every bucket other than the one most recently added
+    to is appended to its own temporary file. With statuses arriving in time order,
+    as they do from an archive query, those buckets are complete hours. Periods are
+    assembled one at a time from each bucket's file and in-memory remainder, so the
+    output matches `to_periods` exactly.
+
+    Args:
+        memory_budget (int): The most statuses kept in memory.
+        hourly_keys: Timestamp strings to start with, e.g. from `initialize_hourly_summary`.
+        directory (str): Where temporary files are created. Defaults to the system's
+            temporary directory.
+
+    Attributes:
+        spills (int): The count of times buckets were written out.
+    """
+    def __init__(self, memory_budget, hourly_keys=(), directory=None):
+        self.memory_budget = memory_budget
+        self.buckets = {key: [] for key in hourly_keys}
+        self.counts = {key: 0 for key in hourly_keys}
+        self.files = {}
+        self.in_memory = 0
+        self.spills = 0
+        self._directory = tempfile.TemporaryDirectory(prefix='conversationalist-', dir=directory)
+
+    def tally(self, time_key, status, participation=None):
+        pass
+
+    def add(self, time_key, status):
+        if time_key in self.buckets:
+            self.buckets[time_key].append(status)
+            self.counts[time_key] += 1
+        else:
+            self.buckets[time_key] = [status]
+            self.counts[time_key] = 1
+        self.in_memory += 1
+        if self.in_memory > self.memory_budget:
+            self.spill(keep=time_key)
+            if self.in_memory > self.memory_budget:
+                self.spill()
+
+    def spill(self, keep=None):
+        """
+        Appends the in-memory statuses of every bucket, except ``keep``, to the
+        buckets' temporary files.
+        """
+        self.spills += 1
+        for time_key, statuses in self.buckets.items():
+            if statuses and time_key != keep:
+                if time_key not in self.files:
+                    file_name = '{0}.jsonl'.format(len(self.files))
+                    self.files[time_key] = os.path.join(self._directory.name, file_name)
+                with open(self.files[time_key], 'a') as outfile:
+                    for status in statuses:
+                        outfile.write(json.dumps(status))
+                        outfile.write('\n')
+                self.in_memory -= len(statuses)
+                self.buckets[time_key] = []
+
+    def get_statuses(self, time_key):
+        """
+        Returns:
+            list: A bucket's statuses in the order they were added.
+        """
+        statuses = []
+        if time_key in self.files:
+            with open(self.files[time_key]) as infile:
+                statuses = [json.loads(line) for line in infile]
+        statuses.extend(self.buckets[time_key])
+        return statuses
+
+    def periods(self, settings=None, lazy=True):
+        return LazyPeriods(self, settings)
+
+
+class LazyPeriods(object):
+    """
+    Lazily assembled periods of a `SpillingHourlySummary`, or of an `HourlySummary`
+    when an adapter sets ``stream_periods``, ordered by ``id``.
+
+    Iterating produces one period at a time, so a writer can stream a story while
+    only a single period is assembled, and, for spilled summaries, only a single
+    period's statuses are loaded. It may be iterated more than once.
+
+    Indexing assembles a single period, and slicing returns another lazy view, so
+    `~.classes.Conversation.window` can cut the periods without loading them.
+
+    Attributes:
+        ids (list): The sorted ``id`` values of the non-empty periods.
+        head (list): Periods already assembled that come before the lazy ones, such
+            as a window's boundary period.
+    """
+    def __init__(self, summary, settings=None, time_keys=None, head=()):
+        self.summary = summary
+        self.settings = settings
+        if time_keys is None:
+            keyed = sorted((period_id(time_key), time_key)
+                           for time_key, count in summary.counts.items() if count)
+            time_keys = [time_key for identifier, time_key in keyed]
+        self._time_keys = list(time_keys)
+        self.head = list(head)
+        self.ids = ([period['id'] for period in self.head] +
+                    [period_id(time_key) for time_key in self._time_keys])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _make_period(self, time_key):
+        return make_period(time_key, self.summary.get_statuses(time_key), self.settings)
+
+    def __iter__(self):
+        for period in self.head:
+            yield period
+        for time_key in self._time_keys:
+            yield self._make_period(time_key)
+
+    def __getitem__(self, index):
+        head_length = len(self.head)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError('Lazy periods only support contiguous slices.')
+            time_keys = self._time_keys[max(start - head_length, 0):max(stop - head_length, 0)]
+            return LazyPeriods(self.summary, self.settings, time_keys,
+                                  self.head[start:stop])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('period index out of range')
+        if index < head_length:
+            return self.head[index]
+        return self._make_period(self._time_keys[index - head_length])
+
+    def prepend(self, period):
+        """
+        Returns:
+            LazyPeriods: A view of these periods preceded by an assembled one.
+        """
+        return LazyPeriods(self.summary, self.settings, self._time_keys,
+                              [period] + self.head)
+
+
+def initialize_hourly_summary(start, cutoff, memory_budget=None, offsets=None,
+                              period_minutes=60, period_cap=None, sample_weight=None):
     """
     Generates a dict that contains statuses for each hour during
     a timeframe. The statuses are keyed to a timestamp string.
@@ -17,45 +342,269 @@ def initialize_hourly_summary(start, cutoff):
     Args:
         start (datetime): The timeline's start.
         cutoff (datetime): When the timeline's status search ends.
+        memory_budget (int): When set, a `SpillingHourlySummary` holding at most this
+            many statuses in memory is returned instead.
+        offsets: An `~.timezones.OffsetTable` for hours in a target timezone.
+            Optional.
+        period_minutes (int): The length of each period. Requires ``offsets`` when
+            not 60.
+        period_cap (int): When set, a `SampledHourlySummary` keeping at most this
+            many statuses per period is returned instead. The cap already bounds
+            memory, so it takes precedence over a ``memory_budget``.
+        sample_weight: The sampling weight callable for a ``period_cap``. Optional.
 
     Returns:
         dict: Statuses keyed to timestamps arranged in hourly increments.
     """
-    hourly_summary = {}
-    start = start.replace(minute=0)
-    active = cutoff
-    while active < start:
-        hourly_key = active
-        hourly_key = hourly_key.replace(minute=0, second=0, microsecond=0)
-        hourly_summary[hourly_key.isoformat()] = []
-        active = active + timedelta(hours=1)
+    hourly_summary = HourlySummary()
+    if offsets:
+        for hourly_key in offsets.time_keys(start, cutoff, period_minutes * 60):
+            hourly_summary[hourly_key] = []
+    else:
+        start = start.replace(minute=0)
+        active = cutoff
+        while active < start:
+            hourly_key = active
+            hourly_key = hourly_key.replace(minute=0, second=0, microsecond=0)
+            hourly_summary[hourly_key.isoformat()] = []
+            active = active + timedelta(hours=1)
+    if period_cap:
+        return SampledHourlySummary(period_cap, sample_weight, hourly_summary.keys())
+    if memory_budget:
+        return SpillingHourlySummary(memory_budget, hourly_summary.keys())
     return hourly_summary
 
 
+def get_offsets(start, cutoff, target_timezone=None, period_minutes=60, rollups=None):
+    """
+    Returns:
+        An `~.timezones.OffsetTable` for the timeframe when a ``target_timezone``,
+        periods other than hours, or rollups are requested, otherwise ``None``.
+    """
+    if target_timezone or period_minutes != 60 or rollups:
+        return OffsetTable(target_timezone or timezone.utc, start, cutoff)
+    return None
+
+
+def get_time_key(status, offsets=None, period_minutes=60):
+    """
+    Args:
+        status (dict): The status JSON object.
+        offsets: An `~.timezones.OffsetTable`. When passed, the hour is found in its
+            timezone rather than in the offset of the status's ``created_at``.
+        period_minutes (int): The length of each period. Requires ``offsets`` when
+            not 60.
+
+    Returns:
+        str: The timestamp string of the hour in which a status was created.
+    """
+    if offsets:
+        return offsets.time_key(parse_datetime(status['created_at']).timestamp(),
+                                period_minutes * 60)
+    created_with_no_minutes = parse_datetime(status['created_at']).replace(minute=0, second=0, microsecond=0)
+    return created_with_no_minutes.isoformat()
+
+
 def sort_statuses(statuses):
     return sorted(statuses, key=lambda s: s['created_at'])
 
 
-def to_periods(hourly_summary):
-    periods = []
-    for iso_timestamp, statuses in hourly_summary.items():
-        period_datetime = parse(iso_timestamp)
-        unix_epoch = datetime(1970, 1, 1, tzinfo=period_datetime.tzinfo)
-        seconds = (period_datetime - unix_epoch).total_seconds()
-        subtitle = period_datetime.strftime(PERIOD_DT_FORMAT)
-        if len(statuses) > 0:
-            empty = False
-            message = 'No updates.'
-            hour_block = {
-                'id': int(seconds),
-                'empty': empty,
-                'empty_message': message,
-                'subtitle': subtitle,
-                'statuses': sort_statuses(statuses)
-            }
-            periods.append(hour_block)
-    periods = sorted(periods, key=itemgetter('id'))
-    return periods
+def status_key(status):
+    key = str(status.get('id') or (status['created_at'], status['text']))
+    duplicates = status.get('duplicates')
+    if duplicates:
+        # a collapsed status changes as its duplicates do
+        key = '{0}x{1}:{2}'.format(key, duplicates['count'], len(duplicates['authors']))
+    return key
+
+
+def period_fingerprint(statuses, settings=None):
+    """
+    Computes a stable fingerprint for a period's content.
+
+    The fingerprint changes when the period's statuses or the settings used to
+    enrich them change, so renderers can reuse output for unchanged periods.
+
+    Args:
+        statuses (list): The period's status dicts.
+        settings (dict): The enrichment settings applied by the adapter.
+
+    Returns:
+        str: A hexadecimal digest.
+    """
+    status_keys = sorted(status_key(status) for status in statuses)
+    content = json.dumps([settings, status_keys], sort_keys=True, default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def period_id(iso_timestamp):
+    """
+    Returns:
+        int: The seconds since the unix epoch of a period's timestamp string.
+    """
+    period_datetime = parse_datetime(iso_timestamp)
+    if period_datetime.tzinfo is None:
+        period_datetime = period_datetime.replace(tzinfo=timezone.utc)
+    return int(period_datetime.timestamp())
+
+
+def get_period_format(settings=None):
+    """
+    Returns:
+        str: The ``strftime`` format of subtitles for the periods, or rollups, built
+        with the passed settings.
+    """
+    settings = settings or {}
+    if settings.get('rollup'):
+        return ROLLUP_DT_FORMATS[settings['rollup']]
+    if settings.get('period_minutes', 60) % 60:
+        return MINUTE_PERIOD_DT_FORMAT
+    return PERIOD_DT_FORMAT
+
+
+def make_period(iso_timestamp, statuses, settings=None, count=None):
+    """
+    Builds a period. When a ``count`` is passed, for periods holding a sample of
+    their statuses, it is reported as the period's ``count`` and is part of its
+    fingerprint.
+    """
+    period_datetime = parse_datetime(iso_timestamp)
+    subtitle = period_datetime.strftime(get_period_format(settings))
+    empty = False
+    message = 'No updates.'
+    fingerprint_settings = settings
+    if count is not None:
+        fingerprint_settings = dict(settings or {}, count=count)
+    hour_block = {
+        'id': period_id(iso_timestamp),
+        'timestamp': iso_timestamp,
+        'empty': empty,
+        'empty_message': message,
+        'subtitle': subtitle,
+        'statuses': sort_statuses(statuses),
+        'fingerprint': period_fingerprint(statuses, fingerprint_settings)
+    }
+    if count is not None:
+        hour_block['count'] = count
+    return hour_block
+
+
+def get_time_keys(hourly_summary):
+    """
+    Returns:
+        list: The timestamp strings of an hourly summary's non-empty periods,
+        ordered by ``id``.
+    """
+    keyed = sorted((period_id(iso_timestamp), iso_timestamp)
+                   for iso_timestamp, statuses in hourly_summary.items() if statuses)
+    return [iso_timestamp for identifier, iso_timestamp in keyed]
+
+
+def iter_periods(hourly_summary, settings=None, counts=None):
+    """
+    Builds the non-empty periods of an hourly summary one at a time, ordered by
+    ``id``.
+
+    Args:
+        hourly_summary (dict): Statuses keyed to timestamp strings.
+        settings (dict): The adapter's settings.
+        counts (dict): Exact status counts keyed to timestamp strings, when the
+            summary holds samples. Optional.
+
+    Yields:
+        dict: A period.
+    """
+    for iso_timestamp in get_time_keys(hourly_summary):
+        count = counts[iso_timestamp] if counts is not None else None
+        yield make_period(iso_timestamp, hourly_summary[iso_timestamp], settings, count)
+
+
+def to_periods(hourly_summary, settings=None, counts=None):
+    return list(iter_periods(hourly_summary, settings, counts))
+
+
+def get_period_settings(settings, target_timezone=None, period_minutes=60, period_cap=None,
+                        duplicate_distance=None):
+    """
+    Adds the bucketing options that differ from the defaults to an adapter's
+    settings, so they are part of each period's fingerprint.
+
+    Returns:
+        dict: The same settings.
+    """
+    if target_timezone:
+        settings['timezone'] = target_timezone
+    if period_minutes != 60:
+        settings['period_minutes'] = period_minutes
+    if period_cap:
+        settings['period_cap'] = period_cap
+    if duplicate_distance is not None:
+        settings['duplicate_distance'] = duplicate_distance
+    return settings
+
+
+def rollup_periods(hourly_summary, offsets, rollups, settings=None, period_minutes=60):
+    """
+    Combines the periods of a conversion into coarser periods, e.g. days and weeks.
+
+    Rollups are built from the finest periods' buckets rather than from the
+    statuses, so each adds one step per period to the conversion pass instead of one
+    per status.
+
+    Args:
+        hourly_summary: The `HourlySummary` filled by the conversion.
+        offsets: The `~.timezones.OffsetTable` used for the finest periods.
+        rollups: Names of coarser levels: ``hour``, ``day``, or ``week``.
+        settings (dict): The adapter's settings.
+        period_minutes (int): The length of the finest periods.
+
+    Returns:
+        dict: Lists of periods keyed to level names.
+
+    Raises:
+        ValueError: If a level is unknown or not coarser than the finest periods, or
+            the statuses were spilled by a ``memory_budget``.
+    """
+    if not isinstance(hourly_summary, HourlySummary):
+        raise ValueError('Rollups are not supported with a memory_budget.')
+    counts = getattr(hourly_summary, 'counts', None)
+    rollup_counts = {level: {} for level in rollups} if counts is not None else None
+    buckets = {}
+    for level in rollups:
+        if ROLLUP_SECONDS.get(level, 0) <= period_minutes * 60:
+            raise ValueError('Rollup level {0} is not coarser than {1} minute periods.'
+                             .format(level, period_minutes))
+        buckets[level] = HourlySummary()
+    for time_key, statuses in hourly_summary.items():
+        if statuses:
+            epoch = period_id(time_key)
+            for level, summary in buckets.items():
+                rollup_key = offsets.time_key(epoch, ROLLUP_SECONDS[level])
+                if rollup_key in summary:
+                    summary[rollup_key].extend(statuses)
+                else:
+                    summary[rollup_key] = list(statuses)
+                if rollup_counts is not None:
+                    level_counts = rollup_counts[level]
+                    level_counts[rollup_key] = level_counts.get(rollup_key, 0) + counts[time_key]
+    return {level: to_periods(summary, dict(settings or {}, rollup=level),
+                              rollup_counts[level] if rollup_counts is not None else None)
+            for level, summary in buckets.items()}
+
+
+def get_deduplicator(hourly_summary, duplicate_distance=None):
+    """
+    Returns:
+        Deduplicator: A `~.dedup.Deduplicator` for a ``duplicate_distance``, or
+        ``None`` when there is none.
+    """
+    if duplicate_distance is None:
+        return None
+    if not isinstance(hourly_summary, HourlySummary):
+        # spilled statuses could not be updated as their duplicates are collapsed
+        raise ValueError('Collapsing duplicates is not supported with a memory_budget.')
+    return Deduplicator(duplicate_distance)
 
 
 def find_topic_header(status, pattern, return_group=0):
@@ -106,50 +655,113 @@ def get_style_classes(style_words, status):
     return style_classes.strip()
 
 
-def transform_with_topic_headers(conversation, pattern, return_goup):
+def transform_with_topic_headers(conversation, pattern, return_goup, *, memory_budget=None,
+                                 build_index=False, target_timezone=None, period_minutes=60,
+                                 rollups=None, period_cap=None, sample_weight=None,
+                                 duplicate_distance=None, stream_periods=False):
     start, cutoff = conversation._get_timeline_interval()
-    hourly_summary = initialize_hourly_summary(start, cutoff)
+    offsets = get_offsets(start, cutoff, target_timezone, period_minutes, rollups)
+    hourly_summary = initialize_hourly_summary(start, cutoff, memory_budget, offsets,
+                                               period_minutes, period_cap, sample_weight)
     timeline_data = conversation.timeline.get('data', {})
+    index = ConversationIndex() if build_index else None
+    deduplicator = get_deduplicator(hourly_summary, duplicate_distance)
     topic_headers = []
     for identifier, status in timeline_data.items():
+        time_key = get_time_key(status, offsets, period_minutes)
+        hourly_summary.tally(time_key, status)
+        if deduplicator and not deduplicator.add(time_key, status):
+            continue
         if pattern:
             topic_header = find_topic_header(status, pattern, return_goup)
             if topic_header:
                 status['topic_header'] = topic_header
                 topic_headers.append(topic_header)
-        created_with_no_minutes = parse(status['created_at']).replace(minute=0, second=0, microsecond=0)
-        time_key = created_with_no_minutes.isoformat()
-        if time_key in hourly_summary:
-            # statuses not sorted by time
-            hourly_summary[time_key].append(status)
-        else:
-            hourly_summary[time_key] = [status]
+        hourly_summary.add(time_key, status)
+        if index:
+            index.add(identifier, status, period_id(time_key))
     nav = sorted(set(topic_headers))
+    settings = {
+        'transform': 'topic_headers',
+        'pattern': pattern,
+        'return_group': return_goup
+    }
+    get_period_settings(settings, target_timezone, period_minutes, period_cap,
+                        duplicate_distance)
     data = {
         'title': conversation.title,
-        'periods': to_periods(hourly_summary),
+        'periods': hourly_summary.periods(settings, stream_periods),
         'topic_headers': nav
     }
+    if rollups:
+        data['rollups'] = rollup_periods(hourly_summary, offsets, rollups, settings,
+                                         period_minutes)
+    if index:
+        data['index'] = index
     return data
 
 
 def transform_with_participation_and_styles(conversation, style_words,
-                                            header_pattern, return_group):
+                                            header_pattern, return_group, *, memory_budget=None,
+                                            build_index=False, target_timezone=None,
+                                            period_minutes=60, rollups=None, period_cap=None,
+                                            sample_weight=None, duplicate_distance=None,
+                                            stream_periods=False):
     """
     Iterates through conversation status dictionaries adding their data to
     the instances ``Participation`` property, handling content transformations,
     and inserting style classes.  This logic helps create more informative
     pages once the data is rendered.
+
+    The period options below are keyword only; adapters pass theirs with
+    `PeriodAdapter.get_period_options`.
+
+    When a ``memory_budget`` is passed, at most that many statuses are held in
+    memory while bucketing, and the returned periods are assembled lazily from
+    temporary files (see `SpillingHourlySummary`).
+
+    With ``build_index`` set, the data also holds a `~.index.ConversationIndex`
+    keyed to ``index``, filled in the same pass.
+
+    With a ``target_timezone``, such as ``America/Chicago``, periods are the hours of
+    that timezone, including across daylight saving time changes, and subtitles show
+    its local time.
+
+    Periods last ``period_minutes``, e.g. ``15`` during live events. Names of coarser
+    ``rollups``, such as ``['day', 'week']``, add lists of periods for those levels,
+    keyed to ``rollups`` in the data and built in the same pass.
+
+    With a ``period_cap``, each period keeps at most that many statuses, sampled by
+    ``sample_weight`` while bucketing (see `SampledHourlySummary`), and reports its
+    exact status ``count``.
+
+    With a ``duplicate_distance``, statuses repeating one earlier in their period,
+    exactly or within that many SimHash bits, are collapsed into it before any other
+    work is done on them (see `~.dedup.Deduplicator`). ``0`` collapses exact
+    duplicates only.
+
+    With ``stream_periods`` set, the returned periods are `LazyPeriods`, each
+    assembled as it is read, so a writer such as `~.writers.StreamingWriter` renders
+    one period's dict, subtitle, and sorted statuses at a time. Periods are always
+    lazy under a ``memory_budget``, and built up front under a ``period_cap``.
     """
     start, cutoff = conversation._get_timeline_interval()
-    hourly_summary = initialize_hourly_summary(start, cutoff)
+    offsets = get_offsets(start, cutoff, target_timezone, period_minutes, rollups)
+    hourly_summary = initialize_hourly_summary(start, cutoff, memory_budget, offsets,
+                                               period_minutes, period_cap, sample_weight)
     timeline_data = conversation.timeline.get('data', {})
-    participation = Participation()
+    participation = Participation(users=conversation.timeline.get('users'))
+    index = ConversationIndex() if build_index else None
+    deduplicator = get_deduplicator(hourly_summary, duplicate_distance)
     topic_headers = []
     for identifier, status in timeline_data.items():
         participation.add_tweet(status['author'])
         if status['origin']:
             participation.add_tweet(status['origin']['author'])
+        time_key = get_time_key(status, offsets, period_minutes)
+        hourly_summary.tally(time_key, status, participation)
+        if deduplicator and not deduplicator.add(time_key, status):
+            continue
         if header_pattern:
             topic_header = find_topic_header(status, header_pattern, return_group)
             if topic_header:
@@ -157,72 +769,119 @@ def transform_with_participation_and_styles(conversation, style_words,
                 topic_headers.append(topic_header)
         if style_words:
             status['style_classes'] = get_style_classes(style_words, status)
-        created_with_no_minutes = parse(status['created_at']).replace(minute=0, second=0, microsecond=0)
-        time_key = created_with_no_minutes.isoformat()
-        if time_key in hourly_summary:
-            # statuses not sorted by time
-            hourly_summary[time_key].append(status)
-        else:
-            hourly_summary[time_key] = [status]
+        hourly_summary.add(time_key, status)
+        if index:
+            index.add(identifier, status, period_id(time_key))
     nav = sorted(set(topic_headers))
+    settings = {
+        'transform': 'participation_and_styles',
+        'style_words': style_words,
+        'header_pattern': header_pattern,
+        'return_group': return_group
+    }
+    get_period_settings(settings, target_timezone, period_minutes, period_cap,
+                        duplicate_distance)
     data = {
         'title': conversation.title,
-        'periods': to_periods(hourly_summary),
+        'periods': hourly_summary.periods(settings, stream_periods),
         'participation': participation,
         'nav': nav
     }
+    if rollups:
+        data['rollups'] = rollup_periods(hourly_summary, offsets, rollups, settings,
+                                         period_minutes)
+    if index:
+        data['index'] = index
     return data
 
 
-class ParticipationAdapter:
-    style_words = None
-    header_pattern = None
-    return_group = 0
+class PeriodAdapter:
+    """
+    Holds the period options shared by the adapters, named in ``PERIOD_OPTIONS``
+    and described in `transform_with_participation_and_styles`. Subclasses override
+    them as class attributes.
+    """
+    memory_budget = None
+    build_index = False
+    target_timezone = None
+    period_minutes = 60
+    rollups = None
+    period_cap = None
+    sample_weight = None
+    duplicate_distance = None
+    stream_periods = False
 
     def __init__(self, conversation):
         self.conversation = conversation
 
+    def get_period_options(self):
+        """
+        Returns:
+            dict: The adapter's period options keyed to their names, to pass to a
+            transform as keyword arguments.
+        """
+        return {name: getattr(self, name) for name in PERIOD_OPTIONS}
+
+
+class ParticipationAdapter(PeriodAdapter):
+    style_words = None
+    header_pattern = None
+    return_group = 0
+
     def convert(self):
         return transform_with_participation_and_styles(self.conversation,
                                                        self.style_words,
                                                        self.header_pattern,
-                                                       self.return_group)
+                                                       self.return_group,
+                                                       **self.get_period_options())
 
 
-class TopicHeaderAdapter:
+class TopicHeaderAdapter(PeriodAdapter):
     pattern = None
     return_group = 0
 
-    def __init__(self, conversation):
-        self.conversation = conversation
-
     def convert(self):
-        return transform_with_topic_headers(self.conversation, self.pattern, self.return_group)
+        return transform_with_topic_headers(self.conversation, self.pattern, self.return_group,
+                                            **self.get_period_options())
 
 
-class TextReplaceAdapter:
+class TextReplaceAdapter(PeriodAdapter):
     conversions = None
 
-    def __init__(self, conversation):
-        self.conversation = conversation
-
     def convert(self):
         start, cutoff = self.conversation._get_timeline_interval()
-        hourly_summary = initialize_hourly_summary(start, cutoff)
+        offsets = get_offsets(start, cutoff, self.target_timezone, self.period_minutes,
+                              self.rollups)
+        hourly_summary = initialize_hourly_summary(start, cutoff, self.memory_budget, offsets,
+                                                   self.period_minutes, self.period_cap,
+                                                   self.sample_weight)
         timeline_data = self.conversation.timeline.get('data', {})
+        index = ConversationIndex() if self.build_index else None
+        deduplicator = get_deduplicator(hourly_summary, self.duplicate_distance)
         for identifier, status in timeline_data.items():
             if self.conversions:
                 for original, replacement in self.conversions.items():
                     status['text'].replace(original, replacement)
-            created_with_no_minutes = parse(status['created_at']).replace(minute=0, second=0, microsecond=0)
-            time_key = created_with_no_minutes.isoformat()
-            if time_key in hourly_summary:
-                # statuses not sorted by time
-                hourly_summary[time_key].append(status)
-            else:
-                hourly_summary[time_key] = [status]
+            time_key = get_time_key(status, offsets, self.period_minutes)
+            hourly_summary.tally(time_key, status)
+            if deduplicator and not deduplicator.add(time_key, status):
+                continue
+            hourly_summary.add(time_key, status)
+            if index:
+                index.add(identifier, status, period_id(time_key))
+        settings = {
+            'transform': 'text_replace',
+            'conversions': self.conversions
+        }
+        get_period_settings(settings, self.target_timezone, self.period_minutes,
+                            self.period_cap, self.duplicate_distance)
         data = {
             'title': self.conversation.title,
-            'periods': to_periods(hourly_summary),
+            'periods': hourly_summary.periods(settings, self.stream_periods),
         }
+        if self.rollups:
+            data['rollups'] = rollup_periods(hourly_summary, offsets, self.rollups, settings,
+                                             self.period_minutes)
+        if index:
+            data['index'] = index
         return data
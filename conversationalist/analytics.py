@@ -0,0 +1,155 @@
+from .classes import parse_datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HOUR = 3600
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('The numpy package is required for conversationalist.analytics.')
+
+
+class ActivityArrays(object):
+    """
+    Column arrays of status activity, for counting without building periods.
+
+    Buckets are aligned to multiples of their width since the unix epoch, so hourly
+    buckets line up with conversation periods.
+
+    Attributes:
+        created_at: ``int64`` array of ``created_at`` unix epochs in seconds.
+        author_ids: ``int64`` array of author identifiers.
+        replies: ``bool`` array flagging statuses that reply to another status.
+    """
+    def __init__(self, created_at, author_ids, replies):
+        _require_numpy()
+        self.created_at = numpy.asarray(created_at, dtype=numpy.int64)
+        self.author_ids = numpy.asarray(author_ids, dtype=numpy.int64)
+        self.replies = numpy.asarray(replies, dtype=bool)
+
+    def __len__(self):
+        return len(self.created_at)
+
+    @classmethod
+    def from_timeline(cls, timeline):
+        """
+        Loads arrays from a timeline JSON object, normalized or not.
+
+        Args:
+            timeline (dict): A JSON object representing a timeline.
+
+        Returns:
+            ActivityArrays: The activity arrays.
+        """
+        _require_numpy()
+        statuses = timeline.get('data', {})
+        count = len(statuses)
+        created_at = numpy.fromiter(
+            (parse_datetime(status['created_at']).timestamp() for status in statuses.values()),
+            dtype=numpy.float64, count=count)
+        author_ids = numpy.fromiter(
+            (status['author']['id'] if isinstance(status['author'], dict) else status['author']
+             for status in statuses.values()),
+            dtype=numpy.int64, count=count)
+        replies = numpy.fromiter(
+            (bool(status.get('in_reply_to_status_id')) for status in statuses.values()),
+            dtype=bool, count=count)
+        return cls(numpy.floor(created_at), author_ids, replies)
+
+    @classmethod
+    def from_archive(cls, archive, username=None, start=None, cutoff=None):
+        """
+        Loads arrays straight from the indexed columns of a timeline archive, without
+        decoding any status JSON.
+
+        Args:
+            archive: A `~.archive.TimelineArchive` instance.
+            username (str): Restricts results to statuses from this account's timeline.
+            start (datetime): Latest ``created_at`` included.
+            cutoff (datetime): Statuses must be newer than this ``created_at``.
+
+        Returns:
+            ActivityArrays: The activity arrays.
+        """
+        _require_numpy()
+        where, parameters = archive._where(username=username, start=start, cutoff=cutoff)
+        sql = ('SELECT CAST(created_at AS INTEGER), author_id, in_reply_to_status_id IS NOT NULL '
+               'FROM statuses{0}').format(where)
+        rows = numpy.array(archive.connection.execute(sql, parameters).fetchall(), dtype=numpy.int64)
+        if not len(rows):
+            rows = numpy.zeros((0, 3), dtype=numpy.int64)
+        return cls(rows[:, 0], rows[:, 1], rows[:, 2])
+
+    def _bucket(self, bucket_seconds):
+        origin = self.created_at.min() // bucket_seconds * bucket_seconds
+        positions = (self.created_at - origin) // bucket_seconds
+        return origin, positions
+
+    def histogram(self, bucket_seconds=HOUR):
+        """
+        Counts statuses per bucket.
+
+        Args:
+            bucket_seconds (int): The bucket width, e.g. ``900`` or ``86400``.
+
+        Returns:
+            tuple: An array of bucket start epochs and an array of counts. Buckets
+            without statuses between the first and last are included with zero counts.
+        """
+        if not len(self):
+            return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+        origin, positions = self._bucket(bucket_seconds)
+        counts = numpy.bincount(positions)
+        starts = origin + numpy.arange(len(counts), dtype=numpy.int64) * bucket_seconds
+        return starts, counts
+
+    def reply_ratios(self, bucket_seconds=HOUR):
+        """
+        Computes the share of replies per bucket.
+
+        Returns:
+            tuple: An array of bucket start epochs and an array of ratios. Empty buckets
+            have a ratio of zero.
+        """
+        starts, counts = self.histogram(bucket_seconds)
+        if not len(self):
+            return starts, numpy.zeros(0, dtype=numpy.float64)
+        origin, positions = self._bucket(bucket_seconds)
+        reply_counts = numpy.bincount(positions, weights=self.replies, minlength=len(counts))
+        ratios = numpy.divide(reply_counts, counts, out=numpy.zeros(len(counts)), where=counts > 0)
+        return starts, ratios
+
+    def rolling_rates(self, bucket_seconds=HOUR, window=24):
+        """
+        Computes statuses per hour over a trailing window of buckets.
+
+        Args:
+            bucket_seconds (int): The bucket width.
+            window (int): How many buckets each rate covers. Leading buckets use the
+                buckets available so far.
+
+        Returns:
+            tuple: An array of bucket start epochs and an array of hourly rates.
+        """
+        starts, counts = self.histogram(bucket_seconds)
+        totals = numpy.cumsum(counts)
+        trailing = totals.copy()
+        trailing[window:] = totals[window:] - totals[:-window]
+        spans = numpy.minimum(numpy.arange(1, len(counts) + 1), window) * bucket_seconds / HOUR
+        return starts, trailing / spans
+
+    def author_counts(self):
+        """
+        Counts statuses per author.
+
+        Returns:
+            tuple: An array of author identifiers and an array of counts, ordered from
+            the most to the least active author.
+        """
+        author_ids, counts = numpy.unique(self.author_ids, return_counts=True)
+        order = numpy.argsort(-counts, kind='stable')
+        return author_ids[order], counts[order]
@@ -0,0 +1,206 @@
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+import json
+import sqlite3
+from .classes import TimelineEncoder
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS statuses (
+        id INTEGER PRIMARY KEY,
+        username TEXT,
+        author_id INTEGER,
+        in_reply_to_status_id INTEGER,
+        created_at REAL NOT NULL,
+        status TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS statuses_username_created_at ON statuses (username, created_at)',
+    'CREATE INDEX IF NOT EXISTS statuses_author_created_at ON statuses (author_id, created_at)',
+)
+
+
+class ArchivedStatuses(Mapping):
+    """
+    A read-only mapping of status identifiers to status JSON objects backed by an
+    archive query.
+
+    Iterating with ``items`` or ``values`` streams rows from the database ordered by
+    ``created_at``, so only the status being handled is held in memory.
+    """
+    ordered = True
+
+    def __init__(self, archive, **query):
+        self.archive = archive
+        self.query = query
+
+    def __getitem__(self, key):
+        for identifier, status in self.archive.query(status_id=int(key), **self.query):
+            return status
+        raise KeyError(key)
+
+    def __iter__(self):
+        for identifier, status in self.archive.query(**self.query):
+            yield identifier
+
+    def __len__(self):
+        return self.archive.count(**self.query)
+
+    def items(self):
+        return self.archive.query(**self.query)
+
+    def values(self):
+        return (status for identifier, status in self.archive.query(**self.query))
+
+
+class TimelineArchive(object):
+    """
+    Keeps the statuses of many ``Timeline`` runs in a SQLite database.
+
+    Statuses are keyed to their identifier, so storing overlapping timelines updates
+    rows rather than duplicating them. The ``created_at`` column holds a UTC epoch and
+    is indexed together with the crawled account and with the status author, which
+    keeps time-range queries from touching unrelated rows.
+
+    Attributes:
+        path (str): The database file location.
+        connection: The ``sqlite3`` connection.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def close(self):
+        self.connection.close()
+
+    def store(self, timeline):
+        """
+        Upserts the statuses of a ``Timeline`` instance.
+
+        Args:
+            timeline: A `~.classes.Timeline` instance.
+
+        Returns:
+            int: The count of statuses written.
+        """
+        encoder = TimelineEncoder()
+        rows = []
+        for status in timeline.data.values():
+            rows.append((
+                int(status.id),
+                timeline.username,
+                status.author.id,
+                getattr(status, 'in_reply_to_status_id', None),
+                status.created_at.timestamp(),
+                encoder.encode(status)
+            ))
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO statuses '
+                '(id, username, author_id, in_reply_to_status_id, created_at, status) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def _where(self, username=None, author_id=None, start=None, cutoff=None, status_id=None):
+        clauses = []
+        parameters = []
+        if status_id is not None:
+            clauses.append('id = ?')
+            parameters.append(status_id)
+        if username is not None:
+            clauses.append('username = ?')
+            parameters.append(username)
+        if author_id is not None:
+            clauses.append('author_id = ?')
+            parameters.append(author_id)
+        if start is not None:
+            clauses.append('created_at <= ?')
+            parameters.append(start.timestamp())
+        if cutoff is not None:
+            clauses.append('created_at > ?')
+            parameters.append(cutoff.timestamp())
+        if clauses:
+            return ' WHERE {0}'.format(' AND '.join(clauses)), parameters
+        return '', parameters
+
+    def query(self, username=None, author_id=None, start=None, cutoff=None, status_id=None):
+        """
+        Yields archived statuses ordered from oldest to newest.
+
+        Args:
+            username (str): Restricts results to statuses from this account's timeline.
+            author_id (int): Restricts results to statuses by this author.
+            start (datetime): Latest ``created_at`` included.
+            cutoff (datetime): Statuses must be newer than this ``created_at``.
+            status_id (int): Restricts results to the status with this identifier.
+
+        Yields:
+            tuple: The status identifier string and its JSON object.
+        """
+        where, parameters = self._where(username, author_id, start, cutoff, status_id)
+        sql = 'SELECT id, status FROM statuses{0} ORDER BY created_at'.format(where)
+        for identifier, status in self.connection.execute(sql, parameters):
+            yield str(identifier), json.loads(status)
+
+    def count(self, username=None, author_id=None, start=None, cutoff=None):
+        """
+        Returns:
+            int: The count of archived statuses matching the query arguments.
+        """
+        where, parameters = self._where(username, author_id, start, cutoff)
+        sql = 'SELECT COUNT(*) FROM statuses{0}'.format(where)
+        return self.connection.execute(sql, parameters).fetchone()[0]
+
+    def status_rate(self, username, hours=24, start=None):
+        """
+        Computes an account's archived statuses per hour over a recent timeframe.
+
+        Args:
+            username (str): The archived account.
+            hours (int): How many hours before ``start`` are counted.
+            start (datetime): When the counted timeframe ends. Defaults to ``now``.
+
+        Returns:
+            float: Statuses per hour.
+        """
+        if start is None:
+            start = datetime.now(tz=timezone.utc)
+        hours = abs(hours)
+        cutoff = start + timedelta(hours=hours * -1)
+        count = self.count(username=username, start=start, cutoff=cutoff)
+        return count / hours if hours else 0.0
+
+    def to_timeline(self, username=None, hours=24, start=None, author_id=None, lazy=False):
+        """
+        Builds a timeline JSON object from a time-range query, e.g. the last ``hours``
+        of an account's statuses.
+
+        Args:
+            username (str): The archived account.
+            hours (int): How many hours before ``start`` the timeline covers.
+            start (datetime): When the timeline ends. Defaults to ``now``.
+            author_id (int): Restricts the timeline to statuses by this author.
+            lazy (bool): When ``True``, ``data`` is an `ArchivedStatuses` mapping that
+                streams statuses from the database instead of a ``dict``.
+
+        Returns:
+            dict: A JSON object in the same format as an encoded `~.classes.Timeline`.
+        """
+        if start is None:
+            start = datetime.now(tz=timezone.utc)
+        cutoff = start + timedelta(hours=abs(hours) * -1)
+        data = ArchivedStatuses(self, username=username, author_id=author_id, start=start,
+                                cutoff=cutoff)
+        if not lazy:
+            data = dict(data.items())
+        timeline = {
+            'start': start.isoformat(),
+            'cutoff': cutoff.isoformat(),
+            'data': data,
+            'total': len(data),
+            'username': username
+        }
+        return timeline
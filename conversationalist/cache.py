@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import pickle
+import types
+
+CONVERSION_CACHE_VERSION = 1
+
+
+class PeriodRenderCache(object):
+    """
+    Reuses rendered fragments for periods whose ``fingerprint`` is unchanged.
+
+    ``write`` implementations call `render` for each period instead of rendering it
+    directly. Only new or changed periods reach the render callable; the rest are
+    served from memory or, when a ``directory`` is given, from fragments saved by
+    earlier runs.
+
+    Attributes:
+        directory (str): Where fragments are saved between runs. Optional.
+        fragments (dict): Rendered fragments keyed to period fingerprints.
+        hits (int): The count of periods served from the cache.
+        misses (int): The count of periods that had to be rendered.
+    """
+    extension = '.fragment'
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.fragments = {}
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _fragment_path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + self.extension)
+
+    def get(self, fingerprint):
+        """
+        Returns:
+            str: The cached fragment for the fingerprint or ``None``.
+        """
+        fragment = self.fragments.get(fingerprint)
+        if fragment is None and self.directory:
+            fragment_path = self._fragment_path(fingerprint)
+            if os.path.isfile(fragment_path):
+                with open(fragment_path) as infile:
+                    fragment = infile.read()
+                self.fragments[fingerprint] = fragment
+        return fragment
+
+    def set(self, fingerprint, fragment):
+        self.fragments[fingerprint] = fragment
+        if self.directory:
+            with open(self._fragment_path(fingerprint), 'w') as outfile:
+                outfile.write(fragment)
+
+    def render(self, period, render_period):
+        """
+        Returns a period's rendered fragment, calling ``render_period`` only when no
+        fragment exists for the period's fingerprint.
+
+        Args:
+            period (dict): A period produced by `~.adapters.to_periods`.
+            render_period: Callable that takes a period and returns its fragment as a
+                string.
+
+        Returns:
+            str: The rendered fragment.
+        """
+        fingerprint = period['fingerprint']
+        fragment = self.get(fingerprint)
+        if fragment is None:
+            self.misses += 1
+            fragment = render_period(period)
+            self.set(fingerprint, fragment)
+        else:
+            self.hits += 1
+        return fragment
+
+    def prune(self, periods):
+        """
+        Discards fragments for fingerprints that no longer belong to any of the passed
+        periods.
+
+        Args:
+            periods (list): The periods currently being rendered.
+
+        Returns:
+            int: The count of discarded fragments.
+        """
+        current = set(period['fingerprint'] for period in periods)
+        stale = set(fingerprint for fingerprint in self.fragments if fingerprint not in current)
+        if self.directory:
+            for file_name in os.listdir(self.directory):
+                fingerprint, extension = os.path.splitext(file_name)
+                if extension == self.extension and fingerprint not in current:
+                    stale.add(fingerprint)
+                    os.remove(os.path.join(self.directory, file_name))
+        for fingerprint in stale:
+            self.fragments.pop(fingerprint, None)
+        return len(stale)
+
+
+def get_code_digest(code):
+    """
+    Returns:
+        str: A digest of a code object's bytecode and constants, including those of
+        nested functions.
+    """
+    digest = hashlib.sha256(code.co_code)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            digest.update(get_code_digest(constant).encode('utf-8'))
+        else:
+            digest.update(repr(constant).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_callable_key(value):
+    """
+    Identifies a callable by its qualified name and, when it is written in Python,
+    the digest of its code, so editing a function such as a ``sample_weight``
+    changes the key.
+
+    Returns:
+        str: The key.
+    """
+    function = getattr(value, '__func__', value)
+    name = '{0}.{1}'.format(getattr(function, '__module__', None),
+                            getattr(function, '__qualname__', type(function).__qualname__))
+    code = getattr(function, '__code__', None)
+    if code is None:
+        return name
+    return '{0}:{1}'.format(name, get_code_digest(code))
+
+
+def get_adapter_settings(adapter):
+    """
+    Collects an adapter class's public attributes, such as ``style_words`` or
+    ``header_pattern``. Callable attributes, such as ``sample_weight`` or
+    ``convert``, are keyed by `get_callable_key`.
+
+    Args:
+        adapter: An adapter class.
+
+    Returns:
+        dict: Attribute values keyed to attribute names.
+    """
+    settings = {}
+    for name in dir(adapter):
+        if not name.startswith('_'):
+            value = getattr(adapter, name)
+            settings[name] = get_callable_key(value) if callable(value) else value
+    return settings
+
+
+class ConversionCache(object):
+    """
+    Stores conversation data on disk keyed by the content of the timeline file and the
+    adapter configuration that converted it.
+
+    Entries are evicted, least recently used first, once their total size exceeds
+    ``max_bytes``.
+
+    Attributes:
+        directory (str): Where entries are saved.
+        max_bytes (int): The size bound for all entries together.
+    """
+    extension = '.pickle'
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, json_file, adapter, title):
+        """
+        Hashes a timeline file's bytes together with the adapter's class, its settings,
+        and the conversation title.
+
+        Args:
+            json_file (str): The file location of the timeline JSON.
+            adapter: The adapter class.
+            title (str): The conversation's title.
+
+        Returns:
+            str: A hexadecimal digest.
+        """
+        digest = hashlib.sha256()
+        with open(json_file, 'rb') as infile:
+            for chunk in iter(lambda: infile.read(1024 * 1024), b''):
+                digest.update(chunk)
+        configuration = [
+            CONVERSION_CACHE_VERSION,
+            '{0}.{1}'.format(adapter.__module__, adapter.__qualname__),
+            get_adapter_settings(adapter),
+            title
+        ]
+        digest.update(json.dumps(configuration, sort_keys=True, default=repr).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def get(self, key):
+        """
+        Returns:
+            The cached entry or ``None``.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as infile:
+                entry = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # refresh the access time that eviction relies on
+        os.utime(entry_path)
+        return entry
+
+    def set(self, key, entry):
+        entry_path = self._entry_path(key)
+        temporary_path = entry_path + '.tmp'
+        with open(temporary_path, 'wb') as outfile:
+            pickle.dump(entry, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, entry_path)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits ``max_bytes``.
+
+        Returns:
+            int: The count of removed entries.
+        """
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith(self.extension):
+                entry_path = os.path.join(self.directory, file_name)
+                stat = os.stat(entry_path)
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+        entries.sort()
+        total = sum(size for mtime, size, entry_path in entries)
+        removed = 0
+        for mtime, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(entry_path)
+            total -= size
+            removed += 1
+        return removed
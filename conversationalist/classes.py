@@ -1,10 +1,60 @@
+from bisect import bisect_left
 from datetime import datetime, timedelta, timezone
+import hashlib
+from importlib import import_module
 import json
-import pytz
 from operator import attrgetter
-from dateutil.parser import parse
-from tweepy.error import TweepError
-from tweepy.models import User, Status
+from .compression import open_timeline_file
+from .serializers import get_serializer
+
+# tweepy is only needed to fetch and encode timelines, so it is imported on first use.
+# Workers that only convert stored timeline JSON never pay for loading it.
+TWEEPY_NAMES = {
+    'TweepError': 'tweepy.error',
+    'Status': 'tweepy.models',
+    'User': 'tweepy.models',
+}
+
+
+def import_tweepy(name):
+    """
+    Imports ``TweepError``, ``Status``, or ``User`` from tweepy on first use.
+
+    Args:
+        name (str): The tweepy name.
+
+    Returns:
+        The tweepy class.
+    """
+    value = globals().get(name)
+    if value is None:
+        value = getattr(import_module(TWEEPY_NAMES[name]), name)
+        globals()[name] = value
+    return value
+
+
+def __getattr__(name):
+    if name in TWEEPY_NAMES:
+        return import_tweepy(name)
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+
+def parse_datetime(value):
+    """
+    Parses the ISO8601 strings written by the encoders with ``datetime.fromisoformat``.
+    Other formats fall back to ``dateutil``, which is imported only when needed.
+
+    Args:
+        value (str): A date and time string.
+
+    Returns:
+        datetime: The parsed datetime.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil.parser import parse
+        return parse(value)
 
 
 class UserEncoder(json.JSONEncoder):
@@ -30,7 +80,7 @@ class StatusEncoder(json.JSONEncoder):
     The ``created_at`` property is encoded as a string in ISO8601 format.
     """
     def default(self, obj):
-        if isinstance(obj, User):
+        if isinstance(obj, import_tweepy('User')):
             return UserEncoder().default(obj)
         simple_origin = None
         origin = getattr(obj, 'origin', None)
@@ -40,6 +90,7 @@ class StatusEncoder(json.JSONEncoder):
                 'text': obj.origin.text
             }
         status = {
+            'id': obj.id,
             'author': obj.author,
             'origin': simple_origin,
             'text': obj.text,
@@ -56,9 +107,9 @@ class TimelineEncoder(json.JSONEncoder):
     The ``start`` and ``cutoff`` properties are encoded as strings in ISO8601 format.
     """
     def default(self, obj):
-        if isinstance(obj, User):
+        if isinstance(obj, import_tweepy('User')):
             return UserEncoder().default(obj)
-        if isinstance(obj, Status):
+        if isinstance(obj, import_tweepy('Status')):
             return StatusEncoder().default(obj)
         timeline = {
             'start': obj.start.isoformat(),
@@ -67,9 +118,380 @@ class TimelineEncoder(json.JSONEncoder):
             'total': obj.total,
             'username': obj.username
         }
+        if getattr(obj, 'threads', None) is not None:
+            timeline['threads'] = obj.threads
         return timeline
 
 
+def collect_users(statuses):
+    """
+    Builds a table of abbreviated user data for the authors of the passed statuses
+    and the authors of their origins.
+
+    Args:
+        statuses: An iterable of tweepy ``Status`` objects.
+
+    Returns:
+        dict: Encoded users keyed to their identifier as a string.
+    """
+    users = {}
+    for status in statuses:
+        authors = [status.author]
+        origin = getattr(status, 'origin', None)
+        if origin:
+            authors.append(origin.author)
+        for author in authors:
+            key = str(author.id)
+            if key not in users:
+                users[key] = UserEncoder().default(author)
+    return users
+
+
+class NormalizedStatusEncoder(json.JSONEncoder):
+    """
+    Encodes `~.classes.Status` objects into JSON with authors reduced to their
+    identifier.
+
+    The author data itself is expected to live in a timeline's ``users`` table.
+    """
+    def default(self, obj):
+        status = StatusEncoder().default(obj)
+        status['author'] = obj.author.id
+        if status['origin']:
+            status['origin']['author'] = obj.origin.author.id
+        return status
+
+
+class NormalizedTimelineEncoder(TimelineEncoder):
+    """
+    Encodes `~.classes.Timeline` objects into JSON with a top-level ``users`` table.
+
+    Statuses reference their authors (and their origins' authors) by identifier, so
+    each account's data is written once no matter how many statuses it authored.
+    """
+    def default(self, obj):
+        if isinstance(obj, import_tweepy('Status')):
+            return NormalizedStatusEncoder().default(obj)
+        timeline = super().default(obj)
+        timeline['users'] = collect_users(obj.data.values())
+        return timeline
+
+
+def resolve_users(timeline):
+    """
+    Replaces author identifiers in a normalized timeline JSON object with the
+    matching entries of its ``users`` table.
+
+    Statuses that share an author end up sharing the same ``dict``. Timelines without
+    a ``users`` table, and statuses that already hold author data, are left untouched.
+
+    Args:
+        timeline (dict): A JSON object representing a timeline.
+
+    Returns:
+        dict: The same timeline object.
+    """
+    users = timeline.get('users')
+    if not users:
+        return timeline
+    for status in timeline.get('data', {}).values():
+        author = status['author']
+        if not isinstance(author, dict):
+            status['author'] = users[str(author)]
+        origin = status.get('origin')
+        if origin and not isinstance(origin['author'], dict):
+            origin['author'] = users[str(origin['author'])]
+    return timeline
+
+
+def get_period_index(data):
+    """
+    Returns:
+        list: The sorted ``id`` values of conversation data's periods.
+    """
+    periods = data.get('periods', [])
+    ids = getattr(periods, 'ids', None)
+    if ids is not None:
+        return list(ids)
+    return [period['id'] for period in periods]
+
+
+def cut_periods(periods, period_index, cutoff):
+    """
+    Selects the periods holding statuses newer than a cutoff by bisecting their
+    sorted ids. Only the period straddling the cutoff is filtered status by status.
+
+    A sampled boundary period (see `~.adapters.SampledHourlySummary`) keeps the exact
+    ``count`` of the whole period. The times of its discarded statuses are not kept,
+    so its ``estimated_count`` scales that count by the share of its sample newer
+    than the cutoff.
+
+    Args:
+        periods (list): Periods ordered by ``id``.
+        period_index (list): The periods' ``id`` values.
+        cutoff (datetime): Statuses must be newer than this.
+
+    Returns:
+        list: The selected periods, sharing data with the passed ones.
+    """
+    cutoff_seconds = cutoff.timestamp()
+    first = bisect_left(period_index, cutoff_seconds)
+    if first:
+        # the period before may straddle the cutoff
+        first -= 1
+    window_periods = periods[first:]
+    if window_periods and window_periods[0]['id'] < cutoff_seconds:
+        boundary = dict(window_periods[0])
+        boundary['statuses'] = [status for status in boundary['statuses']
+                                if parse_datetime(status['created_at']) > cutoff]
+        if 'count' in boundary:
+            sampled = len(window_periods[0]['statuses'])
+            boundary['estimated_count'] = round(boundary['count'] * len(boundary['statuses']) /
+                                                sampled)
+        if len(boundary['statuses']) < len(window_periods[0]['statuses']):
+            # recounted from the statuses kept
+            boundary.pop('participants', None)
+            boundary.pop('participant_count', None)
+            boundary.pop('topic_headers', None)
+        if 'fingerprint' in boundary:
+            content = '{0}:{1}'.format(boundary['fingerprint'], cutoff.isoformat())
+            boundary['fingerprint'] = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        window_periods = window_periods[1:]
+        if boundary['statuses']:
+            if isinstance(window_periods, list):
+                window_periods.insert(0, boundary)
+            else:
+                # lazily assembled periods, see `~.adapters.LazyPeriods`
+                window_periods = window_periods.prepend(boundary)
+    return window_periods
+
+
+def summarize_periods(data, periods, rollups=None):
+    """
+    Copies conversation data for a subset of its periods, recounting participation
+    and navigation from the statuses of those periods, or from the ``participants``
+    and ``topic_headers`` of sampled periods (see `~.adapters.SampledHourlySummary`),
+    which name only each period's most active participants.
+
+    Args:
+        data (dict): Conversation data produced by an adapter.
+        periods (list): The subset of periods.
+        rollups (dict): The matching subsets of the data's rollup periods. Rollups
+            are left out of the copy when omitted.
+
+    Returns:
+        dict: The conversation data for the subset.
+    """
+    summary = dict(data, periods=periods)
+    summary.pop('rollups', None)
+    if rollups is not None:
+        summary['rollups'] = rollups
+    participation = None
+    if 'participation' in data:
+        participation = Participation(users=data['participation'].users)
+    topic_headers = set()
+    status_ids = set()
+    # lazily assembled periods are read one at a time
+    for period in periods:
+        # sampled periods report what their dropped statuses took part in
+        if participation and 'participants' in period:
+            participation.add_counts(period['participants'])
+        topic_headers.update(period.get('topic_headers', ()))
+        for status in period['statuses']:
+            status_ids.add(status.get('id'))
+            if participation and 'participants' not in period:
+                participation.add_status(status)
+            if status.get('topic_header'):
+                topic_headers.add(status['topic_header'])
+    if participation:
+        summary['participation'] = participation
+    for key in ('nav', 'topic_headers'):
+        if key in data:
+            summary[key] = sorted(topic_headers)
+    if 'threads' in data:
+        summary['threads'] = [thread for thread in data['threads']
+                              if not status_ids.isdisjoint(get_thread_ids(thread))]
+    return summary
+
+
+def get_thread_ids(node):
+    """
+    Returns:
+        set: The identifiers of a thread node and of every reply below it.
+    """
+    ids = set()
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        ids.add(node['id'])
+        nodes.extend(node['replies'])
+    return ids
+
+
+def get_status_ids(period):
+    """
+    Returns:
+        list: The identifiers of a period's statuses, in order.
+    """
+    return [str(status.get('id') or status['created_at']) for status in period['statuses']]
+
+
+def get_participation_counts(participation):
+    """
+    Returns:
+        dict: The exchange count and profile url of each participant, keyed to
+        screen names.
+    """
+    return {name: {'exchange_count': participant.exchange_count,
+                   'profile_url': participant.profile_url}
+            for name, participant in participation.participants.items()}
+
+
+def diff_periods(previous_periods, current_periods):
+    """
+    Matches two lists of periods by ``id``. A matched period is changed when its
+    fingerprint or its status identifiers differ.
+
+    Returns:
+        dict: ``added`` and ``changed`` lists of periods and a sorted ``removed``
+        list of period ids.
+    """
+    previous_periods = {period['id']: period for period in previous_periods}
+    added = []
+    changed = []
+    current_ids = set()
+    for period in current_periods:
+        current_ids.add(period['id'])
+        earlier = previous_periods.get(period['id'])
+        if earlier is None:
+            added.append(period)
+        elif earlier.get('fingerprint') != period.get('fingerprint') or \
+                get_status_ids(earlier) != get_status_ids(period):
+            changed.append(period)
+    return {
+        'added': added,
+        'changed': changed,
+        'removed': sorted(identifier for identifier in previous_periods
+                          if identifier not in current_ids)
+    }
+
+
+def apply_periods(periods, delta):
+    """
+    Applies a delta from `diff_periods` to the periods it was computed against.
+
+    Returns:
+        list: The later periods, ordered by ``id``.
+    """
+    periods = {period['id']: period for period in periods}
+    for identifier in delta['removed']:
+        periods.pop(identifier, None)
+    for period in delta['added'] + delta['changed']:
+        periods[period['id']] = period
+    return [periods[identifier] for identifier in sorted(periods)]
+
+
+def diff_data(previous, current):
+    """
+    Builds a delta holding what changed between two versions of conversation data.
+
+    Periods are matched by ``id`` (see `diff_periods`). Title, navigation, threads,
+    rollups, and participation appear in the delta only when they changed.
+
+    Args:
+        previous (dict): The earlier conversation data, or ``None``.
+        current (dict): The later conversation data.
+
+    Returns:
+        dict: The delta, with ``added`` and ``changed`` lists of periods and a sorted
+        ``removed`` list of period ids. Rollup changes map level names to the same
+        lists under ``rollups``, or to ``None`` for levels no longer built.
+        Participation changes map screen names to their counts and profile urls
+        under ``participation['participants']``, with departed screen names under
+        ``participation['removed']``.
+    """
+    previous = previous or {}
+    delta = diff_periods(previous.get('periods', []), current.get('periods', []))
+    for key in ('title', 'nav', 'topic_headers', 'threads'):
+        if key in current and previous.get(key) != current[key]:
+            delta[key] = current[key]
+    previous_rollups = previous.get('rollups') or {}
+    current_rollups = current.get('rollups') or {}
+    rollups = {}
+    for level, periods in current_rollups.items():
+        level_delta = diff_periods(previous_rollups.get(level, []), periods)
+        if any(level_delta.values()):
+            rollups[level] = level_delta
+    for level in previous_rollups:
+        if level not in current_rollups:
+            rollups[level] = None
+    if rollups:
+        delta['rollups'] = rollups
+    if 'participation' in current:
+        counts = get_participation_counts(current['participation'])
+        earlier_counts = {}
+        if previous.get('participation'):
+            earlier_counts = get_participation_counts(previous['participation'])
+        participants = {name: count for name, count in counts.items()
+                        if earlier_counts.get(name) != count}
+        removed = sorted(name for name in earlier_counts if name not in counts)
+        if participants or removed:
+            delta['participation'] = {'participants': participants, 'removed': removed}
+    return delta
+
+
+def is_empty_delta(delta):
+    """
+    Returns:
+        bool: ``True`` if a delta from `diff_data` holds no changes.
+    """
+    return not any(delta.values())
+
+
+def apply_delta(data, delta):
+    """
+    Applies a delta from `diff_data` to the conversation data it was computed
+    against.
+
+    Args:
+        data (dict): The earlier conversation data. It is left unchanged.
+        delta (dict): The delta.
+
+    Returns:
+        dict: The later conversation data, without the earlier data's ``index``.
+    """
+    updated = dict(data, periods=apply_periods(data.get('periods', []), delta))
+    # the index refers to the earlier statuses
+    updated.pop('index', None)
+    for key in ('title', 'nav', 'topic_headers', 'threads'):
+        if key in delta:
+            updated[key] = delta[key]
+    if 'rollups' in delta:
+        rollups = dict(data.get('rollups') or {})
+        for level, level_delta in delta['rollups'].items():
+            if level_delta is None:
+                rollups.pop(level, None)
+            else:
+                rollups[level] = apply_periods(rollups.get(level, []), level_delta)
+        if rollups:
+            updated['rollups'] = rollups
+        else:
+            updated.pop('rollups', None)
+    if 'participation' in delta:
+        earlier = data.get('participation')
+        participation = Participation(users=earlier.users if earlier else None)
+        counts = get_participation_counts(earlier) if earlier else {}
+        counts.update(delta['participation']['participants'])
+        for name in delta['participation']['removed']:
+            counts.pop(name, None)
+        for name, count in counts.items():
+            participant = Participant(name, count['profile_url'])
+            participant.exchange_count = count['exchange_count']
+            participation.participants[name] = participant
+        updated['participation'] = participation
+    return updated
+
+
 class Participant(object):
     def __init__(self, name, profile_url=None):
         self.exchange_count = 0
@@ -81,17 +503,57 @@ class Participant(object):
 
 
 class Participation(object):
-    def __init__(self):
+    """
+    Counts the statuses authored by each participant of a conversation.
+
+    Args:
+        users (dict): Optional table of user data keyed to identifier strings, as
+            found in a normalized timeline. Lets ``add_tweet`` accept identifiers.
+
+    Attributes:
+        participants (dict): ``Participant`` objects keyed to screen names.
+    """
+    def __init__(self, users=None):
         self.participants = {}
+        self.users = users or {}
+        self._participants_by_id = {}
 
-    def add_tweet(self, author):
-        if author['screen_name'] in self.participants:
-            participant = self.participants[author['screen_name']]
-            participant.increment_participation()
-        else:
-            participant = Participant(author['screen_name'], author['profile_image_url'])
-            participant.increment_participation()
-            self.participants[author['screen_name']] = participant
+    def add_tweet(self, author, count=1):
+        if not isinstance(author, dict):
+            author = self.users[str(author)]
+        author_id = author.get('id')
+        participant = self._participants_by_id.get(author_id)
+        if participant is None:
+            participant = self.participants.get(author['screen_name'])
+            if participant is None:
+                participant = Participant(author['screen_name'], author['profile_image_url'])
+                self.participants[author['screen_name']] = participant
+            if author_id is not None:
+                self._participants_by_id[author_id] = participant
+        participant.exchange_count += count
+
+    def add_status(self, status):
+        """
+        Counts a status JSON object's author, its origin's author, and the exchanges
+        of the duplicates collapsed into it (see `~.dedup.Deduplicator`).
+        """
+        self.add_tweet(status['author'])
+        if status['origin']:
+            self.add_tweet(status['origin']['author'])
+        duplicates = status.get('duplicates')
+        if duplicates:
+            for exchange in duplicates['exchanges']:
+                self.add_tweet(exchange['author'], exchange['count'])
+
+    def add_counts(self, counts):
+        """
+        Adds exchange counts, as returned by `get_participation_counts`.
+        """
+        for name, count in counts.items():
+            participant = self.participants.get(name)
+            if participant is None:
+                participant = self.participants[name] = Participant(name, count['profile_url'])
+            participant.exchange_count += count['exchange_count']
 
     def get_ranked_profiles(self):
         ranked_profiles = []
@@ -119,22 +581,27 @@ class Conversation(object):
             title (str): The name for the conversation object's data.
             adapter: Handles transformation logic for status data.
 
+        Normalized timelines, which carry a top-level ``users`` table, have their
+        author identifiers resolved against that table.
+
         Attributes:
             title (str): Main name for conversation.
             adapter: Handles transformation logic for status data.
             data (dict): Contains pairing of timestamps and statuses keyed to 'hourlies', as
                 well as a title name keyed to 'title'.
+            period_index (list): The sorted ``id`` values of the data's periods.
         """
         self.data = None
-        self.timeline = timeline
+        self.period_index = []
+        self.timeline = resolve_users(timeline) if timeline else timeline
         self.title = title
         self.adapter = adapter
         self.update_conversation()
 
     def _get_timeline_interval(self):
         if self.timeline:
-            start = parse(self.timeline['start'])
-            cutoff = parse(self.timeline['cutoff'])
+            start = parse_datetime(self.timeline['start'])
+            cutoff = parse_datetime(self.timeline['cutoff'])
             return start, cutoff
         return None, None
 
@@ -145,18 +612,147 @@ class Conversation(object):
         if self.timeline and self.adapter:
             adapter = self.adapter(self)
             self.data = adapter.convert()
+            if 'threads' in self.timeline:
+                self.data['threads'] = self.timeline['threads']
+            self.period_index = get_period_index(self.data)
+
+    def window(self, hours):
+        """
+        Cuts a conversation covering the last ``hours`` of this conversation's timeline.
+
+        Periods are selected by bisecting the sorted period index, so the adapter is not
+        run again and the returned conversation shares its period and status data with
+        this one. Only the period straddling the window's cutoff is filtered status by
+        status. Participation, navigation, and rollup data are recounted for the window.
+
+        Args:
+            hours (int): The window's timeframe. Expected to be no wider than the
+                timeline's own.
 
-    def load(self, json_file):
+        Returns:
+            Conversation: A conversation holding the windowed data.
+        """
+        start, cutoff = self._get_timeline_interval()
+        window_cutoff = start + timedelta(hours=abs(hours) * -1)
+        conversation = Conversation(title=self.title)
+        conversation.timeline = dict(self.timeline, cutoff=window_cutoff.isoformat())
+        if not self.data:
+            return conversation
+        window_periods = cut_periods(self.data['periods'], self.period_index, window_cutoff)
+        rollups = None
+        if 'rollups' in self.data:
+            rollups = {level: cut_periods(periods, [period['id'] for period in periods],
+                                          window_cutoff)
+                       for level, periods in self.data['rollups'].items()}
+        conversation.data = summarize_periods(self.data, window_periods, rollups)
+        conversation.period_index = get_period_index(conversation.data)
+        return conversation
+
+    def diff(self, previous):
+        """
+        Computes what changed since an earlier version of this conversation, e.g. so
+        a refresh only sends or renders the periods that changed. See `diff_data`
+        and `apply_delta`.
+
+        Args:
+            previous: The earlier ``Conversation`` or its data.
+
+        Returns:
+            dict: The delta.
+        """
+        if isinstance(previous, Conversation):
+            previous = previous.data
+        return diff_data(previous, self.data or {})
+
+    def search(self, query):
+        """
+        Produces a conversation holding only the statuses that contain every term of
+        a query, using the index built by an adapter with ``build_index`` set.
+
+        Args:
+            query (str): Space separated terms.
+
+        Returns:
+            Conversation: A conversation holding the filtered data.
+        """
+        periods = self.data['index'].filter_periods(self.data['periods'], query)
+        conversation = Conversation(title=self.title)
+        conversation.timeline = self.timeline
+        conversation.data = summarize_periods(self.data, periods)
+        conversation.period_index = [period['id'] for period in periods]
+        return conversation
+
+    def topic_periods(self, topic_header):
+        """
+        Returns:
+            list: The periods in which a topic header appears, found with the index
+            built by an adapter with ``build_index`` set.
+        """
+        periods = []
+        for period_id in self.data['index'].topic_periods(topic_header):
+            position = bisect_left(self.period_index, period_id)
+            # windowed conversations share the index but hold fewer periods
+            if position < len(self.period_index) and self.period_index[position] == period_id:
+                periods.append(self.data['periods'][position])
+        return periods
+
+    def load(self, json_file, compression=None, cache=None, json_backend=None):
         """
         Transforms the JSON data for a user timeline into
         relevant properties for this class.
 
+        When a ``cache`` holds data for the same file content, adapter, and title,
+        that data is restored without parsing or converting the timeline. The
+        restored ``timeline`` then carries the timeline's properties but not its
+        statuses.
+
         Args:
             json_file (str): The file location of the timeline JSON.
+            compression (str): The file's compression format. Inferred from the
+                file extension when omitted.
+            cache: A `~.cache.ConversionCache` instance. Optional.
+            json_backend (str): The JSON library used to parse the file. See
+                `~.serializers.get_serializer`.
         """
-        with open(json_file) as infile:
-            timeline_json = json.load(infile)
-        self.timeline = timeline_json
+        key = None
+        if cache and self.adapter:
+            key = cache.key(json_file, self.adapter, self.title)
+            entry = cache.get(key)
+            if entry is not None:
+                self.timeline = entry['timeline']
+                self.data = entry['data']
+                self.period_index = get_period_index(self.data)
+                return
+        serializer = get_serializer(json_backend)
+        with open_timeline_file(json_file, 'r', compression, binary=True) as infile:
+            timeline_json = serializer.load(infile)
+        self.timeline = resolve_users(timeline_json)
+        self.update_conversation()
+        # lazily assembled periods live in temporary files and are not cached
+        if key and isinstance(self.data.get('periods'), list):
+            timeline_properties = {name: value for name, value in self.timeline.items()
+                                   if name not in ('data', 'users')}
+            cache.set(key, {'timeline': timeline_properties, 'data': self.data})
+
+    def load_archive(self, archive, username=None, hours=24, start=None, author_id=None,
+                     lazy=False):
+        """
+        Builds the conversation from a time-range query against a timeline archive.
+
+        With ``lazy`` set, statuses are streamed from the archive during conversion
+        instead of being loaded up front, which pairs with an adapter's
+        ``memory_budget`` to convert large archives in bounded memory.
+
+        Args:
+            archive: A `~.archive.TimelineArchive` instance.
+            username (str): The archived account.
+            hours (int): How many hours before ``start`` the conversation covers.
+            start (datetime): When the conversation ends. Defaults to ``now``.
+            author_id (int): Restricts the conversation to statuses by this author.
+            lazy (bool): Whether statuses are streamed from the archive.
+        """
+        self.timeline = archive.to_timeline(username=username, hours=hours, start=start,
+                                            author_id=author_id, lazy=lazy)
         self.update_conversation()
 
 
@@ -170,11 +766,35 @@ class Timeline(object):
         start (datetime): When the timeline starts. Set to ``now`` at initialization.
         cutoff (datetime): When in the past the timeline's search for statuses ends.
         data (dict): Maps an identifier to status information.
+        fetched (dict): Maps an identifier to every status seen while loading,
+            including statuses older than the cutoff and origins fetched from the API.
+        missing (set): Identifiers of origins and thread ancestors the API could not
+            return, which are not requested again.
+        oldest_fetched (datetime): The oldest ``created_at`` of any status loaded by
+            the latest crawl or `update`, including statuses dropped for being beyond
+            the cutoff.
+        origin_fetches (int): The count of API requests made for origins.
+        pages_fetched (int): The count of timeline pages requested.
+        pages_useful (int): The count of timeline pages that added statuses.
+        page_size (int): The count of statuses requested per page. When ``None``, the
+            API's default page size is used.
+        threads (list): Reply trees built by `build_threads`, or ``None``.
+        thread_fetches (int): The count of API requests made for thread ancestors.
         username (str): The targeted account's username.
     """
-    def __init__(self, api=None, username=None, timeframe=-24):
+    def __init__(self, api=None, username=None, timeframe=-24, page_size=None):
         self.api = api
+        self.page_size = page_size
         self.earliest_status = None
+        self.fetched = {}
+        self.missing = set()
+        self.oldest_fetched = None
+        self.origin_fetches = 0
+        self.pages_fetched = 0
+        self.pages_useful = 0
+        self.threads = None
+        self.thread_fetches = 0
+        self._pending_origins = []
         self.start = datetime.now(tz=timezone.utc)
         safe_timeframe = abs(timeframe) * -1
         self.cutoff = self.start + timedelta(hours=safe_timeframe)
@@ -183,56 +803,168 @@ class Timeline(object):
         if api and username:
             self._generate_timeline()
 
-    def load(self, statuses):
+    def load(self, statuses, defer_origins=False):
         """
         The method transforms and appends the passed statuses to the class instances
         `statuses` property.
 
         If a status is a response, the method searches for the original
-        tweet an adds the text and author name to the status data.
+        tweet an adds the text and author name to the status data. The original
+        is looked up among the statuses already fetched by the instance (including
+        the rest of the passed batch) before the API is asked for it.
 
         Raises:
             TweepError: If tweepy error occurs while seeking an origin for a
                 status, which is typically a tweet that was responded too.
         Args:
             statuses (list): A a list of tweepy ``Status`` objects.
+            defer_origins (bool): When ``True``, origins that cannot be found locally
+                are queued until `resolve_origins` is called, so statuses fetched
+                later may still satisfy them.
         """
+        replies = []
         for status in statuses:
             if str(status.id) not in self.data:
                 # check if 'created_at' is naive. Tweepy creates naive created_at fields
                 # from utc timestamps parsed from Twitter API's RFC 2822 format
                 if status.created_at.tzinfo is None or \
                         status.created_at.tzinfo.utcoffset(status.created_at) is None:
-                    utc = pytz.utc
                     # naive to utc
-                    utc_created_at = utc.localize(status.created_at)
-                    status.created_at = utc_created_at
+                    status.created_at = status.created_at.replace(tzinfo=timezone.utc)
+                self.fetched[str(status.id)] = status
+                if self.oldest_fetched is None or status.created_at < self.oldest_fetched:
+                    self.oldest_fetched = status.created_at
                 if status.created_at > self.cutoff:
                     #status.text = status.text.encode('ascii', 'ignore')
                     status.origin = None
                     if status.in_reply_to_status_id:
-                        try:
-                            status.origin = self.api.get_status(status.in_reply_to_status_id)
-                            #status.origin.text = status.origin.text.encode('ascii', 'ignore')
-                            user = status.origin.author
-                            status.origin.author_name = user.screen_name
-                        except TweepError:
-                            print('Error while fetching origin for tweet {0}'.format(status.id))
+                        replies.append(status)
                     self.data[str(status.id)] = status
+        for status in replies:
+            if not self._set_local_origin(status):
+                if defer_origins:
+                    self._pending_origins.append(status)
+                else:
+                    self._fetch_origin(status)
+
+    def _set_local_origin(self, status):
+        """
+        Attaches a status's origin when it is among the fetched statuses.
+
+        Returns:
+            bool: ``True`` if the origin was found.
+        """
+        origin = self.fetched.get(str(status.in_reply_to_status_id))
+        if origin is None:
+            return False
+        status.origin = origin
+        status.origin.author_name = origin.author.screen_name
+        return True
+
+    def _fetch_origin(self, status):
+        """
+        Requests a status's origin from the API and keeps it for later replies.
+        Without an API instance, e.g. for a streamed timeline, or when the origin is
+        known to be unavailable, the origin is left unset.
+        """
+        if self.api is None or str(status.in_reply_to_status_id) in self.missing:
+            return
+        tweep_error = import_tweepy('TweepError')
+        self.origin_fetches += 1
+        try:
+            origin = self.api.get_status(status.in_reply_to_status_id)
+        except tweep_error:
+            print('Error while fetching origin for tweet {0}'.format(status.id))
+            self.missing.add(str(status.in_reply_to_status_id))
+            return
+        #status.origin.text = status.origin.text.encode('ascii', 'ignore')
+        self.fetched[str(status.in_reply_to_status_id)] = origin
+        self._set_local_origin(status)
+
+    def resolve_origins(self):
+        """
+        Attaches the origins queued by deferred loads. Origins fetched since the
+        statuses were loaded are used directly; the API is called only for the rest.
+        """
+        pending = self._pending_origins
+        self._pending_origins = []
+        for status in pending:
+            if not self._set_local_origin(status):
+                self._fetch_origin(status)
+
+    def build_threads(self, max_depth=3):
+        """
+        Resolves the reply chains of the timeline's statuses up to ``max_depth``
+        ancestors and keeps them as reply trees in ``threads``, which are encoded with
+        the timeline and copied into the conversation data. See
+        `~.threads.ThreadBuilder`.
+
+        Ancestors are looked up among ``fetched`` statuses before the API is asked
+        for them, and those requested are added to ``fetched`` (or to ``missing`` when
+        the API cannot return them), so later builds only request new ancestors.
+
+        Args:
+            max_depth (int): How many ancestors are resolved above each status.
+
+        Returns:
+            list: The root nodes of the threads.
+        """
+        from .threads import ThreadBuilder
+        builder = ThreadBuilder(self.api, self.fetched, max_depth, self.missing)
+        self.threads = builder.build(self.data.values())
+        self.thread_fetches += builder.fetches
+        return self.threads
+
+    def advance(self, start=None):
+        """
+        Moves the timeline's window forward so it ends at ``start`` and covers the
+        same timeframe, dropping statuses that are no longer newer than ``cutoff``.
+
+        Fetched statuses, and identifiers in ``missing``, are kept only when they are
+        in the window or are an ancestor of a status in the window, so a long-running
+        timeline stays bounded.
+
+        Args:
+            start (datetime): When the timeline now ends. Defaults to ``now``.
+
+        Returns:
+            int: The count of statuses dropped from ``data``.
+        """
+        if start is None:
+            start = datetime.now(tz=timezone.utc)
+        timeframe = self.start - self.cutoff
+        self.start = start
+        self.cutoff = start - timeframe
+        expired = [identifier for identifier, status in self.data.items()
+                   if status.created_at <= self.cutoff]
+        for identifier in expired:
+            del self.data[identifier]
+        retained = set(self.data)
+        for status in self.data.values():
+            # keep each reply's chain of fetched ancestors for thread building
+            while status is not None and status.in_reply_to_status_id:
+                parent_id = str(status.in_reply_to_status_id)
+                if parent_id in retained:
+                    break
+                retained.add(parent_id)
+                status = self.fetched.get(parent_id)
+        self.fetched = {identifier: status for identifier, status in self.fetched.items()
+                        if identifier in retained}
+        self.missing &= retained
+        self.earliest_status = self.get_earliest_status()
+        return len(expired)
 
     def get_earliest_status(self):
         """
-        Sorts the class instance's `statuses` by their `created_at`
-        property from oldest at the start of the list to newest
-        at the end of the list.
+        Finds the class instance's status with the oldest `created_at`
+        property.
 
         Returns:
             ``Status``: The earliest (oldest) status or ``None`` if empty.
         """
         earliest = None
         if self.data:
-            sorted_statuses = sorted(self.data.values(), key=lambda status: status.created_at)
-            earliest = sorted_statuses[0]
+            earliest = min(self.data.values(), key=lambda status: status.created_at)
         return earliest
 
     @property
@@ -245,72 +977,109 @@ class Timeline(object):
         """
         return len(list(self.data.values()))
 
-    def get_timeline_batch(self, max_id=None):
+    def get_timeline_batch(self, max_id=None, since_id=None):
         """
         Gets a batch of statuses for a user.
 
         If a ``max_id`` is passed, that is supplied to the API
-        is a starting point for fetching the previous 20 tweets.
+        is a starting point for fetching the previous tweets. The instance's
+        ``page_size``, when set, is passed as the API's ``count``.
 
         Args:
             max_id: The last identifier that included in this batch
               of statuses.
+            since_id: Only statuses with a greater identifier are included.
 
         Returns:
             list: A list of tweepy ``Status`` objects. The maximum size of
-            the list is 20.
+            the list is the ``page_size`` or the API's default of 20.
         """
-        if max_id is None:
-            return self.api.user_timeline(self.username)
-        else:
-            return self.api.user_timeline(self.username, max_id=max_id)
+        parameters = {}
+        if max_id is not None:
+            parameters['max_id'] = max_id
+        if since_id is not None:
+            parameters['since_id'] = since_id
+        if self.page_size is not None:
+            parameters['count'] = self.page_size
+        return self.api.user_timeline(self.username, **parameters)
+
+    def _generate_timeline(self, since_id=None):
+        """
+        Called during instance intialization. It fetches tweet statuses allowed
+        by the cutoff timeframe until available statuses are exhausted.
+
+        Pages are requested with an exclusive ``max_id`` (one less than the oldest
+        identifier fetched so far), so no page repeats a status. Fetching stops as
+        soon as a page reaches a status at or beyond the cutoff, even if that status
+        was dropped, or when a page brings nothing unseen.
 
-    def _has_next_tweets(self):
+        Args:
+            since_id: When passed, only statuses newer than this identifier are
+                fetched. Used by `update`.
+        """
+        max_id = None
+        while True:
+            new_tweets = self.get_timeline_batch(max_id, since_id)
+            self.pages_fetched += 1
+            if not new_tweets:
+                break
+            unseen = [status for status in new_tweets if str(status.id) not in self.fetched]
+            if not unseen:
+                break
+            total = len(self.data)
+            self.load(unseen, defer_origins=True)
+            if len(self.data) > total:
+                self.pages_useful += 1
+            if self.oldest_fetched <= self.cutoff:
+                break
+            max_id = min(status.id for status in unseen) - 1
+        self.earliest_status = self.get_earliest_status()
+        self.resolve_origins()
+
+    def update(self):
         """
-        Checks current statuses to see if the timeframe cutoff for a user's timeline
-        has been reached or available statuses have been exhausted.
+        Advances the window to ``now`` and fetches only the statuses posted since
+        the newest status in the timeline, as a long-running process would between
+        refreshes. An empty timeline is crawled in full.
 
         Returns:
-            bool: ``True`` if additional twitter statuses that fit into the timeframe cutoff
-                may exist. ``False`` otherwise.
-        """
-        new_earliest_status = self.get_earliest_status()
-        if new_earliest_status:
-            # Exceeded cutoff because the earliest status is older (lesser) than the cutoff
-            if new_earliest_status.created_at < self.cutoff:
-                self.earliest_status = new_earliest_status
-                return False
-            # In case all available tweets are exhausted
-            if self.earliest_status and \
-                    self.earliest_status.id == new_earliest_status.id:
-                return False
-            # keep going - cutoff not exceeded and new earliest id not the current earliest id
-            self.earliest_status = new_earliest_status
-            return True
-        return False
-
-    def _generate_timeline(self):
+            list: The identifiers of the statuses added to ``data``.
         """
-        Called during instance intialization. It fetches tweet statuses allowed
-        by the cutoff timeframe until available statuses are exhausted.
+        since_id = max((status.id for status in self.data.values()), default=None)
+        self.advance()
+        known = set(self.data)
+        # paging stops at the cutoff, so only statuses from this update may count
+        self.oldest_fetched = None
+        self._generate_timeline(since_id)
+        return [identifier for identifier in self.data if identifier not in known]
+
+    def to_archive(self, archive):
         """
-        tweets_available = True
-        while tweets_available:
-            earliest_id = getattr(self.earliest_status, 'id', None)
-            new_tweets = self.get_timeline_batch(earliest_id)
-            if new_tweets:
-                self.load(new_tweets)
-                tweets_available = self._has_next_tweets()
-            else:
-                tweets_available = False
+        Upserts the instance's statuses into a timeline archive.
+
+        Args:
+            archive: A `~.archive.TimelineArchive` instance.
+
+        Returns:
+            int: The count of statuses written.
+        """
+        return archive.store(self)
 
-    def to_json(self, file_path):
+    def to_json(self, file_path, normalize_users=False, compression=None, json_backend=None):
         """
         Writes a JSON file base on instance data.
 
         Args:
             file_path (str): Where the JSON file will be written.
+            normalize_users (bool): When ``True``, author data is written once in a
+                top-level ``users`` table and statuses hold only author identifiers.
+            compression (str): The compression format, such as ``gzip`` or ``zstd``.
+                Inferred from the file extension when omitted.
+            json_backend (str): The JSON library used to encode the file. See
+                `~.serializers.get_serializer`.
         """
-        with open(file_path, 'w') as outfile:
-            json.dump(self, outfile, cls=TimelineEncoder, indent=2)
+        encoder = NormalizedTimelineEncoder if normalize_users else TimelineEncoder
+        serializer = get_serializer(json_backend)
+        with open_timeline_file(file_path, 'w', compression, binary=True) as outfile:
+            serializer.dump(self, outfile, encoder=encoder, indent=2)
         return file_path
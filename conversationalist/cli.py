@@ -0,0 +1,239 @@
+import argparse
+import configparser
+from importlib import import_module
+import os
+import sys
+from .profiling import Profile
+from .service import StoryService
+from .utils import convert_story, make_story
+
+INTEGER_SETTINGS = ('page_size', 'thread_depth', 'timeframe')
+BOOLEAN_SETTINGS = ('normalize_users',)
+OBJECT_SETTINGS = ('adapter', 'api', 'send_email', 'write')
+PATH_SETTINGS = ('archive', 'conversion_cache', 'story_out', 'timeline_out')
+CREDENTIAL_SETTINGS = ('consumer_key', 'consumer_secret', 'access_token', 'access_token_secret')
+
+
+def import_object(path):
+    """
+    Imports an object from a ``module:name`` or ``module.name`` path, e.g.
+    ``conversationalist.adapters:ParticipationAdapter``.
+
+    Returns:
+        The object.
+
+    Raises:
+        ValueError: If the path cannot be imported.
+    """
+    try:
+        if ':' in path:
+            module_name, name = path.split(':', 1)
+        else:
+            module_name, name = path.rsplit('.', 1)
+        value = import_module(module_name)
+        for attribute in name.split('.'):
+            value = getattr(value, attribute)
+    except (ImportError, AttributeError, ValueError) as error:
+        raise ValueError('Cannot import {0}: {1}'.format(path, error))
+    return value
+
+
+def read_config(config_path, accounts=None):
+    """
+    Reads account settings from an INI file.
+
+    Each section holds an account's settings, as for `~.utils.make_story`, with
+    ``username`` defaulting to the section name. The ``DEFAULT`` section holds
+    settings shared by every account. ``adapter``, ``write``, and ``send_email`` are
+    import paths. The API instance is built from ``consumer_key``,
+    ``consumer_secret``, ``access_token``, and ``access_token_secret``, or by
+    calling the callable at the ``api`` import path with no arguments.
+
+    Args:
+        config_path (str): The file path of the INI file.
+        accounts (list): Names of the sections to read. Every section is read when
+            omitted.
+
+    Returns:
+        list: Settings dicts, without an ``api`` instance.
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    if not parser.read(os.path.expanduser(config_path)):
+        raise ValueError('Cannot read the config file {0}.'.format(config_path))
+    names = parser.sections()
+    if accounts:
+        unknown = sorted(set(accounts) - set(names))
+        if unknown:
+            raise ValueError('No config section for {0}.'.format(', '.join(unknown)))
+        names = [name for name in names if name in accounts]
+    accounts_settings = []
+    for name in names:
+        section = parser[name]
+        settings = dict(section)
+        settings.setdefault('username', name)
+        for key in INTEGER_SETTINGS:
+            if key in settings:
+                settings[key] = section.getint(key)
+        for key in BOOLEAN_SETTINGS:
+            if key in settings:
+                settings[key] = section.getboolean(key)
+        for key in OBJECT_SETTINGS:
+            if key in settings:
+                settings[key] = import_object(settings[key])
+        for key in PATH_SETTINGS:
+            if key in settings:
+                settings[key] = os.path.expanduser(settings[key])
+        accounts_settings.append(settings)
+    return accounts_settings
+
+
+def get_api(settings, apis):
+    """
+    Builds the API instance for an account's settings. Accounts sharing
+    credentials share an instance.
+
+    Args:
+        settings (dict): An account's settings, from `read_config`.
+        apis (dict): API instances built so far, keyed to their credentials.
+
+    Returns:
+        A tweepy API instance.
+    """
+    factory = settings.get('api')
+    key = factory if callable(factory) else tuple(settings.get(name) for name in CREDENTIAL_SETTINGS)
+    if key not in apis:
+        if callable(factory):
+            apis[key] = factory()
+        else:
+            import tweepy
+            auth = tweepy.OAuthHandler(settings['consumer_key'], settings['consumer_secret'])
+            auth.set_access_token(settings['access_token'], settings['access_token_secret'])
+            apis[key] = tweepy.API(auth)
+    return apis[key]
+
+
+def prepare_settings(accounts_settings, profile=None, with_api=True):
+    """
+    Adds the ``api`` instance and the ``profile`` to each account's settings.
+    With a profile, API calls are counted in it.
+
+    Returns:
+        list: The same settings dicts.
+    """
+    apis = {}
+    for settings in accounts_settings:
+        if with_api:
+            api = get_api(settings, apis)
+            settings['api'] = profile.wrap_api(api) if profile else api
+        if profile:
+            settings['profile'] = profile
+    return accounts_settings
+
+
+def run_each(accounts_settings, make):
+    """
+    Makes each account's story, reporting failures without stopping the batch.
+
+    Returns:
+        int: ``0`` when every story was made, otherwise ``1``.
+    """
+    failed = 0
+    for settings in accounts_settings:
+        try:
+            make(settings)
+        except Exception as error:
+            failed += 1
+            print('{0}: {1}'.format(settings['username'], error), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def run_command(arguments, profile=None):
+    accounts_settings = read_config(arguments.config, arguments.account)
+    return run_each(prepare_settings(accounts_settings, profile), make_story)
+
+
+def convert_command(arguments, profile=None):
+    accounts_settings = read_config(arguments.config, arguments.account)
+    return run_each(prepare_settings(accounts_settings, profile, with_api=False), convert_story)
+
+
+def refresh_command(arguments, profile=None):
+    accounts_settings = prepare_settings(read_config(arguments.config, arguments.account),
+                                         profile)
+    # accounts share the service's serializer
+    json_backend = accounts_settings[0].get('json_backend') if accounts_settings else None
+    if len(set(settings.get('json_backend') for settings in accounts_settings)) > 1:
+        print('conversationalist: accounts differ in json_backend; every account uses {0}.'
+              .format(json_backend or 'the default'), file=sys.stderr)
+    service = StoryService(None, json_backend)
+    status = run_each(accounts_settings,
+                      lambda settings: service.add_account(settings, settings['api']))
+    if not service.accounts:
+        return status
+    try:
+        service.run(arguments.interval, arguments.iterations)
+    except KeyboardInterrupt:
+        pass
+    for username, account in service.accounts.items():
+        print('{0}: {1} refreshes, {2} writes'.format(username, account.refreshes,
+                                                      account.writes))
+    return status
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='conversationalist',
+        description='Converts tweet streams into organized, story-telling web pages.')
+    profile_help = 'print the time spent in each stage and the count of API calls'
+    parser.add_argument('--profile', action='store_true', help=profile_help)
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    def add_command(name, function, help_text):
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        command.add_argument('config', help='INI file with a section of settings per account')
+        command.add_argument('-a', '--account', action='append',
+                             help='the config section to use; may be repeated. Defaults to all')
+        # also accepted after the command name
+        command.add_argument('--profile', action='store_true', default=argparse.SUPPRESS,
+                             help=profile_help)
+        command.set_defaults(function=function)
+        return command
+
+    add_command('run', run_command, 'crawl each account and write its story')
+    add_command('convert', convert_command,
+                "write each account's story from its stored timeline file, offline")
+    refresh = add_command('refresh', refresh_command,
+                          "keep each account's story current with incremental fetches")
+    refresh.add_argument('--interval', type=float, default=300.0,
+                         help='seconds between refreshes (default: 300)')
+    refresh.add_argument('--iterations', type=int,
+                         help='how many refreshes to run. Runs until interrupted when omitted')
+    return parser
+
+
+def main(argv=None):
+    """
+    The ``conversationalist`` console command.
+
+    Args:
+        argv (list): Command line arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit status.
+    """
+    arguments = get_parser().parse_args(argv)
+    profile = Profile() if arguments.profile else None
+    try:
+        status = arguments.function(arguments, profile)
+    except (ValueError, ImportError) as error:
+        # ImportError when an optional package, such as a JSON backend, is missing
+        print('conversationalist: {0}'.format(error), file=sys.stderr)
+        return 2
+    if profile:
+        print(profile.report())
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import bz2
+import gzip
+import lzma
+import os
+
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+    '.lz4': 'lz4',
+}
+
+
+def _open_zstd(file_path, mode):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('The zstandard package is required for zstd compressed timelines.')
+    return zstandard.open(file_path, mode)
+
+
+def _open_lz4(file_path, mode):
+    try:
+        import lz4.frame
+    except ImportError:
+        raise ImportError('The lz4 package is required for lz4 compressed timelines.')
+    return lz4.frame.open(file_path, mode)
+
+
+OPENERS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+    'zstd': _open_zstd,
+    'lz4': _open_lz4,
+}
+
+
+def get_compression(file_path, compression=None):
+    """
+    Determines the compression format for a timeline file.
+
+    Args:
+        file_path (str): The timeline file location.
+        compression (str): An explicit format name. One of ``gzip``, ``bz2``, ``xz``,
+            ``zstd``, ``lz4``, or ``none``. When omitted, the format is inferred from
+            the file extension.
+
+    Returns:
+        str: The compression format or ``None`` for plain text files.
+
+    Raises:
+        ValueError: If the requested compression format is not supported.
+    """
+    if compression is None:
+        extension = os.path.splitext(file_path)[1].lower()
+        return COMPRESSION_EXTENSIONS.get(extension)
+    if compression == 'none':
+        return None
+    if compression not in OPENERS:
+        raise ValueError('Unsupported timeline compression: {0}'.format(compression))
+    return compression
+
+
+def open_timeline_file(file_path, mode='r', compression=None, binary=False):
+    """
+    Opens a timeline file for reading or writing, compressing or decompressing the
+    data as it streams through the file object.
+
+    Args:
+        file_path (str): The timeline file location.
+        mode (str): Either ``r`` or ``w``.
+        compression (str): The compression format. Inferred from the file extension
+            when omitted.
+        binary (bool): When ``True``, the file object reads and writes bytes.
+
+    Returns:
+        A text file object, or a binary one when ``binary`` is set.
+    """
+    compression = get_compression(file_path, compression)
+    if compression is None:
+        return open(file_path, mode + 'b' if binary else mode)
+    return OPENERS[compression](file_path, mode + ('b' if binary else 't'))
@@ -0,0 +1,169 @@
+from collections import OrderedDict
+import hashlib
+import re
+
+RETWEET_PATTERN = re.compile(r'^rt @\w+:?\s*')
+URL_PATTERN = re.compile(r'https?://\S+')
+LEADING_MENTIONS_PATTERN = re.compile(r'^(?:@\w+\s+)+')
+NON_WORD_PATTERN = re.compile(r'[^\w\s#@]+')
+SPACE_PATTERN = re.compile(r'\s+')
+SHINGLE_WIDTH = 3
+SIMHASH_BITS = 64
+
+
+def normalize_text(text):
+    """
+    Reduces status text to what copies of it share: lower case, without a retweet
+    prefix, links, leading reply mentions, or punctuation, and with whitespace
+    collapsed.
+
+    Args:
+        text (str): Status text.
+
+    Returns:
+        str: The normalized text.
+    """
+    text = URL_PATTERN.sub(' ', text.lower()).strip()
+    text = RETWEET_PATTERN.sub('', text)
+    text = LEADING_MENTIONS_PATTERN.sub('', text)
+    text = NON_WORD_PATTERN.sub(' ', text)
+    return SPACE_PATTERN.sub(' ', text).strip()
+
+
+def simhash(text, width=SHINGLE_WIDTH):
+    """
+    Computes the 64 bit SimHash of a text's character shingles. Texts differing in a
+    few characters get hashes differing in a few bits.
+
+    Args:
+        text (str): Normalized text.
+        width (int): The shingle length in characters.
+
+    Returns:
+        int: The hash.
+    """
+    bits = []
+    for position in range(max(len(text) - width, 0) + 1):
+        shingle = text[position:position + width].encode('utf-8')
+        bits.append(hashlib.blake2b(shingle, digest_size=8).hexdigest())
+    bits = [format(int(digest, 16), '064b') for digest in bits]
+    # a bit is set when it is set in more than half of the shingle hashes
+    half = len(bits) / 2
+    columns = ''.join('1' if column.count('1') > half else '0' for column in zip(*bits))
+    return int(columns, 2)
+
+
+def hamming_distance(first, second):
+    return bin(first ^ second).count('1')
+
+
+class Deduplicator(object):
+    """
+    Collapses duplicate and near-duplicate statuses within each period into the
+    first one seen, during an adapter's conversion pass.
+
+    A status whose normalized text (see `normalize_text`) matches an earlier one in
+    the same period is collapsed by a dictionary lookup on its digest. Otherwise,
+    with a ``distance`` above zero, its `simhash` is split into ``distance + 1``
+    bands; a status within ``distance`` bits of an earlier one shares at least one
+    band with it, so each status is compared against at most one earlier status per
+    band and the pass stays linear.
+
+    At most ``max_entries`` statuses are remembered. The least recently matched are
+    forgotten first, which, with statuses arriving in time order, keeps the window
+    to recent periods.
+
+    A collapsed entry holds ``duplicates``, a dict with the ``count`` of statuses
+    it stands for, itself included, the list of their distinct ``authors``, and the
+    ``exchanges`` of the statuses collapsed into it: a list of dicts holding an
+    ``author``, or the author of a status's origin, and the ``count`` of collapsed
+    statuses it took part in. Participation recounted from the kept statuses, e.g.
+    for a window, adds those exchanges.
+
+    Args:
+        distance (int): The most SimHash bits near-duplicates differ by. ``0``
+            collapses exact duplicates only.
+        max_entries (int): The most statuses remembered.
+    """
+    def __init__(self, distance=5, max_entries=10000):
+        self.distance = distance
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bands = {}
+
+    def _band_keys(self, time_key, value):
+        band_count = self.distance + 1
+        band_width = -(-SIMHASH_BITS // band_count)
+        mask = (1 << band_width) - 1
+        return [(time_key, band, value >> (band * band_width) & mask)
+                for band in range(band_count)]
+
+    def _find(self, time_key, value):
+        for band_key in self._band_keys(time_key, value):
+            key = self._bands.get(band_key)
+            candidate = self._entries.get(key)
+            if candidate and hamming_distance(candidate['simhash'], value) <= self.distance:
+                return candidate
+        return None
+
+    def _remember(self, time_key, digest, value, status):
+        key = (time_key, digest)
+        band_keys = self._band_keys(time_key, value) if value is not None else []
+        # statuses converted before may hold a stale count
+        status.pop('duplicates', None)
+        self._entries[key] = {'key': key, 'status': status, 'simhash': value,
+                              'bands': band_keys, 'author_ids': {status['author']['id']},
+                              'exchanges': {}}
+        for band_key in band_keys:
+            self._bands[band_key] = key
+        while len(self._entries) > self.max_entries:
+            forgotten_key, forgotten = self._entries.popitem(last=False)
+            for band_key in forgotten['bands']:
+                if self._bands.get(band_key) == forgotten_key:
+                    del self._bands[band_key]
+
+    def add(self, time_key, status):
+        """
+        Checks a status against the statuses already seen in its period.
+
+        Args:
+            time_key (str): The timestamp string of the status's period.
+            status (dict): The status JSON object.
+
+        Returns:
+            dict: The status, when it is kept, or ``None`` when it was collapsed into
+            an earlier one.
+        """
+        text = normalize_text(status['text'])
+        if not text:
+            return status
+        digest = hashlib.sha1(text.encode('utf-8')).digest()
+        value = None
+        entry = self._entries.get((time_key, digest))
+        if entry is None and self.distance:
+            value = simhash(text)
+            entry = self._find(time_key, value)
+        if entry is None:
+            self._remember(time_key, digest, value, status)
+            return status
+        kept = entry['status']
+        duplicates = kept.get('duplicates')
+        if duplicates is None:
+            duplicates = kept['duplicates'] = {'count': 1, 'authors': [kept['author']],
+                                               'exchanges': []}
+        duplicates['count'] += 1
+        author_id = status['author']['id']
+        if author_id not in entry['author_ids']:
+            entry['author_ids'].add(author_id)
+            duplicates['authors'].append(status['author'])
+        authors = [status['author']]
+        if status.get('origin'):
+            authors.append(status['origin']['author'])
+        for author in authors:
+            exchange = entry['exchanges'].get(author['id'])
+            if exchange is None:
+                exchange = entry['exchanges'][author['id']] = {'author': author, 'count': 0}
+                duplicates['exchanges'].append(exchange)
+            exchange['count'] += 1
+        self._entries.move_to_end(entry['key'])
+        return None
@@ -0,0 +1,133 @@
+import hashlib
+import re
+
+TOKEN_PATTERN = re.compile(r'[#@]?\w+')
+
+
+def tokenize(text):
+    """
+    Splits text into lower case terms. Hashtags and mentions keep their prefix.
+
+    Args:
+        text (str): Status text or a search query.
+
+    Returns:
+        set: The distinct terms.
+    """
+    return set(token.lower() for token in TOKEN_PATTERN.findall(text))
+
+
+def get_status_key(status):
+    """
+    Returns:
+        str: The key a status is matched by in periods: its ``id``, or its
+        ``created_at`` for statuses encoded without one.
+    """
+    return str(status.get('id') or status['created_at'])
+
+
+class ConversationIndex(object):
+    """
+    Inverted index over a conversation's statuses, filled by an adapter during its
+    conversion pass.
+
+    The index refers to the status dicts seen during the conversion pass, and
+    matches them to the statuses of periods by `get_status_key`, so it also filters
+    the periods assembled from spill files with a ``memory_budget``. It still holds
+    every indexed status in memory.
+
+    Attributes:
+        terms (dict): Sets of status identifiers keyed to terms.
+        topics (dict): Sets of period ids keyed to topic headers.
+        statuses (dict): Status dicts keyed to their identifiers.
+        status_periods (dict): Period ids keyed to status identifiers.
+    """
+    def __init__(self):
+        self.terms = {}
+        self.topics = {}
+        self.statuses = {}
+        self.status_periods = {}
+
+    def add(self, identifier, status, period_id):
+        """
+        Indexes a status's text terms and topic header.
+
+        Args:
+            identifier (str): The status identifier.
+            status (dict): The status JSON object.
+            period_id (int): The ``id`` of the period holding the status.
+        """
+        self.statuses[identifier] = status
+        self.status_periods[identifier] = period_id
+        for term in tokenize(status['text']):
+            if term in self.terms:
+                self.terms[term].add(identifier)
+            else:
+                self.terms[term] = {identifier}
+        topic_header = status.get('topic_header')
+        if topic_header:
+            if topic_header in self.topics:
+                self.topics[topic_header].add(period_id)
+            else:
+                self.topics[topic_header] = {period_id}
+
+    def search(self, query):
+        """
+        Finds the statuses containing every term of a query.
+
+        Args:
+            query (str): Space separated terms.
+
+        Returns:
+            set: The matching status identifiers.
+        """
+        postings = [self.terms.get(term, set()) for term in tokenize(query)]
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting
+        return matches
+
+    def topic_periods(self, topic_header):
+        """
+        Returns:
+            list: The sorted ids of the periods in which a topic header appears.
+        """
+        return sorted(self.topics.get(topic_header, ()))
+
+    def filter_periods(self, periods, query):
+        """
+        Builds a view of periods holding only the statuses that match a query.
+
+        Args:
+            periods (list): The conversation's periods.
+            query (str): Space separated terms.
+
+        Returns:
+            list: Copies of the periods with matching statuses, omitting periods with
+            no matches.
+        """
+        identifiers = self.search(query)
+        # periods assembled from spill files hold copies of the indexed statuses
+        matched = set(get_status_key(self.statuses[identifier]) for identifier in identifiers)
+        matched_periods = set(self.status_periods[identifier] for identifier in identifiers)
+        filtered = []
+        for period in periods:
+            if period['id'] in matched_periods:
+                # periods are already sorted, and a windowed period may hold fewer statuses
+                statuses = [status for status in period['statuses']
+                            if get_status_key(status) in matched]
+                if not statuses:
+                    continue
+                filtered_period = dict(period, statuses=statuses)
+                # a sampled period's tallies cover every status, matching or not
+                filtered_period.pop('participants', None)
+                filtered_period.pop('participant_count', None)
+                filtered_period.pop('topic_headers', None)
+                if 'fingerprint' in period:
+                    content = '{0}:{1}'.format(period['fingerprint'], ' '.join(sorted(tokenize(query))))
+                    filtered_period['fingerprint'] = hashlib.sha1(content.encode('utf-8')).hexdigest()
+                filtered.append(filtered_period)
+        return filtered
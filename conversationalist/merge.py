@@ -0,0 +1,126 @@
+from collections.abc import Mapping
+import heapq
+from operator import itemgetter
+from .classes import parse_datetime, resolve_users
+from .compression import open_timeline_file
+from .serializers import get_serializer
+
+
+def iter_sorted_statuses(data):
+    """
+    Yields a timeline's statuses ordered from oldest to newest, each paired with its
+    ``created_at`` epoch.
+
+    Archive-backed data (see `~.archive.ArchivedStatuses`) already streams in order.
+    Other data is sorted on its own; timeline JSON is written newest first, which the
+    sort handles in linear time.
+
+    Args:
+        data: A timeline's ``data`` mapping.
+
+    Yields:
+        tuple: The epoch, the status identifier string, and the status JSON object.
+    """
+    entries = ((parse_datetime(status['created_at']).timestamp(), identifier, status)
+               for identifier, status in data.items())
+    if getattr(data, 'ordered', False):
+        return entries
+    return iter(sorted(entries, key=itemgetter(0)))
+
+
+class MergedStatuses(Mapping):
+    """
+    A read-only mapping over the statuses of several timelines.
+
+    Iterating with ``items`` or ``values`` runs a k-way merge of the timelines'
+    sorted status streams, so statuses come out oldest first without a global sort.
+    Statuses found in more than one timeline are yielded once. Duplicates share a
+    ``created_at``, so only the identifiers seen during the current hour are kept to
+    detect them.
+    """
+    ordered = True
+
+    def __init__(self, timelines):
+        self.timelines = timelines
+
+    def __getitem__(self, key):
+        for timeline in self.timelines:
+            data = timeline.get('data', {})
+            if key in data:
+                return data[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for identifier, status in self.items():
+            yield identifier
+
+    def __len__(self):
+        return sum(1 for identifier in self)
+
+    def items(self):
+        streams = [iter_sorted_statuses(timeline.get('data', {})) for timeline in self.timelines]
+        hour = None
+        seen = set()
+        for epoch, identifier, status in heapq.merge(*streams, key=itemgetter(0)):
+            status_hour = int(epoch // 3600)
+            if status_hour != hour:
+                hour = status_hour
+                seen.clear()
+            if identifier not in seen:
+                seen.add(identifier)
+                yield identifier, status
+
+    def values(self):
+        return (status for identifier, status in self.items())
+
+
+def merge_timelines(timelines):
+    """
+    Combines several accounts' timeline JSON objects into one, e.g. for a story
+    about an event covered by many accounts.
+
+    The merged timeline covers from the earliest ``cutoff`` to the latest ``start``.
+    Its ``data`` is a `MergedStatuses` mapping, so a ``Conversation`` built from it
+    converts the statuses of every account into one set of periods and counts
+    participation across accounts.
+
+    Args:
+        timelines (list): JSON objects representing timelines.
+
+    Returns:
+        dict: The merged timeline JSON object.
+    """
+    timelines = [resolve_users(timeline) for timeline in timelines]
+    start = max((parse_datetime(timeline['start']) for timeline in timelines))
+    cutoff = min((parse_datetime(timeline['cutoff']) for timeline in timelines))
+    usernames = [timeline.get('username') for timeline in timelines]
+    merged = {
+        'start': start.isoformat(),
+        'cutoff': cutoff.isoformat(),
+        'data': MergedStatuses(timelines),
+        'username': ','.join(username for username in usernames if username),
+        'usernames': usernames
+    }
+    return merged
+
+
+def load_timelines(json_files, compression=None, json_backend=None):
+    """
+    Reads several timeline JSON files and merges them with `merge_timelines`.
+
+    Args:
+        json_files (list): The file locations of the timeline JSON.
+        compression (str): The files' compression format. Inferred from each file
+            extension when omitted.
+        json_backend (str): The JSON library used to parse the files. See
+            `~.serializers.get_serializer`.
+
+    Returns:
+        dict: The merged timeline JSON object.
+    """
+    serializer = get_serializer(json_backend)
+    timelines = []
+    for json_file in json_files:
+        with open_timeline_file(json_file, 'r', compression, binary=True) as infile:
+            timelines.append(serializer.load(infile))
+    return merge_timelines(timelines)
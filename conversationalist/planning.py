@@ -0,0 +1,93 @@
+import math
+from .classes import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+USER_TIMELINE_RESOURCE = '/statuses/user_timeline'
+
+
+class FetchPlan(object):
+    """
+    Describes how a timeline crawl is expected to page through the API.
+
+    Attributes:
+        page_size (int): The count of statuses to request per page.
+        pages (int): The estimated count of pages needed to reach the cutoff.
+        expected_statuses (float): The estimated count of statuses in the timeframe.
+    """
+    def __init__(self, page_size, pages, expected_statuses):
+        self.page_size = page_size
+        self.pages = pages
+        self.expected_statuses = expected_statuses
+
+    def fits(self, remaining_calls):
+        """
+        Checks the plan against a rate limit budget.
+
+        Args:
+            remaining_calls (int): The API calls left in the current rate limit window.
+
+        Returns:
+            bool: ``True`` if the estimated pages fit in the budget.
+        """
+        return self.pages <= remaining_calls
+
+
+def observed_rate(timeline):
+    """
+    Computes the statuses per hour of a previous run.
+
+    Args:
+        timeline (dict): A JSON object representing a timeline.
+
+    Returns:
+        float: Statuses per hour.
+    """
+    start = parse_datetime(timeline['start'])
+    cutoff = parse_datetime(timeline['cutoff'])
+    hours = (start - cutoff).total_seconds() / 3600
+    if hours <= 0:
+        return 0.0
+    return len(timeline.get('data', {})) / hours
+
+
+def plan_fetch(rate, timeframe, margin=1.25, max_page_size=MAX_PAGE_SIZE):
+    """
+    Chooses a page size and estimates the page count for a timeline crawl.
+
+    Small accounts keep the API's default page size; busier accounts get pages large
+    enough to reach the cutoff in as few calls as the API maximum allows.
+
+    Args:
+        rate (float): Observed statuses per hour, e.g. from `observed_rate` or
+            `~.archive.TimelineArchive.status_rate`.
+        timeframe (int): The crawl's timeframe in hours.
+        margin (float): Headroom multiplied into the expected status count.
+        max_page_size (int): The largest page the API serves.
+
+    Returns:
+        FetchPlan: The plan.
+    """
+    expected_statuses = rate * abs(timeframe)
+    # one more status than expected is needed to see the page cross the cutoff
+    needed = int(math.ceil(expected_statuses * margin)) + 1
+    page_size = min(max_page_size, max(DEFAULT_PAGE_SIZE, needed))
+    pages = int(math.ceil(needed / page_size))
+    return FetchPlan(page_size, pages, expected_statuses)
+
+
+def get_remaining_timeline_calls(api):
+    """
+    Reads the remaining user timeline calls from the API's rate limit status.
+
+    Args:
+        api: A tweepy API instance.
+
+    Returns:
+        int: The remaining calls or ``None`` if the API does not report them.
+    """
+    info = api.rate_limit_status()
+    resource = info['resources'].get('statuses', {}).get(USER_TIMELINE_RESOURCE)
+    if not isinstance(resource, dict):
+        return None
+    return resource.get('remaining')
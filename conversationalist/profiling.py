@@ -0,0 +1,87 @@
+from collections import Counter
+from contextlib import contextmanager
+import time
+
+
+class CountingAPI(object):
+    """
+    Wraps a tweepy API instance, counting calls to its methods in a `Profile`.
+    """
+    def __init__(self, api, profile):
+        self._api = api
+        self._profile = profile
+
+    def __getattr__(self, name):
+        value = getattr(self._api, name)
+        if not callable(value):
+            return value
+        api_calls = self._profile.api_calls
+
+        def counted(*args, **kwargs):
+            api_calls[name] += 1
+            return value(*args, **kwargs)
+        return counted
+
+
+class Profile(object):
+    """
+    Collects the time spent in each stage of story making and the count of API
+    calls, for ``--profile`` runs of the command line tool.
+
+    Pass an instance as the ``profile`` setting of `~.utils.make_story`,
+    `~.utils.make_stories`, or a `~.service.StoryAccount`; time spent in a stage
+    adds up across accounts and refreshes.
+
+    Attributes:
+        stages (dict): Seconds spent keyed to stage names, in the order the stages
+            first ran.
+        api_calls (Counter): Calls keyed to API method names.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stages = {}
+        self.api_calls = Counter()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the code run inside a ``with`` block as part of a stage.
+        """
+        began = self.clock()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + self.clock() - began
+
+    def wrap_api(self, api):
+        """
+        Returns:
+            CountingAPI: The API instance with its calls counted by this profile.
+        """
+        if isinstance(api, CountingAPI):
+            return api
+        return CountingAPI(api, self)
+
+    def report(self):
+        """
+        Returns:
+            str: A table of the stage timings followed by the API call counts.
+        """
+        lines = ['{0:<12}{1:>10}'.format('stage', 'seconds')]
+        for name, seconds in self.stages.items():
+            lines.append('{0:<12}{1:>10.3f}'.format(name, seconds))
+        lines.append('{0:<12}{1:>10.3f}'.format('total', sum(self.stages.values())))
+        lines.append('')
+        lines.append('{0:<20}{1:>6}'.format('api call', 'count'))
+        for name, count in sorted(self.api_calls.items()):
+            lines.append('{0:<20}{1:>6}'.format(name, count))
+        lines.append('{0:<20}{1:>6}'.format('total', sum(self.api_calls.values())))
+        return '\n'.join(lines)
+
+
+def get_profile(settings):
+    """
+    Returns:
+        Profile: The ``profile`` setting, or a new `Profile` that nothing reads.
+    """
+    return settings.get('profile') or Profile()
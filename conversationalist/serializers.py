@@ -0,0 +1,127 @@
+from importlib import import_module
+from importlib.util import find_spec
+import io
+import json
+
+
+class StandardSerializer(object):
+    """
+    Encodes and decodes JSON with the standard library's ``json`` module.
+
+    Output is identical to ``json.dump`` with the same encoder and indent.
+    """
+    name = 'json'
+
+    def dumps(self, obj, encoder=json.JSONEncoder, indent=None):
+        return json.dumps(obj, cls=encoder, indent=indent).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dump(self, obj, fileobj, encoder=json.JSONEncoder, indent=None):
+        text = io.TextIOWrapper(fileobj, encoding='utf-8')
+        try:
+            json.dump(obj, text, cls=encoder, indent=indent)
+            text.flush()
+        finally:
+            text.detach()
+
+    def load(self, fileobj):
+        return json.load(io.TextIOWrapper(fileobj, encoding='utf-8'))
+
+
+class OrjsonSerializer(StandardSerializer):
+    """
+    Encodes and decodes JSON with ``orjson``, imported when the serializer is
+    created. Objects the encoder class handles, like ``Timeline`` and tweepy models,
+    are passed to its ``default`` method.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        self.orjson = import_module('orjson')
+
+    def dumps(self, obj, encoder=json.JSONEncoder, indent=None):
+        option = self.orjson.OPT_INDENT_2 if indent else 0
+        return self.orjson.dumps(obj, default=encoder().default, option=option)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+    def dump(self, obj, fileobj, encoder=json.JSONEncoder, indent=None):
+        fileobj.write(self.dumps(obj, encoder, indent))
+
+    def load(self, fileobj):
+        return self.orjson.loads(fileobj.read())
+
+
+class MsgspecSerializer(StandardSerializer):
+    """
+    Encodes and decodes JSON with ``msgspec``, imported when the serializer is
+    created. Objects the encoder class handles are passed to its ``default`` method.
+    """
+    name = 'msgspec'
+
+    def __init__(self):
+        self.msgspec_json = import_module('msgspec.json')
+
+    def dumps(self, obj, encoder=json.JSONEncoder, indent=None):
+        data = self.msgspec_json.Encoder(enc_hook=encoder().default).encode(obj)
+        if indent:
+            data = self.msgspec_json.format(data, indent=indent)
+        return data
+
+    def loads(self, data):
+        return self.msgspec_json.decode(data)
+
+    def dump(self, obj, fileobj, encoder=json.JSONEncoder, indent=None):
+        fileobj.write(self.dumps(obj, encoder, indent))
+
+    def load(self, fileobj):
+        return self.msgspec_json.decode(fileobj.read())
+
+
+SERIALIZERS = {
+    'json': StandardSerializer,
+    'orjson': OrjsonSerializer,
+    'msgspec': MsgspecSerializer,
+}
+
+# fastest first
+PREFERRED_SERIALIZERS = ('orjson', 'msgspec', 'json')
+
+
+def is_available(name):
+    """
+    Checks whether a backend is installed without importing it.
+
+    Returns:
+        bool: ``True`` if the backend can be used.
+    """
+    return name == 'json' or find_spec(name) is not None
+
+
+def get_serializer(name=None):
+    """
+    Returns a JSON serializer. Optional backends are imported only when their
+    serializer is created.
+
+    Args:
+        name (str): ``json``, ``orjson``, or ``msgspec``. When omitted, the fastest
+            installed backend is chosen, falling back to ``json``.
+
+    Returns:
+        A serializer with ``dump``, ``load``, ``dumps``, and ``loads`` methods that
+        work with bytes and binary file objects.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If the requested backend is not installed.
+    """
+    if name is None:
+        name = next(preferred for preferred in PREFERRED_SERIALIZERS if is_available(preferred))
+    if name not in SERIALIZERS:
+        raise ValueError('Unsupported JSON backend: {0}'.format(name))
+    if not is_available(name):
+        raise ImportError('The {0} package is not installed.'.format(name))
+    return SERIALIZERS[name]()
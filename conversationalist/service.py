@@ -0,0 +1,305 @@
+from operator import itemgetter
+import time
+from .adapters import PeriodAdapter, get_offsets, get_time_key, period_id
+from .classes import (Conversation, Participation, Timeline, TimelineEncoder, get_period_index,
+                      is_empty_delta)
+from .profiling import get_profile
+from .serializers import get_serializer
+
+
+def is_incremental(adapter):
+    """
+    Checks whether an adapter's periods each depend only on their own statuses, so
+    a refresh can reconvert the periods that changed and keep the rest. Rollups, an
+    index, and spilled periods span the whole timeline, so adapters building them
+    are always rerun in full.
+
+    Returns:
+        bool: ``True`` if the adapter supports incremental conversion.
+    """
+    return isinstance(adapter, type) and issubclass(adapter, PeriodAdapter) and \
+        not (adapter.rollups or adapter.build_index or adapter.memory_budget)
+
+
+class StoryAccount(object):
+    """
+    Keeps one account's ``Timeline`` and ``Conversation`` in memory between refreshes.
+
+    Each refresh fetches only statuses newer than those already held, and encodes
+    only those statuses. With an adapter that supports it (see `is_incremental`),
+    only the periods into which new or dropped statuses fall are converted again
+    and spliced into the previous data; participation and navigation are recounted
+    from the encoded statuses and periods. Other adapters are run over every
+    encoded status. The story is written only when a period was added, changed, or
+    removed.
+
+    Attributes:
+        settings (dict): Configuration settings, as for `~.utils.make_story`. The
+            ``api`` setting is not required here.
+        timeline: The account's `~.classes.Timeline` instance.
+        conversation: The account's latest `~.classes.Conversation` instance.
+        encoded (dict): Status JSON objects keyed to status identifiers.
+        period_statuses (dict): Sets of status identifiers keyed to the ids of the
+            periods they fall into.
+        delta (dict): What the latest refresh changed, from
+            `~.classes.Conversation.diff`. Clients can apply it with
+            `~.classes.apply_delta` instead of fetching the whole story.
+        changed (list): The ids of periods new or changed by the latest refresh.
+        removed (list): The ids of periods dropped by the latest refresh.
+        refreshes (int): The count of refreshes since the account was added.
+        writes (int): The count of times the story was written.
+    """
+    def __init__(self, api, settings, serializer=None):
+        self.settings = settings
+        self.serializer = serializer or get_serializer(settings.get('json_backend'))
+        self.profile = get_profile(settings)
+        timeframe_hours = abs(int(settings.get('timeframe', 24)))
+        with self.profile.stage('fetch'):
+            self.timeline = Timeline(api, settings['username'], (timeframe_hours * -1),
+                                     page_size=settings.get('page_size'))
+        self.build_threads()
+        self.conversation = None
+        self.encoded = {}
+        self.status_periods = {}
+        self.period_statuses = {}
+        self.delta = None
+        self.changed = []
+        self.removed = []
+        self.refreshes = 0
+        self.writes = 0
+        self.convert()
+        self.write()
+
+    def _encode(self):
+        """
+        Encodes the timeline's new statuses and forgets the dropped ones.
+
+        Returns:
+            set: The ids of the periods whose statuses changed.
+        """
+        adapter = self.settings.get('adapter')
+        period_minutes = getattr(adapter, 'period_minutes', 60)
+        offsets = get_offsets(self.timeline.start, self.timeline.cutoff,
+                              getattr(adapter, 'target_timezone', None), period_minutes)
+        affected = set()
+        for identifier in [identifier for identifier in self.encoded
+                           if identifier not in self.timeline.data]:
+            del self.encoded[identifier]
+            status_period = self.status_periods.pop(identifier)
+            self.period_statuses[status_period].discard(identifier)
+            if not self.period_statuses[status_period]:
+                del self.period_statuses[status_period]
+            affected.add(status_period)
+        for identifier, status in self.timeline.data.items():
+            if identifier not in self.encoded:
+                encoded = self.encoded[identifier] = self.serializer.loads(
+                    self.serializer.dumps(status, encoder=TimelineEncoder))
+                status_period = period_id(get_time_key(encoded, offsets, period_minutes))
+                self.status_periods[identifier] = status_period
+                self.period_statuses.setdefault(status_period, set()).add(identifier)
+                affected.add(status_period)
+        return affected
+
+    def _timeline_json(self, identifiers=None):
+        """
+        Returns:
+            dict: The timeline JSON object holding copies of the encoded statuses
+            with the passed identifiers, or of every encoded status.
+        """
+        if identifiers is None:
+            identifiers = self.encoded
+        timeline = self.timeline
+        timeline_json = {
+            'start': timeline.start.isoformat(),
+            'cutoff': timeline.cutoff.isoformat(),
+            # adapters modify statuses in place, so each conversion gets copies
+            'data': {identifier: dict(self.encoded[identifier]) for identifier in identifiers},
+            'total': timeline.total,
+            'username': timeline.username
+        }
+        if timeline.threads is not None:
+            timeline_json['threads'] = self.serializer.loads(
+                self.serializer.dumps(timeline.threads, encoder=TimelineEncoder))
+        return timeline_json
+
+    def build_threads(self):
+        """
+        Rebuilds the timeline's reply threads when the account has a ``thread_depth``
+        setting. Ancestors resolved by earlier builds are not requested again.
+        """
+        if self.settings.get('thread_depth'):
+            with self.profile.stage('threads'):
+                self.timeline.build_threads(int(self.settings['thread_depth']))
+
+    def _splice(self, previous, converted, affected):
+        """
+        Replaces the affected periods of the previous conversation with those of a
+        conversion of their statuses.
+
+        Returns:
+            Conversation: The updated conversation. Its ``timeline`` carries the
+            timeline's properties but not its statuses.
+        """
+        periods = [period for period in previous.data['periods'] if period['id'] not in affected]
+        periods.extend(converted.data['periods'])
+        periods.sort(key=itemgetter('id'))
+        data = dict(converted.data, periods=periods)
+        if 'participation' in data:
+            # counted before statuses are collapsed or sampled, as the adapters do
+            participation = Participation()
+            for status in self.encoded.values():
+                participation.add_tweet(status['author'])
+                if status['origin']:
+                    participation.add_tweet(status['origin']['author'])
+            data['participation'] = participation
+        topic_headers = set()
+        for period in periods:
+            topic_headers.update(period.get('topic_headers', ()))
+            for status in period['statuses']:
+                if status.get('topic_header'):
+                    topic_headers.add(status['topic_header'])
+        for key in ('nav', 'topic_headers'):
+            if key in data:
+                data[key] = sorted(topic_headers)
+        conversation = Conversation(title=converted.title, adapter=converted.adapter)
+        conversation.timeline = {name: value for name, value in converted.timeline.items()
+                                 if name != 'data'}
+        conversation.data = data
+        conversation.period_index = get_period_index(data)
+        return conversation
+
+    def convert(self):
+        """
+        Converts the periods that changed, or the whole timeline, and records which
+        periods changed.
+
+        Returns:
+            list: The ids of new or changed periods.
+        """
+        previous = self.conversation
+        adapter = self.settings.get('adapter')
+        incremental = previous is not None and previous.data is not None and \
+            is_incremental(adapter)
+        with self.profile.stage('encode'):
+            affected = self._encode()
+            identifiers = None
+            if incremental:
+                identifiers = [identifier for period in affected
+                               for identifier in self.period_statuses.get(period, ())]
+            timeline_json = self._timeline_json(identifiers)
+        with self.profile.stage('convert'):
+            conversation = Conversation(timeline=timeline_json,
+                                        title=self.settings.get('title', 'Story'),
+                                        adapter=adapter)
+            if incremental:
+                conversation = self._splice(previous, conversation, affected)
+            self.conversation = conversation
+        with self.profile.stage('diff'):
+            self.delta = self.conversation.diff(previous.data if previous else None)
+        self.changed = [period['id'] for period in self.delta['added'] + self.delta['changed']]
+        self.removed = self.delta['removed']
+        return self.changed
+
+    def write(self):
+        """
+        Writes the story when the account has ``write`` and ``story_out`` settings.
+
+        Returns:
+            str: The file path location of the generated web page or ``None``.
+        """
+        write = self.settings.get('write')
+        if write is None or 'story_out' not in self.settings:
+            return None
+        self.writes += 1
+        with self.profile.stage('write'):
+            return write(self.conversation, self.settings['story_out'])
+
+    def refresh(self):
+        """
+        Fetches new statuses, advances the window, and writes the story if any period
+        changed.
+
+        Returns:
+            list: The ids of new or changed periods.
+        """
+        with self.profile.stage('fetch'):
+            self.timeline.update()
+        self.build_threads()
+        self.refreshes += 1
+        self.convert()
+        if not is_empty_delta(self.delta):
+            self.write()
+        return self.changed
+
+
+class StoryService(object):
+    """
+    A long-running process that keeps stories for several accounts warm.
+
+    The API instance is created once, and each account's timeline is crawled once
+    when it is added. After that, `run` refreshes every account on a schedule with
+    incremental fetches, and `latest` serves the current conversation data on demand.
+
+    Attributes:
+        api: Tweepy API instance.
+        accounts (dict): `StoryAccount` instances keyed to usernames.
+    """
+    def __init__(self, api, json_backend=None):
+        self.api = api
+        self.serializer = get_serializer(json_backend)
+        self.accounts = {}
+
+    def add_account(self, settings, api=None):
+        """
+        Crawls an account's timeline and writes its first story.
+
+        Args:
+            settings (dict): Configuration settings, as for `~.utils.make_story`.
+            api: Tweepy API instance for this account, when it differs from the
+                service's. Optional.
+
+        Returns:
+            StoryAccount: The account's state.
+        """
+        account = StoryAccount(api or self.api, settings, self.serializer)
+        self.accounts[settings['username']] = account
+        return account
+
+    def refresh(self, username):
+        """
+        Returns:
+            list: The ids of the account's new or changed periods.
+        """
+        return self.accounts[username].refresh()
+
+    def refresh_all(self):
+        """
+        Returns:
+            dict: The ids of new or changed periods keyed to usernames.
+        """
+        return {username: account.refresh() for username, account in self.accounts.items()}
+
+    def latest(self, username):
+        """
+        Returns:
+            dict: The account's latest conversation data.
+        """
+        return self.accounts[username].conversation.data
+
+    def run(self, interval, iterations=None, sleep=time.sleep):
+        """
+        Refreshes every account each ``interval`` seconds.
+
+        Args:
+            interval (float): Seconds between the start of each refresh round.
+            iterations (int): How many rounds to run. Runs until interrupted when
+                omitted.
+            sleep: Called with the seconds to wait.
+        """
+        rounds = 0
+        while iterations is None or rounds < iterations:
+            began = time.monotonic()
+            self.refresh_all()
+            rounds += 1
+            if iterations is None or rounds < iterations:
+                sleep(max(interval - (time.monotonic() - began), 0))
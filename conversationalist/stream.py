@@ -0,0 +1,112 @@
+import queue
+import time
+
+STREAM_END = None
+
+
+def iter_batches(source, batch_size=100, max_latency=1.0, clock=time.monotonic):
+    """
+    Groups statuses pushed by a source into micro-batches.
+
+    A batch is yielded once it holds ``batch_size`` statuses or its first status has
+    waited ``max_latency`` seconds, whichever comes first.
+
+    Args:
+        source: An iterator of tweepy ``Status`` objects, or a ``queue.Queue`` they are
+            put on. A queue ends the stream when `STREAM_END` is put on it. Waiting
+            on a queue is bounded by ``max_latency``, whereas an iterator's pending
+            batch is flushed only when its next status arrives or it is exhausted.
+        batch_size (int): The most statuses in a batch.
+        max_latency (float): The most seconds a status waits in a pending batch.
+        clock: Returns the current time in seconds.
+
+    Yields:
+        list: A batch of statuses.
+    """
+    batch = []
+    deadline = None
+    if isinstance(source, queue.Queue):
+        while True:
+            timeout = None if deadline is None else max(deadline - clock(), 0)
+            try:
+                status = source.get(timeout=timeout)
+            except queue.Empty:
+                yield batch
+                batch, deadline = [], None
+                continue
+            if status is STREAM_END:
+                break
+            batch.append(status)
+            if deadline is None:
+                deadline = clock() + max_latency
+            if len(batch) >= batch_size:
+                yield batch
+                batch, deadline = [], None
+    else:
+        for status in source:
+            batch.append(status)
+            if deadline is None:
+                deadline = clock() + max_latency
+            if len(batch) >= batch_size or clock() >= deadline:
+                yield batch
+                batch, deadline = [], None
+    if batch:
+        yield batch
+
+
+class TimelineStream(object):
+    """
+    Feeds a ``Timeline`` from statuses pushed by a stream rather than pages pulled
+    from ``user_timeline``.
+
+    Each micro-batch goes through `~.classes.Timeline.load`, so statuses are
+    normalized and origins attached as they are for crawled timelines. The window is
+    then advanced to the current time, dropping statuses older than ``cutoff``.
+
+    Attributes:
+        timeline: The `~.classes.Timeline` instance being fed. It may be empty, or
+            backfilled by a crawl before streaming begins.
+        batch_size (int): The most statuses loaded at once.
+        max_latency (float): The most seconds a status waits before being loaded.
+        on_batch: Called with the timeline and each loaded batch, e.g. to refresh a
+            story. Optional.
+        batches (int): The count of batches loaded.
+        ingested (int): The count of statuses received.
+    """
+    def __init__(self, timeline, batch_size=100, max_latency=1.0, on_batch=None):
+        self.timeline = timeline
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.on_batch = on_batch
+        self.batches = 0
+        self.ingested = 0
+
+    def ingest(self, statuses, now=None):
+        """
+        Loads a batch of statuses and advances the timeline's window.
+
+        Args:
+            statuses (list): tweepy ``Status`` objects.
+            now (datetime): When the window ends. Defaults to ``now``.
+        """
+        if statuses:
+            self.timeline.load(statuses)
+            self.batches += 1
+            self.ingested += len(statuses)
+        self.timeline.advance(now)
+        if self.on_batch:
+            self.on_batch(self.timeline, statuses)
+
+    def run(self, source):
+        """
+        Ingests statuses from a source until it is exhausted or ends.
+
+        Args:
+            source: An iterator of statuses or a ``queue.Queue``. See `iter_batches`.
+
+        Returns:
+            The fed `~.classes.Timeline` instance.
+        """
+        for batch in iter_batches(source, self.batch_size, self.max_latency):
+            self.ingest(batch)
+        return self.timeline
@@ -0,0 +1,125 @@
+from datetime import timezone
+from .classes import import_tweepy
+
+
+def get_created_at(status):
+    """
+    Returns:
+        datetime: A status's ``created_at``, made UTC aware when naive.
+    """
+    created_at = status.created_at
+    if created_at.tzinfo is None or created_at.tzinfo.utcoffset(created_at) is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+class ThreadBuilder(object):
+    """
+    Resolves the reply chains of a timeline's statuses and arranges them into trees.
+
+    Every status resolved, whether found among already fetched statuses or
+    requested from the API, is memoized in ``fetched``, and statuses the API could
+    not return are remembered as well. An ancestor shared by many replies is then
+    requested once, however many chains lead to it, and a chain is not walked again
+    above a node already walked at least as far. API requests grow with the count of
+    distinct ancestors rather than with replies times depth.
+
+    Args:
+        api: Tweepy API instance. Without one, chains stop at the first status not
+            already fetched.
+        fetched (dict): Statuses keyed to identifiers, such as a
+            `~.classes.Timeline` instance's ``fetched``. Resolved ancestors are
+            added to it.
+        max_depth (int): How many ancestors are resolved above each status.
+        missing (set): Identifiers of statuses the API could not return, such as a
+            `~.classes.Timeline` instance's ``missing``. They are not requested
+            again, and those newly found unavailable are added to it.
+
+    Attributes:
+        fetches (int): The count of API requests made for ancestors.
+    """
+    def __init__(self, api=None, fetched=None, max_depth=3, missing=None):
+        self.api = api
+        self.fetched = fetched if fetched is not None else {}
+        self.max_depth = max_depth
+        self.missing = missing if missing is not None else set()
+        self.fetches = 0
+
+    def resolve(self, status_id):
+        """
+        Returns:
+            The status with the passed identifier, or ``None`` when it is not
+            available.
+        """
+        key = str(status_id)
+        status = self.fetched.get(key)
+        if status is not None or key in self.missing or self.api is None:
+            return status
+        tweep_error = import_tweepy('TweepError')
+        self.fetches += 1
+        try:
+            status = self.api.get_status(status_id)
+        except tweep_error:
+            print('Error while fetching ancestor tweet {0}'.format(status_id))
+            self.missing.add(key)
+            return None
+        self.fetched[key] = status
+        return status
+
+    def build(self, statuses):
+        """
+        Arranges statuses and their resolved ancestors into reply trees.
+
+        Each node holds the status's ``id``, ``author``, ``text``, ISO8601
+        ``created_at``, whether it is ``in_timeline``, and its ``replies``, ordered
+        from oldest to newest. Statuses that neither reply to a resolved status nor
+        received a reply are left out.
+
+        Args:
+            statuses: An iterable of tweepy ``Status`` objects, such as a timeline's
+                ``data`` values.
+
+        Returns:
+            list: The root nodes of the threads, ordered from oldest to newest.
+        """
+        statuses = list(statuses)
+        timeline_ids = {str(status.id) for status in statuses}
+        nodes = {}
+        linked = set()
+        # the most ancestors still to resolve above each node when it was walked
+        walked = {}
+
+        def get_node(status):
+            key = str(status.id)
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = {
+                    'id': status.id,
+                    'author': status.author,
+                    'text': status.text,
+                    'created_at': get_created_at(status).isoformat(),
+                    'in_timeline': key in timeline_ids,
+                    'replies': []
+                }
+            return node
+
+        for status in statuses:
+            current = status
+            remaining = self.max_depth
+            while remaining > 0 and getattr(current, 'in_reply_to_status_id', None):
+                key = str(current.id)
+                if walked.get(key, -1) >= remaining:
+                    break
+                walked[key] = remaining
+                parent = self.resolve(current.in_reply_to_status_id)
+                if parent is None:
+                    break
+                if key not in linked:
+                    linked.add(key)
+                    get_node(parent)['replies'].append(get_node(current))
+                current = parent
+                remaining -= 1
+        for node in nodes.values():
+            node['replies'].sort(key=lambda reply: reply['created_at'])
+        roots = [node for key, node in nodes.items() if key not in linked]
+        return sorted(roots, key=lambda node: node['created_at'])
@@ -0,0 +1,132 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+HOUR = 3600
+DAY = 86400
+WEEK = 7 * DAY
+# the unix epoch fell on a thursday, three days after the start of its week
+EPOCH_WEEKDAY = 3
+# statuses may sit a little outside a timeline's start and cutoff, and a week
+# holding the cutoff may begin up to a week before it
+MARGIN = WEEK + DAY
+
+
+def get_timezone(name):
+    """
+    Returns:
+        tzinfo: The IANA timezone with the passed name, e.g. ``America/New_York``.
+    """
+    if ZoneInfo is None:
+        raise ImportError('The zoneinfo module (Python 3.9+) is required for target timezones.')
+    return ZoneInfo(name)
+
+
+class OffsetTable(object):
+    """
+    The UTC offsets of a timezone over a timeframe, looked up without calling the
+    timezone library for every status.
+
+    The timezone is asked for its offset once per hour of the timeframe, and each
+    change is narrowed down to the exact second it takes effect. Looking up a status's
+    offset is then a binary search over those few transitions.
+
+    Args:
+        tz: A ``tzinfo``, such as ``timezone.utc``, or the name of an IANA timezone.
+        start (datetime): When the timeframe ends.
+        cutoff (datetime): When the timeframe begins.
+
+    Attributes:
+        transitions (list): Epochs from which each offset applies, in order.
+        offsets (list): The UTC offsets in seconds matching ``transitions``.
+    """
+    def __init__(self, tz, start, cutoff):
+        self.tz = get_timezone(tz) if isinstance(tz, str) else tz
+        begin = int(cutoff.timestamp()) - MARGIN
+        end = int(start.timestamp()) + MARGIN
+        self.transitions = [begin]
+        self.offsets = [self._utcoffset(begin)]
+        self._keys = {}
+        epoch = begin
+        while epoch < end:
+            following = epoch + HOUR
+            offset = self._utcoffset(following)
+            if offset != self.offsets[-1]:
+                self.transitions.append(self._find_transition(epoch, following))
+                self.offsets.append(offset)
+            epoch = following
+
+    def _utcoffset(self, epoch):
+        return int(datetime.fromtimestamp(epoch, tz=self.tz).utcoffset().total_seconds())
+
+    def _find_transition(self, before, after):
+        # the offset changes somewhere in (before, after]
+        offset = self._utcoffset(before)
+        while after - before > 1:
+            middle = (before + after) // 2
+            if self._utcoffset(middle) == offset:
+                before = middle
+            else:
+                after = middle
+        return after
+
+    def offset(self, epoch):
+        """
+        Returns:
+            int: The UTC offset in seconds in effect at an epoch.
+        """
+        position = bisect_right(self.transitions, epoch) - 1
+        return self.offsets[max(position, 0)]
+
+    def time_key(self, epoch, width=HOUR):
+        """
+        Finds the local period holding an epoch.
+
+        Each period is keyed by the instant it begins, so an hour repeated when clocks
+        fall back yields two keys, one per UTC offset.
+
+        Args:
+            epoch (float): Seconds since the unix epoch.
+            width (int): The period length in seconds. Either a divisor of a day, such
+                as ``900`` or ``3600``, or `WEEK` for weeks starting on Monday.
+
+        Returns:
+            str: The timestamp string of the period's start, in its UTC offset.
+        """
+        offset = self.offset(epoch)
+        local = int(epoch) + offset
+        if width == WEEK:
+            days = local // DAY
+            local_start = (days - (days + EPOCH_WEEKDAY) % 7) * DAY
+        else:
+            local_start = local - local % width
+        key = self._keys.get((local_start, offset, width))
+        if key is None:
+            utc_start = local_start - offset
+            # a transition inside the period means it began under the earlier offset
+            start_offset = self.offset(utc_start)
+            if start_offset != offset:
+                utc_start = local_start - start_offset
+            start_offset = self.offset(utc_start)
+            moment = datetime.fromtimestamp(utc_start, tz=timezone(timedelta(seconds=start_offset)))
+            key = moment.isoformat()
+            self._keys[(local_start, offset, width)] = key
+        return key
+
+    def time_keys(self, start, cutoff, width=HOUR):
+        """
+        Returns:
+            list: The timestamp strings of the local periods between ``cutoff`` and
+            ``start``, in order.
+        """
+        keys = {}
+        epoch = int(cutoff.timestamp())
+        end = start.timestamp()
+        while epoch < end:
+            keys[self.time_key(epoch, width)] = None
+            epoch += min(width, HOUR)
+        return list(keys)
@@ -1,4 +1,80 @@
+from .archive import TimelineArchive
+from .cache import ConversionCache
 from .classes import Conversation, Timeline
+from .planning import plan_fetch
+from .profiling import get_profile
+
+
+def fetch_timeline(settings, timeframe_hours):
+    """
+    Crawls an account's timeline and saves it as JSON to ``timeline_out``, as
+    `make_story` does. The ``page_size``, or one planned from the ``archive``,
+    ``thread_depth``, ``normalize_users``, ``compression``, and ``json_backend``
+    settings are applied, and the statuses are archived when there is an
+    ``archive``.
+
+    Args:
+        settings (dict): Configuration settings.
+        timeframe_hours (int): How many hours of the timeline are fetched.
+
+    Returns:
+        Timeline: The fetched timeline.
+    """
+    twitter_username = settings['username']
+    profile = get_profile(settings)
+    archive = TimelineArchive(settings['archive']) if settings.get('archive') else None
+    try:
+        page_size = settings.get('page_size')
+        if page_size is None and archive:
+            with profile.stage('plan'):
+                rate = archive.status_rate(twitter_username, hours=timeframe_hours)
+                plan = plan_fetch(rate, timeframe_hours)
+            page_size = plan.page_size
+            print("...planned {0} pages of {1} statuses...".format(plan.pages, plan.page_size))
+        with profile.stage('fetch'):
+            timeline = Timeline(settings['api'], twitter_username, (timeframe_hours * -1),
+                                page_size=page_size)
+        print("...fetched {0} pages ({1} useful)...".format(timeline.pages_fetched,
+                                                            timeline.pages_useful))
+        if settings.get('thread_depth'):
+            print("...building reply threads...")
+            with profile.stage('threads'):
+                timeline.build_threads(int(settings['thread_depth']))
+        print("...saving Timeline as JSON file...")
+        with profile.stage('encode'):
+            timeline.to_json(settings['timeline_out'],
+                             normalize_users=settings.get('normalize_users', False),
+                             compression=settings.get('compression'),
+                             json_backend=settings.get('json_backend'))
+        if archive:
+            print("...archiving Timeline statuses...")
+            with profile.stage('archive'):
+                timeline.to_archive(archive)
+    finally:
+        if archive:
+            archive.close()
+    return timeline
+
+
+def load_conversation(settings):
+    """
+    Converts the timeline JSON saved at ``timeline_out`` with the ``adapter`` and
+    ``title`` settings, restoring it from the ``conversion_cache`` when set.
+
+    Args:
+        settings (dict): Configuration settings.
+
+    Returns:
+        Conversation: The converted conversation.
+    """
+    conversion_cache = None
+    if settings.get('conversion_cache'):
+        conversion_cache = ConversionCache(settings['conversion_cache'])
+    conversation = Conversation(title=settings.get('title', 'Story'), adapter=settings.get('adapter'))
+    with get_profile(settings).stage('convert'):
+        conversation.load(settings['timeline_out'], compression=settings.get('compression'),
+                          cache=conversion_cache, json_backend=settings.get('json_backend'))
+    return conversation
 
 
 def make_story(settings):
@@ -21,6 +97,9 @@ def make_story(settings):
     handler is called; it is passed the location of the just-produced HTML "story"
     page, but it may choose to not use it/attach it.
 
+    When the settings hold a `~.profiling.Profile` as ``profile``, the time spent
+    in each stage is added to it.
+
     Args:
         settings (dict): Configuration settings.
 
@@ -28,24 +107,72 @@ def make_story(settings):
         str: The file path location of the generated web page.
     """
     print('Starting conversationalist. Getting tweets...')
-    adapter = settings.get('adapter')
-    api = settings['api']
-    timeline_json_output_file = settings['timeline_out']
-    timeframe_hours = int(settings.get('timeframe', 24))
-    title = settings.get('title', 'Story')
-    twitter_username = settings['username']
-    write = settings['write']
-    timeline = Timeline(api, twitter_username, (timeframe_hours * -1))
-    print("...saving Timeline as JSON file...")
-    timeline.to_json(timeline_json_output_file)
-    conversation = Conversation(title=title, adapter=adapter)
-    conversation.load(timeline_json_output_file)
+    fetch_timeline(settings, int(settings.get('timeframe', 24)))
+    conversation = load_conversation(settings)
     print("...writing story file...")
-    page_location = write(conversation, settings['story_out'])
+    with get_profile(settings).stage('write'):
+        page_location = settings['write'](conversation, settings['story_out'])
     print('...conversationalist done.')
     return page_location
 
 
+def convert_story(settings):
+    """
+    Creates a web page from a timeline JSON file saved by an earlier `make_story`,
+    without calling the twitter API.
+
+    Settings match those of `make_story`, except ``api``, ``username``,
+    ``timeframe``, ``page_size``, and ``archive`` are not used. The timeline is read
+    from ``timeline_out``.
+
+    Args:
+        settings (dict): Configuration settings.
+
+    Returns:
+        str: The file path location of the generated web page.
+    """
+    print('Starting conversationalist. Converting stored tweets...')
+    conversation = load_conversation(settings)
+    print("...writing story file...")
+    with get_profile(settings).stage('write'):
+        page_location = settings['write'](conversation, settings['story_out'])
+    print('...conversationalist done.')
+    return page_location
+
+
+def make_stories(settings):
+    """
+    Creates several stories covering different timeframes from a single crawl.
+
+    The ``windows`` setting maps a timeframe in hours to the story file path for that
+    timeframe. The timeline is fetched and converted once for the widest timeframe,
+    as `make_story` does, and every narrower story is cut from that conversation by
+    `~.classes.Conversation.window`. Other settings match those of `make_story`,
+    except ``timeframe`` and ``story_out`` are ignored.
+
+    Args:
+        settings (dict): Configuration settings.
+
+    Returns:
+        list: The file path locations of the generated web pages, ordered from the
+        narrowest to the widest timeframe.
+    """
+    print('Starting conversationalist. Getting tweets...')
+    windows = {abs(int(hours)): story_out for hours, story_out in settings['windows'].items()}
+    widest = max(windows)
+    profile = get_profile(settings)
+    fetch_timeline(settings, widest)
+    conversation = load_conversation(settings)
+    page_locations = []
+    for hours in sorted(windows):
+        print("...writing {0} hour story file...".format(hours))
+        with profile.stage('write'):
+            window = conversation if hours == widest else conversation.window(hours)
+            page_locations.append(settings['write'](window, windows[hours]))
+    print('...conversationalist done.')
+    return page_locations
+
+
 def print_rate_limit_info(api):
     """
     Prints rate limit information for passed API instance.
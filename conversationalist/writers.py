@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+import os
+from .classes import parse_datetime
+
+
+def period_day(period):
+    """
+    Returns:
+        str: The ISO8601 date on which a period starts, in the period's own UTC
+        offset, e.g. a target timezone's, or in UTC when it has no ``timestamp``.
+    """
+    if 'timestamp' in period:
+        return parse_datetime(period['timestamp']).date().isoformat()
+    return datetime.fromtimestamp(period['id'], tz=timezone.utc).date().isoformat()
+
+
+def get_page_path(story_out, day):
+    """
+    Returns:
+        str: The file path of a day's page, e.g. ``story-2020-05-01.html`` for
+        ``story.html``.
+    """
+    root, extension = os.path.splitext(story_out)
+    return '{0}-{1}{2}'.format(root, day, extension)
+
+
+class StreamingWriter(object):
+    """
+    A ``write`` function for `~.utils.make_story` that renders a story one period at
+    a time.
+
+    Each period is rendered and written to the output file before the next one is
+    taken from the conversation's periods, so rendering never holds more than one
+    period's output. The periods themselves are assembled one at a time only when
+    the adapter sets ``stream_periods`` or a ``memory_budget`` (see
+    `~.adapters.LazyPeriods`); otherwise the conversion has already built them all.
+
+    The story may instead be split into one page per day. Pages are named after the
+    ``story_out`` path with the day appended, and each page's header and footer
+    receive the names of the neighbouring pages for navigation.
+
+    Args:
+        render_period: Callable that takes a period and returns its HTML as a string.
+        render_header: Callable that takes the conversation data and a page dict and
+            returns the HTML before the periods. Optional.
+        render_footer: Like ``render_header``, for the HTML after the periods.
+            Optional.
+        paginate_by_day (bool): When ``True``, writes a page per day.
+        render_cache: A `~.cache.PeriodRenderCache` instance, so unchanged periods
+            are not rendered again. Optional.
+
+    A page dict holds the page's ``day`` (``None`` unless paginated), its ``path``,
+    and the file names of the ``previous`` and ``next`` pages, or ``None``.
+    """
+    def __init__(self, render_period, render_header=None, render_footer=None,
+                 paginate_by_day=False, render_cache=None):
+        self.render_period = render_period
+        self.render_header = render_header
+        self.render_footer = render_footer
+        self.paginate_by_day = paginate_by_day
+        self.render_cache = render_cache
+
+    def _render(self, period):
+        if self.render_cache is not None:
+            return self.render_cache.render(period, self.render_period)
+        return self.render_period(period)
+
+    def _open_page(self, data, page):
+        outfile = open(page['path'], 'w')
+        if self.render_header:
+            outfile.write(self.render_header(data, page))
+        return outfile
+
+    def _close_page(self, data, page, outfile):
+        if self.render_footer:
+            outfile.write(self.render_footer(data, page))
+        outfile.close()
+
+    def __call__(self, conversation, story_out):
+        """
+        Writes a conversation's story.
+
+        Args:
+            conversation: A `~.classes.Conversation` instance with converted data.
+            story_out (str): The story's file path.
+
+        Returns:
+            The file path of the story, or the list of page file paths when
+            paginated by day.
+        """
+        data = conversation.data
+        if not self.paginate_by_day:
+            page = {'day': None, 'path': story_out, 'previous': None, 'next': None}
+            outfile = self._open_page(data, page)
+            try:
+                for period in data['periods']:
+                    outfile.write(self._render(period))
+            finally:
+                self._close_page(data, page, outfile)
+            return story_out
+        paths = []
+        page = None
+        outfile = None
+        try:
+            for period in data['periods']:
+                day = period_day(period)
+                if page is None or day != page['day']:
+                    path = get_page_path(story_out, day)
+                    if page is not None:
+                        page['next'] = os.path.basename(path)
+                        self._close_page(data, page, outfile)
+                    previous = os.path.basename(page['path']) if page else None
+                    page = {'day': day, 'path': path, 'previous': previous, 'next': None}
+                    outfile = self._open_page(data, page)
+                    paths.append(path)
+                outfile.write(self._render(period))
+        finally:
+            if page is not None:
+                self._close_page(data, page, outfile)
+        return paths
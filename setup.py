@@ -15,7 +15,17 @@ setup(
         'Intended Audience :: Developers',
         'Programming Language :: Python :: 3 :: Only'
     ],
-    install_requires=['pytz', 'python-dateutil', 'tweepy'],
+    extras_require={
+        'analytics': ['numpy'],
+        'lz4': ['lz4'],
+        'msgspec': ['msgspec'],
+        'orjson': ['orjson'],
+        'zstd': ['zstandard'],
+    },
+    entry_points={
+        'console_scripts': ['conversationalist = conversationalist.cli:main'],
+    },
+    install_requires=['python-dateutil', 'tweepy'],
     keywords="python twitter",
     license="MIT",
     long_description=get_readme(),
@@ -100,7 +100,7 @@ class MockAPI:
         else:
             raise TweepError('No status with requested id')
 
-    def user_timeline(self, user, max_id=None):
+    def user_timeline(self, user, max_id=None, since_id=None, count=None):
         if self.multi_response:
             if len(self.statuses) == 1:
                 return self.statuses
@@ -110,3 +110,22 @@ class MockAPI:
         else:
             return self.statuses
 
+
+class PagingMockAPI(MockAPI):
+    """
+    Serves newest-first pages of statuses that honor ``max_id`` like the twitter API.
+    """
+    def __init__(self, statuses=None, page_size=20):
+        super().__init__(statuses=statuses)
+        self.page_size = page_size
+        self.max_ids = []
+
+    def user_timeline(self, user, max_id=None, since_id=None, count=None):
+        self.max_ids.append(max_id)
+        statuses = sorted(self.statuses, key=lambda s: s.id, reverse=True)
+        if max_id is not None:
+            statuses = [s for s in statuses if s.id <= max_id]
+        if since_id is not None:
+            statuses = [s for s in statuses if s.id > since_id]
+        return statuses[:count or self.page_size]
+
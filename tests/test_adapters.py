@@ -1,7 +1,10 @@
+import copy
+from datetime import datetime, timedelta, timezone
+import json
 import os
 import unittest
 from conversationalist import adapters, classes
-from .adapters import TopicHeaderAdapter, ParticipationAdapter
+from .adapters import ConvoParticipationAdapter, TopicHeaderAdapter, ParticipationAdapter
 from .mocking import MockAPI
 
 class FindTopicHeaderTests(unittest.TestCase):
@@ -35,3 +38,234 @@ class TransformWithParticipationAndStylesTests(unittest.TestCase):
         self.assertEqual(data['nav'], ['1', '2', '3', '4', '5'])
 
 
+class PeriodFingerprintTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        with open(os.path.join(tests_path, 'json/timeline.json')) as infile:
+            self.timeline_json = json.load(infile)
+
+    def convert(self, adapter):
+        timeline_json = copy.deepcopy(self.timeline_json)
+        return classes.Conversation(timeline=timeline_json, adapter=adapter).data
+
+    def test_stable(self):
+        first = [period['fingerprint'] for period in self.convert(ParticipationAdapter)['periods']]
+        second = [period['fingerprint'] for period in self.convert(ParticipationAdapter)['periods']]
+        self.assertEqual(first, second)
+        self.assertEqual(len(set(first)), 5)
+
+    def test_settings_change(self):
+        first = self.convert(ParticipationAdapter)['periods'][0]['fingerprint']
+        second = self.convert(TopicHeaderAdapter)['periods'][0]['fingerprint']
+        self.assertNotEqual(first, second)
+
+    def test_status_change(self):
+        first = [period['fingerprint'] for period in self.convert(ParticipationAdapter)['periods']]
+        new_status = copy.deepcopy(self.timeline_json['data']['5'])
+        new_status['id'] = 6
+        self.timeline_json['data']['6'] = new_status
+        second = [period['fingerprint'] for period in self.convert(ParticipationAdapter)['periods']]
+        self.assertEqual(first[:4], second[:4])
+        self.assertNotEqual(first[4], second[4])
+
+
+
+class SpillingHourlySummaryTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        with open(os.path.join(tests_path, 'json/timeline.json')) as infile:
+            self.timeline_json = json.load(infile)
+
+    def test_matches_in_memory_periods(self):
+        conversation = classes.Conversation(timeline=copy.deepcopy(self.timeline_json))
+        expected = adapters.transform_with_participation_and_styles(conversation, ['mock'], r'\d', 0)
+        conversation = classes.Conversation(timeline=copy.deepcopy(self.timeline_json))
+        data = adapters.transform_with_participation_and_styles(conversation, ['mock'], r'\d', 0,
+                                                                memory_budget=2)
+        self.assertTrue(isinstance(data['periods'], adapters.LazyPeriods))
+        self.assertTrue(data['periods'].summary.spills > 0)
+        self.assertEqual(len(data['periods']), 5)
+        self.assertEqual(list(data['periods']), expected['periods'])
+        self.assertEqual(list(data['periods']), expected['periods'])
+        self.assertEqual(data['periods'].ids, [period['id'] for period in expected['periods']])
+        self.assertEqual(data['nav'], expected['nav'])
+
+    def test_window_and_topic_periods(self):
+        class SpillingAdapter(ConvoParticipationAdapter):
+            memory_budget = 2
+            build_index = True
+
+        class IndexedAdapter(ConvoParticipationAdapter):
+            build_index = True
+
+        spilled = classes.Conversation(timeline=copy.deepcopy(self.timeline_json),
+                                       adapter=SpillingAdapter)
+        expected = classes.Conversation(timeline=copy.deepcopy(self.timeline_json),
+                                        adapter=IndexedAdapter)
+        for hours in (24, 10, 1):
+            window = spilled.window(hours)
+            expected_window = expected.window(hours)
+            self.assertEqual(list(window.data['periods']), expected_window.data['periods'])
+            self.assertEqual(window.period_index, expected_window.period_index)
+            self.assertEqual(window.data['participation'].participants.keys(),
+                             expected_window.data['participation'].participants.keys())
+        self.assertEqual(spilled.topic_periods('3'), expected.topic_periods('3'))
+        self.assertEqual(spilled.data['periods'][-1], expected.data['periods'][-1])
+
+    def test_bucket_order_preserved(self):
+        summary = adapters.SpillingHourlySummary(1)
+        for index in range(4):
+            summary.add('2001-02-03T04:00:00+00:00', {'created_at': '2001-02-03T04:05:06+00:00',
+                                                      'text': str(index)})
+        statuses = summary.get_statuses('2001-02-03T04:00:00+00:00')
+        self.assertEqual([status['text'] for status in statuses], ['0', '1', '2', '3'])
+        self.assertEqual(summary.in_memory, 0)
+
+
+class PeriodGranularityTests(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime(2024, 5, 7, 12, tzinfo=timezone.utc)
+        minutes = [5, 20, 25, 70, 60 * 26, 60 * 24 * 8]
+        statuses = {}
+        for identifier, minutes_ago in enumerate(minutes, 1):
+            statuses[str(identifier)] = {
+                'id': identifier,
+                'author': {'id': 1, 'screen_name': 'test_author', 'profile_image_url': ''},
+                'origin': None,
+                'text': 'Status {0}'.format(identifier),
+                'created_at': (self.start - timedelta(minutes=minutes_ago)).isoformat(),
+                'in_reply_to_status_id': None
+            }
+        self.timeline = {
+            'start': self.start.isoformat(),
+            'cutoff': (self.start - timedelta(days=10)).isoformat(),
+            'data': statuses
+        }
+
+    def convert(self, **attributes):
+        adapter = type('GranularAdapter', (adapters.ParticipationAdapter,), attributes)
+        return classes.Conversation(timeline=copy.deepcopy(self.timeline), adapter=adapter)
+
+    def test_quarter_hours(self):
+        conversation = self.convert(period_minutes=15)
+        periods = conversation.data['periods']
+        self.assertEqual([len(period['statuses']) for period in periods], [1, 1, 1, 2, 1])
+        self.assertEqual(periods[-1]['subtitle'], 'Tuesday, May 07, 2024  11:45AM')
+
+    def test_rollups(self):
+        conversation = self.convert(period_minutes=15, rollups=['hour', 'day', 'week'])
+        rollups = conversation.data['rollups']
+        self.assertEqual([len(period['statuses']) for period in rollups['hour']], [1, 1, 1, 3])
+        self.assertEqual([len(period['statuses']) for period in rollups['day']], [1, 1, 4])
+        self.assertEqual([period['subtitle'] for period in rollups['week']],
+                         ['Week of April 29, 2024', 'Week of May 06, 2024'])
+        self.assertEqual(rollups['day'][-1]['statuses'],
+                         adapters.sort_statuses(rollups['day'][-1]['statuses']))
+
+    def test_rollups_match_separate_conversions(self):
+        conversation = self.convert(rollups=['day'])
+        daily = conversation.data['rollups']['day']
+        hourly = self.convert().data['periods']
+        self.assertEqual(conversation.data['periods'], hourly)
+        self.assertEqual(sum(len(period['statuses']) for period in daily), 6)
+
+    def test_rollup_not_coarser(self):
+        with self.assertRaises(ValueError):
+            self.convert(rollups=['hour'])
+
+    def test_window(self):
+        conversation = self.convert(period_minutes=15, rollups=['day'])
+        window = conversation.window(1)
+        self.assertEqual([status['id'] for period in window.data['periods']
+                          for status in period['statuses']], [3, 2, 1])
+        self.assertEqual([len(period['statuses']) for period in window.data['rollups']['day']], [3])
+
+
+class PeriodCapTests(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime(2024, 5, 7, 12, tzinfo=timezone.utc)
+        statuses = {}
+        for identifier in range(1, 41):
+            statuses[str(identifier)] = {
+                'id': identifier,
+                'author': {'id': identifier, 'screen_name': 'author_{0}'.format(identifier),
+                           'profile_image_url': ''},
+                'origin': None,
+                'text': '{0} Status'.format(identifier % 2 or ''),
+                'created_at': (self.start - timedelta(minutes=2 * identifier)).isoformat(),
+                'in_reply_to_status_id': None
+            }
+        self.timeline = {
+            'start': self.start.isoformat(),
+            'cutoff': (self.start - timedelta(days=1)).isoformat(),
+            'data': statuses
+        }
+
+    def convert(self, **attributes):
+        adapter = type('CappedAdapter', (adapters.ParticipationAdapter,), attributes)
+        return classes.Conversation(timeline=copy.deepcopy(self.timeline), adapter=adapter)
+
+    def test_cap_with_exact_counts(self):
+        periods = self.convert(period_cap=5).data['periods']
+        self.assertEqual([len(period['statuses']) for period in periods], [5, 5])
+        self.assertEqual([period['count'] for period in periods], [10, 30])
+        self.assertEqual(periods[0]['statuses'], adapters.sort_statuses(periods[0]['statuses']))
+
+    def test_deterministic(self):
+        first = self.convert(period_cap=5).data['periods']
+        second = self.convert(period_cap=5).data['periods']
+        self.assertEqual(first, second)
+        self.assertNotEqual(first[0]['fingerprint'],
+                            self.convert().data['periods'][0]['fingerprint'])
+
+    def test_sample_weight(self):
+        periods = self.convert(period_cap=5,
+                               sample_weight=staticmethod(lambda status: 1 + 1e6 * (status['id'] > 35)),
+                               ).data['periods']
+        self.assertEqual(sorted(status['id'] for status in periods[0]['statuses']),
+                         [36, 37, 38, 39, 40])
+
+    def test_topic_headers_preferred(self):
+        kept = [status['id'] for status in
+                self.convert(period_cap=10, header_pattern=r'\d').data['periods'][1]['statuses']]
+        odd = sum(identifier % 2 for identifier in kept)
+        self.assertGreater(odd, len(kept) - odd)
+
+    def test_uncapped_periods_unchanged(self):
+        periods = self.convert(period_cap=50).data['periods']
+        self.assertEqual([period['count'] for period in periods], [10, 30])
+        self.assertEqual([len(period['statuses']) for period in periods], [10, 30])
+
+    def test_rollup_counts(self):
+        rollups = self.convert(period_minutes=15, period_cap=2, rollups=['hour']).data['rollups']
+        self.assertEqual([period['count'] for period in rollups['hour']], [10, 30])
+        self.assertEqual([len(period['statuses']) for period in rollups['hour']], [4, 8])
+
+    def test_window_estimates_boundary_count(self):
+        window = self.convert(period_cap=50).window(1 / 6)
+        self.assertEqual([period['count'] for period in window.data['periods']], [30])
+        self.assertEqual([period['estimated_count'] for period in window.data['periods']], [4])
+
+    def test_counts_include_duplicates(self):
+        periods = self.convert(period_cap=5, duplicate_distance=0).data['periods']
+        self.assertEqual([len(period['statuses']) for period in periods], [2, 2])
+        self.assertEqual([period['count'] for period in periods], [10, 30])
+
+    def test_window_keeps_top_sampled_out_participants(self):
+        frequent = {'id': 100, 'screen_name': 'frequent', 'profile_image_url': ''}
+        for identifier in range(3, 41, 3):
+            self.timeline['data'][str(identifier)]['author'] = frequent
+        conversation = self.convert(period_cap=5, header_pattern=r'\d+')
+        periods = conversation.data['periods']
+        self.assertEqual([period['participant_count'] for period in periods], [8, 21])
+        self.assertEqual([len(period['participants']) for period in periods], [5, 5])
+        window = conversation.window(24)
+        participants = window.data['participation'].participants
+        self.assertEqual(len(participants), 9)
+        self.assertEqual(participants['frequent'].exchange_count,
+                         conversation.data['participation'].participants['frequent'].exchange_count)
+        self.assertEqual(window.data['nav'], conversation.data['nav'])
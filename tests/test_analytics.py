@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import unittest
+from conversationalist import analytics, archive, classes
+from .adapters import ConvoTextAdapter
+from .mocking import generate_mock_statuses, MockAPI
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class ActivityArraysTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        with open(os.path.join(tests_path, 'json/timeline.json')) as infile:
+            self.timeline_json = json.load(infile)
+        self.activity = analytics.ActivityArrays.from_timeline(self.timeline_json)
+
+    def test_from_timeline(self):
+        self.assertEqual(len(self.activity), 5)
+        self.assertEqual(int(self.activity.replies.sum()), 1)
+        self.assertEqual(set(self.activity.author_ids.tolist()), {1})
+
+    def test_hourly_histogram_matches_periods(self):
+        conversation = classes.Conversation(timeline=self.timeline_json, adapter=ConvoTextAdapter)
+        starts, counts = self.activity.histogram()
+        self.assertEqual(len(starts), 13)
+        self.assertEqual(starts[counts > 0].tolist(), conversation.period_index)
+        self.assertEqual(int(counts.sum()), 5)
+
+    def test_daily_histogram(self):
+        starts, counts = self.activity.histogram(86400)
+        self.assertEqual(counts.tolist(), [1, 4])
+
+    def test_reply_ratios(self):
+        starts, ratios = self.activity.reply_ratios()
+        self.assertEqual(ratios[-1], 1.0)
+        self.assertEqual(ratios[0], 0.0)
+
+    def test_rolling_rates(self):
+        starts, rates = self.activity.rolling_rates(window=2)
+        self.assertEqual(rates[0], 1.0)
+        self.assertEqual(rates[1], 0.5)
+        self.assertEqual(rates[-1], 1.0)
+
+    def test_author_counts(self):
+        activity = analytics.ActivityArrays([0, 1, 2, 3], [7, 8, 8, 9], [False] * 4)
+        author_ids, counts = activity.author_counts()
+        self.assertEqual(author_ids.tolist(), [8, 7, 9])
+        self.assertEqual(counts.tolist(), [2, 1, 1])
+
+    def test_from_archive(self):
+        tests_path = os.path.dirname(__file__)
+        archive_path = os.path.join(tests_path, 'tmp_test_output/test_analytics.sqlite')
+        start = datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+        datetime_fixtures = [start + timedelta(hours=hours) for hours in (0, -1, -3, -5, -6, -7, -10)]
+        timeline = classes.Timeline(username='testuser')
+        timeline.start = start
+        timeline.cutoff = start + timedelta(hours=-24)
+        timeline.api = MockAPI(statuses=generate_mock_statuses(datetime_fixtures=datetime_fixtures))
+        timeline._generate_timeline()
+        timeline_archive = archive.TimelineArchive(archive_path)
+        try:
+            timeline.to_archive(timeline_archive)
+            activity = analytics.ActivityArrays.from_archive(timeline_archive, username='testuser')
+            starts, counts = activity.histogram()
+            self.assertEqual(len(activity), 7)
+            self.assertEqual(len(starts), 11)
+            self.assertEqual(int(counts.sum()), 7)
+        finally:
+            timeline_archive.close()
+            os.remove(archive_path)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+import os
+import unittest
+from conversationalist import archive, classes, merge
+from .adapters import ConvoParticipationAdapter as ParticipationAdapter
+from .mocking import generate_mock_statuses, generate_mock_status, generate_mock_user, MockAPI
+
+
+class BoundedParticipationAdapter(ParticipationAdapter):
+    memory_budget = 2
+
+
+class TimelineArchiveTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.archive_path = os.path.join(tests_path, 'tmp_test_output/test_archive.sqlite')
+        self.start = datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+        datetime_fixtures = [self.start + timedelta(hours=hours) for hours in (0, -1, -3, -5, -6, -7, -10)]
+        api = MockAPI(statuses=generate_mock_statuses(datetime_fixtures=datetime_fixtures))
+        self.timeline = classes.Timeline(username='testuser')
+        self.timeline.start = self.start
+        self.timeline.cutoff = self.start + timedelta(hours=-24)
+        self.timeline.api = api
+        self.timeline._generate_timeline()
+        self.archive = archive.TimelineArchive(self.archive_path)
+
+    def tearDown(self):
+        self.archive.close()
+        if os.path.isfile(self.archive_path):
+            os.remove(self.archive_path)
+
+    def test_upsert(self):
+        self.assertEqual(self.timeline.to_archive(self.archive), 7)
+        self.timeline.to_archive(self.archive)
+        count = self.archive.connection.execute('SELECT COUNT(*) FROM statuses').fetchone()[0]
+        self.assertEqual(count, 7)
+
+    def test_range_query(self):
+        self.timeline.to_archive(self.archive)
+        timeline_json = self.archive.to_timeline('testuser', hours=4, start=self.start)
+        self.assertEqual(set(timeline_json['data'].keys()), {'1', '2', '3'})
+        self.assertEqual(timeline_json['total'], 3)
+        self.assertEqual(timeline_json['username'], 'testuser')
+
+    def test_query_by_author(self):
+        self.timeline.to_archive(self.archive)
+        other_user = generate_mock_user()
+        other_user.id = 9
+        other_status = generate_mock_status(8, created_at=self.start, user=other_user)
+        other_timeline = classes.Timeline(username='testuser')
+        other_timeline.data['8'] = other_status
+        other_timeline.to_archive(self.archive)
+        statuses = list(self.archive.query(author_id=9))
+        self.assertEqual([identifier for identifier, status in statuses], ['8'])
+
+    def test_query_order(self):
+        self.timeline.to_archive(self.archive)
+        identifiers = [identifier for identifier, status in self.archive.query(username='testuser')]
+        self.assertEqual(identifiers, ['7', '6', '5', '4', '3', '2', '1'])
+
+    def test_status_rate(self):
+        self.timeline.to_archive(self.archive)
+        self.assertEqual(self.archive.status_rate('testuser', hours=4, start=self.start), 0.75)
+        self.assertEqual(self.archive.status_rate('otheruser', hours=4, start=self.start), 0)
+
+    def test_conversation_load_archive(self):
+        self.timeline.to_archive(self.archive)
+        conversation = classes.Conversation(adapter=ParticipationAdapter)
+        conversation.load_archive(self.archive, 'testuser', hours=6, start=self.start)
+        self.assertEqual(len(conversation.data['periods']), 4)
+        participant = conversation.data['participation'].participants['test_author']
+        self.assertEqual(participant.exchange_count, 4)
+
+    def test_conversation_load_archive_lazy(self):
+        self.timeline.to_archive(self.archive)
+        conversation = classes.Conversation(adapter=ParticipationAdapter)
+        conversation.load_archive(self.archive, 'testuser', hours=12, start=self.start)
+        lazy_conversation = classes.Conversation(adapter=BoundedParticipationAdapter)
+        lazy_conversation.load_archive(self.archive, 'testuser', hours=12, start=self.start, lazy=True)
+        self.assertTrue(isinstance(lazy_conversation.timeline['data'], archive.ArchivedStatuses))
+        self.assertEqual(lazy_conversation.timeline['total'], 7)
+        self.assertEqual(lazy_conversation.timeline['data']['3']['text'], 'Content for tweet mock status 3')
+        self.assertEqual(list(lazy_conversation.data['periods']), conversation.data['periods'])
+        self.assertEqual(lazy_conversation.period_index, conversation.period_index)
+
+    def test_merge_archived_timelines(self):
+        self.timeline.to_archive(self.archive)
+        timeline_json = self.archive.to_timeline('testuser', hours=12, start=self.start, lazy=True)
+        merged = merge.merge_timelines([timeline_json, self.archive.to_timeline('testuser', hours=2, start=self.start)])
+        self.assertEqual(list(merged['data'].keys()), ['7', '6', '5', '4', '3', '2', '1'])
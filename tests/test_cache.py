@@ -0,0 +1,115 @@
+import os
+import shutil
+import unittest
+from conversationalist import cache, classes
+from .adapters import ConvoParticipationAdapter, ConvoTextAdapter
+
+
+class CountingAdapter(ConvoParticipationAdapter):
+    _conversions = 0
+
+    def convert(self):
+        CountingAdapter._conversions += 1
+        return super().convert()
+
+
+def render_for_tests(period):
+    return '<section id="{0}"></section>'.format(period['id'])
+
+
+class PeriodRenderCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.cache_directory = os.path.join(tests_path, 'tmp_test_output/render_cache')
+        self.periods = [
+            {'id': 3600, 'fingerprint': 'aaa'},
+            {'id': 7200, 'fingerprint': 'bbb'},
+        ]
+
+    def tearDown(self):
+        if os.path.isdir(self.cache_directory):
+            shutil.rmtree(self.cache_directory)
+
+    def test_render_once(self):
+        render_cache = cache.PeriodRenderCache()
+        for period in self.periods + self.periods:
+            fragment = render_cache.render(period, render_for_tests)
+        self.assertEqual(fragment, '<section id="7200"></section>')
+        self.assertEqual(render_cache.misses, 2)
+        self.assertEqual(render_cache.hits, 2)
+
+    def test_directory_persistence(self):
+        render_cache = cache.PeriodRenderCache(self.cache_directory)
+        for period in self.periods:
+            render_cache.render(period, render_for_tests)
+        next_run_cache = cache.PeriodRenderCache(self.cache_directory)
+        fragment = next_run_cache.render(self.periods[0], render_for_tests)
+        self.assertEqual(fragment, '<section id="3600"></section>')
+        self.assertEqual(next_run_cache.hits, 1)
+
+    def test_prune(self):
+        render_cache = cache.PeriodRenderCache(self.cache_directory)
+        for period in self.periods:
+            render_cache.render(period, render_for_tests)
+        self.assertEqual(render_cache.prune(self.periods[1:]), 1)
+        self.assertEqual(list(render_cache.fragments.keys()), ['bbb'])
+        self.assertEqual(os.listdir(self.cache_directory), ['bbb.fragment'])
+
+
+class ConversionCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.cache_directory = os.path.join(tests_path, 'tmp_test_output/conversion_cache')
+        self.timeline_file_path = os.path.join(tests_path, 'json/timeline.json')
+        self.central_file_path = os.path.join(tests_path, 'json/timeline_central.json')
+        CountingAdapter._conversions = 0
+
+    def tearDown(self):
+        if os.path.isdir(self.cache_directory):
+            shutil.rmtree(self.cache_directory)
+
+    def test_hit_skips_conversion(self):
+        conversion_cache = cache.ConversionCache(self.cache_directory)
+        conversation = classes.Conversation(adapter=CountingAdapter)
+        conversation.load(self.timeline_file_path, cache=conversion_cache)
+        cached_conversation = classes.Conversation(adapter=CountingAdapter)
+        cached_conversation.load(self.timeline_file_path, cache=conversion_cache)
+        self.assertEqual(CountingAdapter._conversions, 1)
+        self.assertEqual(cached_conversation.data['nav'], conversation.data['nav'])
+        self.assertEqual(cached_conversation.period_index, conversation.period_index)
+        participant = cached_conversation.data['participation'].participants['test_author']
+        self.assertEqual(participant.exchange_count, 6)
+        self.assertEqual(cached_conversation.timeline['username'], conversation.timeline['username'])
+
+    def test_key_changes(self):
+        conversion_cache = cache.ConversionCache(self.cache_directory)
+        key = conversion_cache.key(self.timeline_file_path, ConvoParticipationAdapter, 'Story')
+        self.assertEqual(key, conversion_cache.key(self.timeline_file_path, ConvoParticipationAdapter, 'Story'))
+        self.assertNotEqual(key, conversion_cache.key(self.central_file_path, ConvoParticipationAdapter, 'Story'))
+        self.assertNotEqual(key, conversion_cache.key(self.timeline_file_path, ConvoTextAdapter, 'Story'))
+        self.assertNotEqual(key, conversion_cache.key(self.timeline_file_path, ConvoParticipationAdapter, 'Other'))
+
+    def test_key_tracks_callable_settings(self):
+        conversion_cache = cache.ConversionCache(self.cache_directory)
+
+        def key(weight):
+            adapter = type('WeightedAdapter', (ConvoParticipationAdapter,),
+                           {'sample_weight': staticmethod(weight)})
+            return conversion_cache.key(self.timeline_file_path, adapter, 'Story')
+
+        self.assertEqual(key(lambda status: 2.0), key(lambda status: 2.0))
+        self.assertNotEqual(key(lambda status: 2.0), key(lambda status: 3.0))
+        self.assertNotEqual(key(lambda status: 2.0), key(lambda status: 2.0 * len(status)))
+
+    def test_eviction(self):
+        conversion_cache = cache.ConversionCache(self.cache_directory, max_bytes=1)
+        conversion_cache.set('first', {'data': 'x' * 100})
+        self.assertEqual(os.listdir(self.cache_directory), [])
+        conversion_cache.max_bytes = 1024
+        conversion_cache.set('first', {'data': 'x' * 100})
+        conversion_cache.set('second', {'data': 'y' * 100})
+        self.assertEqual(len(os.listdir(self.cache_directory)), 2)
+        self.assertEqual(conversion_cache.get('second'), {'data': 'y' * 100})
+        self.assertEqual(conversion_cache.get('missing'), None)
@@ -6,11 +6,12 @@ import os
 import re
 import sys
 import unittest
+from unittest.mock import Mock
 from conversationalist import classes, adapters
 from .adapters import ConvoParticipationAdapter as ParticipationAdapter
 from .adapters import ConvoTextAdapter as TextAdapter
 from .mocking import generate_mock_user, generate_mock_status, generate_mock_statuses, generate_mock_timeline_data
-from .mocking import MockAPI
+from .mocking import MockAPI, PagingMockAPI
 
 
 class StatusEncoderTests(unittest.TestCase):
@@ -28,6 +29,36 @@ class StatusEncoderTests(unittest.TestCase):
         self.assertEqual(child_status_json['origin']['author']['id'], 5, msg=child_status_json)
 
 
+class NormalizedTimelineEncoderTests(unittest.TestCase):
+
+    def test_users_table(self):
+        origin_user = generate_mock_user()
+        origin_user.id = 5
+        origin_user.screen_name = 'original_user'
+        origin_status = generate_mock_status(1, user=origin_user)
+        child_status = generate_mock_status(2)
+        child_status.origin = origin_status
+        child_status.in_reply_to_status_id = 1
+        timeline = classes.Timeline(username='testuser')
+        timeline.data['2'] = child_status
+        timeline_json = json.loads(classes.NormalizedTimelineEncoder().encode(timeline))
+        self.assertEqual(set(timeline_json['users'].keys()), {'1', '5'})
+        self.assertEqual(timeline_json['users']['5']['screen_name'], 'original_user')
+        self.assertEqual(timeline_json['data']['2']['author'], 1)
+        self.assertEqual(timeline_json['data']['2']['origin']['author'], 5)
+
+    def test_resolve_users(self):
+        timeline = classes.Timeline(username='testuser')
+        for status in generate_mock_statuses():
+            status.origin = None
+            timeline.data[str(status.id)] = status
+        timeline_json = json.loads(classes.NormalizedTimelineEncoder().encode(timeline))
+        classes.resolve_users(timeline_json)
+        authors = [status['author'] for status in timeline_json['data'].values()]
+        self.assertEqual(authors[0]['screen_name'], 'test_author')
+        self.assertTrue(all(author is authors[0] for author in authors))
+
+
 class TimelineTests(unittest.TestCase):
 
     def setUp(self):
@@ -65,6 +96,47 @@ class TimelineTests(unittest.TestCase):
         timeline = classes.Timeline(api=api, username='testuser')
         self.assertEqual(len(list(timeline.data.values())), 7)
 
+    def generate_paging_statuses(self, count, hours_apart):
+        now = datetime.utcnow()
+        statuses = []
+        for identifier in range(1, count + 1):
+            created_at = now + timedelta(hours=(identifier - count) * hours_apart)
+            statuses.append(generate_mock_status(identifier, created_at=created_at))
+        return statuses
+
+    def test_generate_timeline_stops_at_cutoff(self):
+        api = PagingMockAPI(self.generate_paging_statuses(10, 3), page_size=3)
+        timeline = classes.Timeline(api=api, username='testuser')
+        self.assertEqual(sorted(timeline.data.keys(), key=int), ['3', '4', '5', '6', '7', '8', '9', '10'])
+        self.assertEqual(api.max_ids, [None, 7, 4])
+        self.assertEqual(timeline.pages_fetched, 3)
+        self.assertEqual(timeline.pages_useful, 3)
+        self.assertEqual(timeline.earliest_status.id, 3)
+        self.assertEqual(timeline.oldest_fetched, api.statuses[1].created_at)
+
+    def test_generate_timeline_exhausted(self):
+        api = PagingMockAPI(self.generate_paging_statuses(4, 1), page_size=3)
+        timeline = classes.Timeline(api=api, username='testuser')
+        self.assertEqual(len(timeline.data), 4)
+        self.assertEqual(api.max_ids, [None, 1, 0])
+        self.assertEqual(timeline.pages_fetched, 3)
+        self.assertEqual(timeline.pages_useful, 2)
+
+    def test_generate_timeline_page_size(self):
+        api = PagingMockAPI(self.generate_paging_statuses(10, 1), page_size=3)
+        timeline = classes.Timeline(api=api, username='testuser', page_size=20)
+        self.assertEqual(len(timeline.data), 10)
+        self.assertEqual(timeline.pages_useful, 1)
+
+    def test_update_fetches_newer_statuses(self):
+        statuses = self.generate_paging_statuses(4, 1)
+        api = PagingMockAPI(statuses[:3], page_size=3)
+        timeline = classes.Timeline(api=api, username='testuser')
+        api.statuses.append(statuses[3])
+        self.assertEqual(timeline.update(), ['4'])
+        self.assertEqual(timeline.update(), [])
+        self.assertEqual(len(timeline.data), 4)
+
     def test_generate_timeline_with_tight_central_cutoff(self):
         api = MockAPI()
         timeline = classes.Timeline(api=api, username='testuser', timeframe=-12)
@@ -82,22 +154,6 @@ class TimelineTests(unittest.TestCase):
         statuses = timeline.get_timeline_batch(max_id=2)
         self.assertEqual(statuses[0].text, 'Content for tweet mock status 1')
 
-    def test_old_status_beyond_cutoff(self):
-        current_datetime = datetime.now(tz=timezone.utc)
-        fresh_status = generate_mock_status(2, created_at=current_datetime)
-        expired_datetime = current_datetime + timedelta(hours=-10)
-        old_status = generate_mock_status(1, created_at=expired_datetime)
-        api = MockAPI(statuses=[fresh_status, old_status])
-        timeline = classes.Timeline(username='testuser', timeframe=2)
-        timeline.api = api
-        timeline.earliest_id = 2
-        timeline.earliest_status = fresh_status
-        timeline.data['1'] = old_status
-        timeline.data['2'] = fresh_status
-        self.assertEqual(timeline.earliest_status.id, 2)
-        self.assertFalse(timeline._has_next_tweets())
-        self.assertEqual(timeline.earliest_status.id, 1)
-
     def test_load_statuses(self):
         status1 = generate_mock_status(1)
         original_created_at = status1.created_at
@@ -121,6 +177,45 @@ class TimelineTests(unittest.TestCase):
         timeline = classes.Timeline(api=api, username='testuser')
         self.assertEqual(timeline.data['2'].origin.author_name, 'reply_user')
 
+    def test_origin_from_later_page(self):
+        origin_status = generate_mock_status(1)
+        origin_status.created_at = origin_status.created_at + timedelta(hours=-1)
+        child_status = generate_mock_status(2)
+        child_status.in_reply_to_status_id = 1
+        api = MockAPI([child_status, origin_status], multi_response=True)
+        api.get_status = Mock(side_effect=api.get_status)
+        timeline = classes.Timeline(api=api, username='testuser')
+        self.assertIs(timeline.data['2'].origin, origin_status)
+        self.assertFalse(api.get_status.called)
+        self.assertEqual(timeline.origin_fetches, 0)
+
+    def test_origin_beyond_cutoff(self):
+        origin_status = generate_mock_status(1)
+        origin_status.created_at = origin_status.created_at + timedelta(hours=-3)
+        child_status = generate_mock_status(2)
+        child_status.in_reply_to_status_id = 1
+        api = MockAPI([child_status, origin_status])
+        api.get_status = Mock(side_effect=api.get_status)
+        timeline = classes.Timeline(api=api, username='testuser', timeframe=2)
+        self.assertEqual(list(timeline.data.keys()), ['2'])
+        self.assertIs(timeline.data['2'].origin, origin_status)
+        self.assertFalse(api.get_status.called)
+
+    def test_external_origin_fetched_once(self):
+        external_user = generate_mock_user()
+        external_user.screen_name = 'external_user'
+        external_status = generate_mock_status(9, user=external_user)
+        first_reply = generate_mock_status(2)
+        first_reply.in_reply_to_status_id = 9
+        second_reply = generate_mock_status(3)
+        second_reply.in_reply_to_status_id = 9
+        api = MockAPI([first_reply, second_reply])
+        api.get_status = Mock(return_value=external_status)
+        timeline = classes.Timeline(api=api, username='testuser')
+        self.assertEqual(api.get_status.call_count, 1)
+        self.assertEqual(timeline.origin_fetches, 1)
+        self.assertEqual(timeline.data['3'].origin.author_name, 'external_user')
+
     def test_load_status_with_reply_error(self):
         child_status = generate_mock_status(2)
         child_status.in_reply_to_status_id = 7
@@ -131,39 +226,6 @@ class TimelineTests(unittest.TestCase):
         output = out.getvalue().strip()
         self.assertEqual(output, 'Error while fetching origin for tweet 2')
 
-    def test_has_next_tweets_no_statuses(self):
-        statuses = []
-        api = MockAPI(statuses=statuses)
-        timeline = classes.Timeline(api=api, username='testuser')
-        self.assertFalse(timeline._has_next_tweets())
-
-    def test_has_next_tweets_exceeded_cutoff(self):
-        old_status = generate_mock_status(1)
-        old_status.created_at = old_status.created_at + timedelta(hours=-2)
-        statuses = [old_status]
-        api = MockAPI(statuses=statuses)
-        timeline = classes.Timeline(api=api, username='testuser', timeframe=1)
-        self.assertFalse(timeline._has_next_tweets())
-
-    def test_has_next_tweets_exhausted(self):
-        status = generate_mock_status(1)
-        statuses = [status]
-        api = MockAPI(statuses=statuses)
-        timeline = classes.Timeline(api=api, username='testuser')
-        self.assertFalse(timeline._has_next_tweets())
-
-    def test_has_next_tweets_under_cutoff(self):
-        status = generate_mock_status(1)
-        status2 = generate_mock_status(2)
-        statuses = [status, status2]
-        api = MockAPI(statuses=statuses)
-        timeline = classes.Timeline(api=api, username='testuser', timeframe=5)
-        status3 = generate_mock_status(3)
-        status3.created_at = status.created_at + timedelta(hours=-1)
-        timeline.data[str(status3.id)] = status3
-        self.assertTrue(timeline._has_next_tweets())
-        self.assertEqual(timeline.earliest_status.id, 3)
-
     def test_timeline_to_json(self):
         statuses = list()
         for index in range(1, 6):
@@ -381,6 +443,30 @@ class ConversationTests(unittest.TestCase):
         key = int(seconds)
         self.assertEqual(key, periods[6]['id'], msg=periods)
 
+    def test_window(self):
+        conversation = classes.Conversation(timeline=self.test_timeline,
+                                            adapter=ParticipationAdapter)
+        window = conversation.window(8)
+        self.assertEqual(len(window.data['periods']), 5)
+        self.assertEqual(window.data['nav'], ['1', '2', '3', '4', '5'])
+        participant = window.data['participation'].participants['test_author']
+        self.assertEqual(participant.exchange_count, 5)
+        self.assertEqual(window.period_index, [period['id'] for period in window.data['periods']])
+        self.assertEqual(parse(window.timeline['cutoff']), parse(self.test_timeline['start']) + timedelta(hours=-8))
+        self.assertEqual(len(conversation.data['periods']), 7)
+
+    def test_window_boundary_period(self):
+        conversation = classes.Conversation(timeline=self.test_timeline,
+                                            adapter=ParticipationAdapter)
+        # The cutoff falls at 01:30, after the 01:05 status in the 01:00 period
+        window = conversation.window(4)
+        self.assertEqual(len(window.data['periods']), 2)
+        self.assertEqual(window.data['nav'], ['1', '2'])
+        window = conversation.window(5)
+        self.assertEqual(len(window.data['periods']), 3)
+        self.assertIs(window.data['periods'][0]['statuses'][0],
+                      conversation.data['periods'][4]['statuses'][0])
+
     def test_load_timeline_json(self):
         tests_path = os.path.dirname(__file__)
         timeline_file_path = os.path.join(tests_path, 'json/timeline.json')
@@ -423,7 +509,107 @@ class ConversationTests(unittest.TestCase):
         self.assertEqual(participant.exchange_count, 5)
 
 
+    def test_load_normalized_timeline_json(self):
+        tests_path = os.path.dirname(__file__)
+        statuses = generate_mock_statuses()
+        api = MockAPI(statuses=statuses)
+        timeline = classes.Timeline(api=api, username='testuser')
+        test_output_file_path = os.path.join(tests_path, 'tmp_test_output/test_normalized.json')
+        try:
+            timeline.to_json(test_output_file_path, normalize_users=True)
+            with open(test_output_file_path) as data_file:
+                data = json.load(data_file)
+            self.assertEqual(list(data['users'].keys()), ['1'])
+            self.assertEqual(data['data']['1']['author'], 1)
+            conversation = classes.Conversation(adapter=ParticipationAdapter)
+            conversation.load(test_output_file_path)
+            participant = conversation.data['participation'].participants['test_author']
+            self.assertEqual(participant.exchange_count, 7)
+        finally:
+            if os.path.isfile(test_output_file_path):
+                os.remove(test_output_file_path)
+
+
+class ConversationDiffTests(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime(2001, 2, 3, 5, 30, 0, tzinfo=timezone.utc)
+        self.statuses = {}
+        for identifier, hours_ago in enumerate([1, 2, 2, 5], 1):
+            status = json.loads(classes.StatusEncoder().encode(generate_mock_status(identifier)))
+            status['created_at'] = (self.start - timedelta(hours=hours_ago)).isoformat()
+            status['author']['id'] = identifier % 2
+            status['author']['screen_name'] = 'author_{0}'.format(identifier % 2)
+            self.statuses[str(identifier)] = status
+
+    def convert(self, identifiers, adapter=ParticipationAdapter):
+        timeline = {
+            'start': self.start.isoformat(),
+            'cutoff': (self.start - timedelta(hours=24)).isoformat(),
+            'data': {identifier: dict(self.statuses[identifier]) for identifier in identifiers}
+        }
+        return classes.Conversation(timeline=timeline, adapter=adapter)
+
+    def test_diff(self):
+        previous = self.convert(['2', '4'])
+        current = self.convert(['1', '2', '3'])
+        delta = current.diff(previous)
+        self.assertEqual([period['id'] for period in delta['added']], [current.period_index[-1]])
+        self.assertEqual([period['id'] for period in delta['changed']], [current.period_index[0]])
+        self.assertEqual(delta['removed'], [previous.period_index[0]])
+        self.assertEqual({name: count['exchange_count'] for name, count
+                          in delta['participation']['participants'].items()},
+                         {'author_0': 1, 'author_1': 2})
+        self.assertEqual(delta['participation']['removed'], [])
+        self.assertNotIn('title', delta)
+        json.dumps(delta)
+
+    def test_apply_delta(self):
+        previous = self.convert(['2', '4'])
+        current = self.convert(['1', '2', '3'])
+        updated = classes.apply_delta(previous.data, current.diff(previous))
+        self.assertEqual(updated['periods'], current.data['periods'])
+        self.assertEqual(
+            [(p.name, p.exchange_count) for p in updated['participation'].get_ranked_profiles()],
+            [(p.name, p.exchange_count) for p in current.data['participation'].get_ranked_profiles()])
+        self.assertEqual(len(previous.data['periods']), 2)
+
+    def test_apply_delta_with_rollups(self):
+        class RollupAdapter(ParticipationAdapter):
+            rollups = ['day']
+            build_index = True
+
+        previous = self.convert(['2', '4'], RollupAdapter)
+        current = self.convert(['1', '2', '3'], RollupAdapter)
+        delta = current.diff(previous)
+        self.assertEqual([period['id'] for period in delta['rollups']['day']['changed']],
+                         [period['id'] for period in current.data['rollups']['day']])
+        updated = classes.apply_delta(previous.data, delta)
+        self.assertEqual(updated['rollups'], current.data['rollups'])
+        self.assertNotIn('index', updated)
+        json.dumps(dict(delta, participation=None))
+        updated = classes.apply_delta(current.data, self.convert(['1']).diff(current))
+        self.assertNotIn('rollups', updated)
+
+    def test_unchanged(self):
+        delta = self.convert(['1', '2']).diff(self.convert(['1', '2']))
+        self.assertTrue(classes.is_empty_delta(delta))
+
+    def test_diff_from_nothing(self):
+        current = self.convert(['1'])
+        delta = current.diff(None)
+        self.assertEqual(delta['added'], current.data['periods'])
+        self.assertEqual(delta['title'], 'Tick Tock')
+
+
 class ParticipationTests(unittest.TestCase):
+    def test_add_tweet_by_identifier(self):
+        users = {'3': {'id': 3, 'screen_name': 'user_three', 'profile_image_url': 'test.url'}}
+        participation = classes.Participation(users=users)
+        participation.add_tweet(3)
+        participation.add_tweet(users['3'])
+        self.assertEqual(participation.participants['user_three'].exchange_count, 2)
+
     def test_ranked_profiles(self):
         participation = classes.Participation()
         busy_participant = classes.Participant('busy_participant', 'test.url.busy_participant')
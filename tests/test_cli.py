@@ -0,0 +1,140 @@
+from io import StringIO
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from conversationalist import cli
+from .mocking import MockAPI
+
+
+def write_story(conversation, story_out):
+    with open(story_out, 'w') as outfile:
+        outfile.write('{0}: {1} periods'.format(conversation.title,
+                                                len(conversation.data['periods'])))
+    return story_out
+
+
+class FailingAPI(MockAPI):
+
+    def user_timeline(self, user, max_id=None, since_id=None, count=None):
+        raise RuntimeError('rate limited')
+
+
+CONFIG = """
+[DEFAULT]
+api = tests.mocking:MockAPI
+adapter = tests.adapters:ConvoParticipationAdapter
+write = tests.test_cli:write_story
+timeframe = 24
+
+[first]
+username = first_user
+title = First
+timeline_out = {directory}/first.json
+story_out = {directory}/first.html
+
+[second]
+timeline_out = {directory}/second.json.gz
+story_out = {directory}/second.html
+"""
+
+
+class ReadConfigTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = os.path.join(self.directory, 'stories.ini')
+        with open(self.config, 'w') as outfile:
+            outfile.write(CONFIG.format(directory=self.directory))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_config(self):
+        first, second = cli.read_config(self.config)
+        self.assertEqual(first['username'], 'first_user')
+        self.assertEqual(second['username'], 'second')
+        self.assertEqual(first['timeframe'], 24)
+        self.assertIs(first['write'], write_story)
+
+    def test_unknown_account(self):
+        with self.assertRaises(ValueError):
+            cli.read_config(self.config, ['third'])
+
+
+class MainTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = os.path.join(self.directory, 'stories.ini')
+        with open(self.config, 'w') as outfile:
+            outfile.write(CONFIG.format(directory=self.directory))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name)) as infile:
+            return infile.read()
+
+    def main(self, *argv):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            status = cli.main(list(argv))
+        return status, stdout.getvalue()
+
+    def test_run_and_convert(self):
+        status, output = self.main('run', self.config)
+        self.assertEqual(status, 0)
+        self.assertTrue(self.read('first.html').startswith('First: '))
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, 'second.json.gz')))
+        os.remove(os.path.join(self.directory, 'second.html'))
+        status, output = self.main('convert', self.config, '--account', 'second')
+        self.assertEqual(status, 0)
+        self.assertTrue(self.read('second.html').startswith('Story: '))
+
+    def test_profile(self):
+        status, output = self.main('--profile', 'run', self.config, '-a', 'first')
+        self.assertEqual(status, 0)
+        self.assertIn('fetch', output)
+        self.assertIn('user_timeline', output)
+        status, output = self.main('convert', self.config, '-a', 'first', '--profile')
+        self.assertIn('convert', output)
+        self.assertNotIn('user_timeline', output)
+
+    def test_refresh(self):
+        status, output = self.main('refresh', self.config, '--interval', '0',
+                                   '--iterations', '2')
+        self.assertEqual(status, 0)
+        self.assertIn('first_user: 2 refreshes, 1 writes', output)
+
+    def test_refresh_continues_after_failure(self):
+        with open(self.config, 'a') as outfile:
+            outfile.write('\n[third]\napi = tests.test_cli:FailingAPI\njson_backend = json\n')
+        with patch('sys.stderr', new_callable=StringIO) as stderr:
+            status, output = self.main('refresh', self.config, '--interval', '0',
+                                       '--iterations', '1')
+        self.assertEqual(status, 1)
+        self.assertIn('accounts differ in json_backend', stderr.getvalue())
+        self.assertIn('third: rate limited', stderr.getvalue())
+        self.assertIn('first_user: 1 refreshes, 1 writes', output)
+
+    def test_bad_import_path(self):
+        with open(self.config, 'a') as outfile:
+            outfile.write('\n[third]\nadapter = tests.adapters:MissingAdapter\n')
+        with patch('sys.stderr', new_callable=StringIO) as stderr:
+            status, output = self.main('run', self.config)
+        self.assertEqual(status, 2)
+        self.assertIn('Cannot import tests.adapters:MissingAdapter', stderr.getvalue())
+
+    def test_batch_continues_after_failure(self):
+        with patch('sys.stderr', new_callable=StringIO) as stderr:
+            status, output = self.main('convert', self.config)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(stderr.getvalue().splitlines()), 2)
+        self.assertFalse(os.path.isfile(os.path.join(self.directory, 'first.html')))
+
+    def test_missing_config(self):
+        with patch('sys.stderr', new_callable=StringIO):
+            status, output = self.main('run', os.path.join(self.directory, 'missing.ini'))
+        self.assertEqual(status, 2)
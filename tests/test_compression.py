@@ -0,0 +1,70 @@
+import os
+import unittest
+from conversationalist import classes, compression
+from .adapters import ConvoParticipationAdapter as ParticipationAdapter
+from .mocking import MockAPI
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GetCompressionTests(unittest.TestCase):
+
+    def test_extension(self):
+        self.assertEqual(compression.get_compression('timeline.json.gz'), 'gzip')
+        self.assertEqual(compression.get_compression('timeline.json.zst'), 'zstd')
+        self.assertEqual(compression.get_compression('timeline.json'), None)
+
+    def test_explicit(self):
+        self.assertEqual(compression.get_compression('timeline.json', 'bz2'), 'bz2')
+        self.assertEqual(compression.get_compression('timeline.json.gz', 'none'), None)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            compression.get_compression('timeline.json', 'rar')
+
+
+class CompressedTimelineTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.test_file_directory = os.path.join(tests_path, 'tmp_test_output/')
+
+    def round_trip(self, file_name, compression_format=None):
+        api = MockAPI()
+        timeline = classes.Timeline(api=api, username='testuser')
+        file_path = os.path.join(self.test_file_directory, file_name)
+        try:
+            timeline.to_json(file_path, compression=compression_format)
+            conversation = classes.Conversation(adapter=ParticipationAdapter)
+            conversation.load(file_path, compression=compression_format)
+            return conversation
+        finally:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def test_gzip_extension(self):
+        conversation = self.round_trip('test_timeline.json.gz')
+        self.assertEqual(conversation.timeline['total'], 7)
+
+    def test_gzip_file_is_compressed(self):
+        file_path = os.path.join(self.test_file_directory, 'test_magic.json.gz')
+        timeline = classes.Timeline(api=MockAPI(), username='testuser')
+        try:
+            timeline.to_json(file_path)
+            with open(file_path, 'rb') as infile:
+                self.assertEqual(infile.read(2), b'\x1f\x8b')
+        finally:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def test_explicit_parameter(self):
+        conversation = self.round_trip('test_timeline.json', 'xz')
+        self.assertEqual(conversation.timeline['username'], 'testuser')
+
+    @unittest.skipUnless(zstandard, 'zstandard is not installed')
+    def test_zstd(self):
+        conversation = self.round_trip('test_timeline.json.zst')
+        self.assertEqual(conversation.timeline['total'], 7)
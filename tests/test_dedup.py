@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+import copy
+import unittest
+from conversationalist import adapters, classes, dedup
+
+START = datetime(2024, 5, 7, 12, tzinfo=timezone.utc)
+TEXT = 'The council approved the budget tonight after a long debate'
+
+
+def make_status(identifier, text, author_id=None, minutes_ago=None):
+    author_id = author_id or identifier
+    return {
+        'id': identifier,
+        'author': {'id': author_id, 'screen_name': 'author_{0}'.format(author_id),
+                   'profile_image_url': ''},
+        'origin': None,
+        'text': text,
+        'created_at': (START - timedelta(minutes=minutes_ago or identifier)).isoformat(),
+        'in_reply_to_status_id': None
+    }
+
+
+class NormalizeTextTests(unittest.TestCase):
+
+    def test_copies_match(self):
+        self.assertEqual(dedup.normalize_text('RT @news: ' + TEXT + '! https://t.co/abc'),
+                         dedup.normalize_text('@news @council  ' + TEXT.lower()))
+
+
+class SimhashTests(unittest.TestCase):
+
+    def test_near_duplicates_are_close(self):
+        first = dedup.simhash(dedup.normalize_text(TEXT))
+        typo = dedup.simhash(dedup.normalize_text(TEXT.replace('approved', 'aproved')))
+        other = dedup.simhash(dedup.normalize_text('Rain is expected across the region tomorrow'))
+        self.assertLessEqual(dedup.hamming_distance(first, typo), 5)
+        self.assertGreater(dedup.hamming_distance(first, other), 5)
+
+
+class DeduplicatorTests(unittest.TestCase):
+
+    def test_exact_duplicates(self):
+        deduplicator = dedup.Deduplicator(distance=0)
+        first = make_status(1, TEXT)
+        self.assertIs(deduplicator.add('hour', first), first)
+        self.assertIsNone(deduplicator.add('hour', make_status(2, 'RT @a: ' + TEXT)))
+        self.assertIsNone(deduplicator.add('hour', make_status(3, TEXT, author_id=2)))
+        self.assertEqual(first['duplicates']['count'], 3)
+        self.assertEqual([author['id'] for author in first['duplicates']['authors']], [1, 2])
+        typo = make_status(4, TEXT.replace('approved', 'aproved'))
+        self.assertIs(deduplicator.add('hour', typo), typo)
+
+    def test_near_duplicates(self):
+        deduplicator = dedup.Deduplicator()
+        first = make_status(1, TEXT)
+        deduplicator.add('hour', first)
+        self.assertIsNone(deduplicator.add('hour', make_status(2, TEXT.replace('approved',
+                                                                              'aproved'))))
+        self.assertEqual(first['duplicates']['count'], 2)
+
+    def test_periods_are_separate(self):
+        deduplicator = dedup.Deduplicator()
+        deduplicator.add('first hour', make_status(1, TEXT))
+        second = make_status(2, TEXT)
+        self.assertIs(deduplicator.add('second hour', second), second)
+
+    def test_bounded_entries(self):
+        deduplicator = dedup.Deduplicator(max_entries=2)
+        deduplicator.add('hour', make_status(1, TEXT))
+        deduplicator.add('hour', make_status(2, 'Rain is expected across the region tomorrow'))
+        deduplicator.add('hour', make_status(3, 'The library will close early on Friday'))
+        self.assertEqual(len(deduplicator._entries), 2)
+        self.assertLessEqual(len(deduplicator._bands), 2 * 6)
+        repeat = make_status(4, TEXT)
+        self.assertIs(deduplicator.add('hour', repeat), repeat)
+
+
+class CollapsingAdapterTests(unittest.TestCase):
+
+    def setUp(self):
+        statuses = [make_status(1, TEXT), make_status(2, 'RT @author_1: ' + TEXT),
+                    make_status(3, TEXT.replace('approved', 'aproved')),
+                    make_status(4, 'Rain is expected across the region tomorrow'),
+                    make_status(5, TEXT, minutes_ago=90)]
+        self.timeline = {
+            'start': START.isoformat(),
+            'cutoff': (START - timedelta(hours=3)).isoformat(),
+            'data': {str(status['id']): status for status in statuses}
+        }
+
+    def convert(self, **attributes):
+        adapter = type('CollapsingAdapter', (adapters.ParticipationAdapter,), attributes)
+        return classes.Conversation(timeline=copy.deepcopy(self.timeline), adapter=adapter)
+
+    def test_collapsed(self):
+        data = self.convert(duplicate_distance=5).data
+        statuses = [[status['id'] for status in period['statuses']]
+                    for period in data['periods']]
+        self.assertEqual(statuses, [[5], [4, 1]])
+        self.assertEqual(data['periods'][1]['statuses'][1]['duplicates']['count'], 3)
+        self.assertEqual(len(data['participation'].participants), 5)
+
+    def test_window_keeps_participation(self):
+        statuses = {}
+        for identifier in range(1, 401):
+            status = make_status(identifier, TEXT if identifier % 3 else 'Status {0}'.format(identifier),
+                                 author_id=identifier % 7 + 1, minutes_ago=identifier * 3)
+            if identifier % 5 == 0:
+                status['origin'] = {'author': make_status(0, '', author_id=9)['author'], 'text': ''}
+            statuses[str(identifier)] = status
+        self.timeline['data'] = statuses
+        self.timeline['cutoff'] = (START - timedelta(hours=24)).isoformat()
+        conversation = self.convert(duplicate_distance=0)
+        self.assertLess(sum(len(period['statuses']) for period in conversation.data['periods']),
+                        300)
+        expected = classes.get_participation_counts(conversation.data['participation'])
+        window = conversation.window(24)
+        self.assertEqual(classes.get_participation_counts(window.data['participation']),
+                         expected)
+        self.assertEqual(sum(count['exchange_count'] for count in expected.values()), 480)
+
+    def test_fingerprint_tracks_duplicates(self):
+        fingerprint = self.convert(duplicate_distance=5).data['periods'][1]['fingerprint']
+        del self.timeline['data']['3']
+        self.assertNotEqual(self.convert(duplicate_distance=5).data['periods'][1]['fingerprint'],
+                            fingerprint)
+
+    def test_memory_budget(self):
+        with self.assertRaises(ValueError):
+            self.convert(duplicate_distance=0, memory_budget=10)
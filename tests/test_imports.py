@@ -0,0 +1,49 @@
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+# Importing the conversion side must stay well under what loading tweepy alone costs.
+IMPORT_TIME_LIMIT_MICROSECONDS = 150000
+
+CONVERSION_MODULES = 'conversationalist.adapters, conversationalist.utils'
+
+
+def run_python(code, *options):
+    project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable] + list(options) + ['-c', code]
+    return subprocess.run(command, cwd=project_path, capture_output=True, text=True, check=True)
+
+
+class ImportTests(unittest.TestCase):
+
+    def test_conversion_skips_fetch_dependencies(self):
+        code = ('import sys\n'
+                'import {0}\n'
+                'print(",".join(m for m in ("tweepy", "pytz", "dateutil") if m in sys.modules))')
+        result = run_python(code.format(CONVERSION_MODULES))
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_conversion_skips_json_backends(self):
+        code = ('import sys\n'
+                'import conversationalist.classes, conversationalist.service\n'
+                'print(",".join(m for m in ("orjson", "msgspec") if m in sys.modules))')
+        result = run_python(code)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_tweepy_names_load_on_demand(self):
+        code = ('from conversationalist import classes\n'
+                'from tweepy.models import User\n'
+                'print(classes.User is User)')
+        result = run_python(code)
+        self.assertEqual(result.stdout.strip(), 'True')
+
+    def test_import_time(self):
+        result = run_python('import {0}'.format(CONVERSION_MODULES), '-X', 'importtime')
+        cumulative = 0
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (conversationalist\.\w+)$', line)
+            if match:
+                cumulative += int(match.group(1))
+        self.assertLess(cumulative, IMPORT_TIME_LIMIT_MICROSECONDS, msg=result.stderr)
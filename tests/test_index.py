@@ -0,0 +1,71 @@
+import json
+import os
+import unittest
+from conversationalist import classes, index
+from .adapters import ConvoParticipationAdapter
+
+
+class IndexedParticipationAdapter(ConvoParticipationAdapter):
+    build_index = True
+
+
+class SpillingIndexedAdapter(IndexedParticipationAdapter):
+    memory_budget = 2
+
+
+class TokenizeTests(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(index.tokenize('Go #Team, go @fan!'), {'go', '#team', '@fan'})
+
+
+class ConversationIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        with open(os.path.join(tests_path, 'json/timeline.json')) as infile:
+            timeline_json = json.load(infile)
+        timeline_json['data']['3']['text'] = 'A #breaking update on the vote'
+        timeline_json['data']['4']['text'] = 'Another update, no vote yet'
+        self.timeline_json = json.loads(json.dumps(timeline_json))
+        self.conversation = classes.Conversation(timeline=timeline_json,
+                                                 adapter=IndexedParticipationAdapter)
+
+    def test_index_built(self):
+        conversation_index = self.conversation.data['index']
+        self.assertEqual(conversation_index.search('update'), {'3', '4'})
+        self.assertEqual(conversation_index.search('Vote #breaking'), {'3'})
+        self.assertEqual(conversation_index.search('missing update'), set())
+
+    def test_search_conversation(self):
+        filtered = self.conversation.search('update vote')
+        periods = filtered.data['periods']
+        self.assertEqual([period['id'] for period in periods], self.conversation.period_index[2:4])
+        self.assertEqual(filtered.data['nav'], [])
+        participant = filtered.data['participation'].participants['test_author']
+        self.assertEqual(participant.exchange_count, 2)
+        self.assertNotEqual(periods[0]['fingerprint'], self.conversation.data['periods'][2]['fingerprint'])
+
+    def test_search_spilled_conversation(self):
+        conversation = classes.Conversation(timeline=self.timeline_json,
+                                            adapter=SpillingIndexedAdapter)
+        filtered = conversation.search('update vote')
+        self.assertEqual(filtered.data['periods'], self.conversation.search('update vote').data['periods'])
+        self.assertEqual(sum(len(period['statuses']) for period in filtered.data['periods']), 2)
+
+    def test_search_statuses_without_ids(self):
+        unrelated = dict(self.timeline_json['data']['3'], text='unrelated words')
+        unrelated['created_at'] = unrelated['created_at'].replace(':00:08', ':10:08')
+        self.timeline_json['data']['6'] = unrelated
+        for adapter in (IndexedParticipationAdapter, SpillingIndexedAdapter):
+            conversation = classes.Conversation(timeline=json.loads(json.dumps(self.timeline_json)),
+                                                adapter=adapter)
+            periods = conversation.search('vote').data['periods']
+            self.assertEqual([status['text'] for period in periods for status in period['statuses']],
+                             ['A #breaking update on the vote', 'Another update, no vote yet'])
+
+    def test_topic_periods(self):
+        periods = self.conversation.topic_periods('5')
+        self.assertEqual(len(periods), 1)
+        self.assertEqual(periods[0]['statuses'][0]['text'], 'The text for mock status 5')
+        self.assertEqual(self.conversation.topic_periods('missing'), [])
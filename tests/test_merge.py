@@ -0,0 +1,67 @@
+import copy
+import json
+import os
+import unittest
+from conversationalist import classes, merge
+from .adapters import ConvoParticipationAdapter as ParticipationAdapter
+
+
+class MergeTimelinesTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.timeline_file_path = os.path.join(tests_path, 'json/timeline.json')
+        with open(self.timeline_file_path) as infile:
+            self.first_timeline = json.load(infile)
+        self.second_timeline = {
+            'start': '2010-02-24T18:00:00+00:00',
+            'cutoff': '2010-02-23T18:00:00+00:00',
+            'username': 'other_user',
+            'data': {
+                # shared with the first timeline
+                '2': copy.deepcopy(self.first_timeline['data']['2']),
+                '12': {
+                    'id': 12,
+                    'origin': None,
+                    'in_reply_to_status_id': None,
+                    'created_at': '2010-02-24T17:30:00+00:00',
+                    'text': 'The text for other status 12',
+                    'author': {'id': 2, 'screen_name': 'other_author', 'profile_image_url': 'test.url'}
+                },
+                '11': {
+                    'id': 11,
+                    'origin': None,
+                    'in_reply_to_status_id': None,
+                    'created_at': '2010-02-24T05:30:00+00:00',
+                    'text': 'The text for other status 11',
+                    'author': {'id': 2, 'screen_name': 'other_author', 'profile_image_url': 'test.url'}
+                }
+            }
+        }
+
+    def test_merged_order(self):
+        merged = merge.merge_timelines([self.first_timeline, self.second_timeline])
+        identifiers = list(merged['data'].keys())
+        self.assertEqual(identifiers, ['1', '2', '11', '3', '4', '5', '12'])
+        self.assertEqual(len(merged['data']), 7)
+        self.assertEqual(merged['data']['12']['text'], 'The text for other status 12')
+        self.assertEqual(merged['username'], 'testuser,other_user')
+
+    def test_interval(self):
+        merged = merge.merge_timelines([self.first_timeline, self.second_timeline])
+        self.assertEqual(merged['start'], '2010-02-24T18:00:00+00:00')
+        self.assertEqual(merged['cutoff'], self.first_timeline['cutoff'])
+
+    def test_conversation(self):
+        merged = merge.merge_timelines([self.first_timeline, self.second_timeline])
+        conversation = classes.Conversation(timeline=merged, adapter=ParticipationAdapter)
+        periods = conversation.data['periods']
+        self.assertEqual(len(periods), 6)
+        self.assertEqual(len(periods[1]['statuses']), 2)
+        participants = conversation.data['participation'].participants
+        self.assertEqual(participants['test_author'].exchange_count, 6)
+        self.assertEqual(participants['other_author'].exchange_count, 2)
+
+    def test_load_timelines(self):
+        merged = merge.load_timelines([self.timeline_file_path, self.timeline_file_path])
+        self.assertEqual(len(merged['data']), 5)
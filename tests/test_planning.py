@@ -0,0 +1,49 @@
+import unittest
+from conversationalist import planning
+from .mocking import MockAPI
+
+
+class PlanFetchTests(unittest.TestCase):
+
+    def test_quiet_account(self):
+        plan = planning.plan_fetch(0.5, 24)
+        self.assertEqual(plan.page_size, planning.DEFAULT_PAGE_SIZE)
+        self.assertEqual(plan.pages, 1)
+        self.assertEqual(plan.expected_statuses, 12)
+
+    def test_busy_account(self):
+        plan = planning.plan_fetch(5, 24)
+        self.assertEqual(plan.page_size, 151)
+        self.assertEqual(plan.pages, 1)
+
+    def test_very_busy_account(self):
+        plan = planning.plan_fetch(50, 24)
+        self.assertEqual(plan.page_size, planning.MAX_PAGE_SIZE)
+        self.assertEqual(plan.pages, 8)
+        self.assertTrue(plan.fits(180))
+        self.assertFalse(plan.fits(7))
+
+
+class ObservedRateTests(unittest.TestCase):
+
+    def test_rate(self):
+        timeline_json = {
+            'start': '2001-02-03T12:00:00+00:00',
+            'cutoff': '2001-02-03T00:00:00+00:00',
+            'data': {str(identifier): {} for identifier in range(6)}
+        }
+        self.assertEqual(planning.observed_rate(timeline_json), 0.5)
+
+
+class RemainingTimelineCallsTests(unittest.TestCase):
+
+    def test_remaining(self):
+        api = MockAPI(statuses=[])
+        api.rate_limit_status = lambda: {
+            'resources': {'statuses': {'/statuses/user_timeline': {'limit': 900, 'remaining': 42}}}
+        }
+        self.assertEqual(planning.get_remaining_timeline_calls(api), 42)
+
+    def test_not_reported(self):
+        api = MockAPI(statuses=[])
+        self.assertEqual(planning.get_remaining_timeline_calls(api), None)
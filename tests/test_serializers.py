@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import unittest
+from conversationalist import classes, serializers
+from .adapters import ConvoParticipationAdapter as ParticipationAdapter
+from .mocking import MockAPI
+
+
+class GetSerializerTests(unittest.TestCase):
+
+    def test_named(self):
+        self.assertIsInstance(serializers.get_serializer('json'), serializers.StandardSerializer)
+
+    def test_default_prefers_installed_backend(self):
+        expected = next(name for name in ('orjson', 'msgspec', 'json')
+                        if serializers.is_available(name))
+        self.assertEqual(serializers.get_serializer().name, expected)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            serializers.get_serializer('yaml')
+
+    def test_not_installed(self):
+        for name in ('orjson', 'msgspec'):
+            if not serializers.is_available(name):
+                with self.assertRaises(ImportError):
+                    serializers.get_serializer(name)
+
+
+class StandardSerializerTests(unittest.TestCase):
+
+    def test_matches_json_dump(self):
+        timeline = classes.Timeline(api=MockAPI(), username='testuser')
+        outfile = io.BytesIO()
+        serializers.StandardSerializer().dump(timeline, outfile, encoder=classes.TimelineEncoder,
+                                              indent=2)
+        expected = json.dumps(timeline, cls=classes.TimelineEncoder, indent=2)
+        self.assertEqual(outfile.getvalue(), expected.encode('utf-8'))
+
+    def test_load(self):
+        infile = io.BytesIO(b'{"total": 1}')
+        self.assertEqual(serializers.StandardSerializer().load(infile), {'total': 1})
+
+
+class BackendRoundTripTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.test_file_directory = os.path.join(tests_path, 'tmp_test_output/')
+        self.timeline = classes.Timeline(api=MockAPI(), username='testuser')
+
+    def round_trip(self, backend, normalize_users=False):
+        timeline = self.timeline
+        file_path = os.path.join(self.test_file_directory, 'test_{0}_timeline.json'.format(backend))
+        try:
+            timeline.to_json(file_path, normalize_users=normalize_users, json_backend=backend)
+            with open(file_path) as infile:
+                written = json.load(infile)
+            conversation = classes.Conversation(adapter=ParticipationAdapter)
+            conversation.load(file_path, json_backend=backend)
+            return written, conversation
+        finally:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def test_backends_agree(self):
+        backends = [name for name in serializers.SERIALIZERS if serializers.is_available(name)]
+        expected_written, expected = self.round_trip('json')
+        for backend in backends:
+            for normalize_users in (False, True):
+                written, conversation = self.round_trip(backend, normalize_users)
+                if not normalize_users:
+                    self.assertEqual(written, expected_written)
+                self.assertEqual(conversation.timeline['data'], expected.timeline['data'])
+                self.assertEqual(conversation.data['periods'], expected.data['periods'])
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+import unittest
+from unittest.mock import create_autospec
+from conversationalist import classes, service
+from .adapters import ConvoParticipationAdapter as ParticipationAdapter
+from .mocking import PagingMockAPI, generate_mock_status
+
+
+def write_for_tests(conversation, story_out):
+    return 'a_page_location'
+
+
+class MarkingAdapter(ParticipationAdapter):
+    """
+    Appends a marker to the text of each status it converts, and records how many
+    statuses each conversion received.
+    """
+    conversion_sizes = []
+
+    def convert(self):
+        statuses = self.conversation.timeline['data'].values()
+        self.conversion_sizes.append(len(statuses))
+        for status in statuses:
+            status['text'] += ' [converted]'
+        return super().convert()
+
+
+def generate_statuses(count):
+    now = datetime.utcnow()
+    return [generate_mock_status(identifier, created_at=now + timedelta(minutes=identifier - count))
+            for identifier in range(1, count + 1)]
+
+
+class StoryServiceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.statuses = generate_statuses(4)
+        self.api = PagingMockAPI(self.statuses[:3])
+        self.write = create_autospec(write_for_tests, return_value='a_page_location')
+        self.story_service = service.StoryService(self.api)
+        self.settings = {
+            'username': 'test_user',
+            'adapter': ParticipationAdapter,
+            'story_out': 'story.html',
+            'write': self.write
+        }
+
+    def test_add_account(self):
+        account = self.story_service.add_account(self.settings)
+        self.assertEqual(account.writes, 1)
+        self.assertEqual(len(account.encoded), 3)
+        self.assertIs(self.story_service.latest('test_user'), account.conversation.data)
+
+    def test_refresh_writes_changed_periods(self):
+        account = self.story_service.add_account(self.settings)
+        self.api.statuses.append(self.statuses[3])
+        changed = self.story_service.refresh('test_user')
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(account.writes, 2)
+        statuses = [status for period in account.conversation.data['periods']
+                    for status in period['statuses']]
+        self.assertEqual(len(statuses), 4)
+
+    def test_refresh_without_changes(self):
+        account = self.story_service.add_account(self.settings)
+        pages_fetched = account.timeline.pages_fetched
+        self.story_service.refresh_all()
+        self.assertEqual(account.changed, [])
+        self.assertEqual(account.writes, 1)
+        self.assertEqual(account.timeline.pages_fetched, pages_fetched + 1)
+
+    def test_statuses_are_not_transformed_twice(self):
+        adapter = type('Marking', (MarkingAdapter,), {'conversion_sizes': []})
+        account = self.story_service.add_account(dict(self.settings, adapter=adapter))
+        self.api.statuses.append(self.statuses[3])
+        account.refresh()
+        account.refresh()
+        texts = [status['text'] for period in account.conversation.data['periods']
+                 for status in period['statuses']]
+        self.assertEqual(len(texts), 4)
+        self.assertEqual([text.count('[converted]') for text in texts], [1, 1, 1, 1])
+
+    def test_refresh_converts_changed_periods(self):
+        hour = datetime.utcnow().replace(minute=30, second=0, microsecond=0)
+        statuses = [generate_mock_status(identifier, created_at=hour - timedelta(hours=hours_ago))
+                    for identifier, hours_ago in enumerate([3, 2, 1, 1], 1)]
+        statuses[3].created_at += timedelta(minutes=10)
+        self.api.statuses = statuses[:3]
+        adapter = type('Marking', (MarkingAdapter,), {'conversion_sizes': []})
+        account = self.story_service.add_account(dict(self.settings, adapter=adapter))
+        self.api.statuses.append(statuses[3])
+        changed = account.refresh()
+        self.assertEqual(adapter.conversion_sizes, [3, 2])
+        self.assertEqual(changed, [account.conversation.period_index[-1]])
+        expected = classes.Conversation(timeline=account._timeline_json(), title='Story',
+                                        adapter=ParticipationAdapter)
+        self.assertEqual([period['fingerprint'] for period in account.conversation.data['periods']],
+                         [period['fingerprint'] for period in expected.data['periods']])
+        self.assertEqual(account.conversation.data['nav'], expected.data['nav'])
+        self.assertEqual(classes.get_participation_counts(account.conversation.data['participation']),
+                         classes.get_participation_counts(expected.data['participation']))
+
+    def test_run(self):
+        self.story_service.add_account(self.settings)
+        sleep = create_autospec(lambda seconds: None)
+        self.story_service.run(60, iterations=3, sleep=sleep)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(self.story_service.accounts['test_user'].refreshes, 3)
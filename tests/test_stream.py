@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+import queue
+import threading
+import unittest
+from conversationalist import classes, stream
+from .mocking import generate_mock_status
+
+
+def generate_stream(count, start):
+    return [generate_mock_status(identifier, created_at=start + timedelta(minutes=identifier))
+            for identifier in range(1, count + 1)]
+
+
+class IterBatchesTests(unittest.TestCase):
+
+    def test_batch_size(self):
+        batches = list(stream.iter_batches(iter(range(5)), batch_size=2))
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+
+    def test_latency_flush(self):
+        ticks = iter(range(100))
+        batches = list(stream.iter_batches(iter(range(5)), batch_size=10, max_latency=2,
+                                           clock=lambda: next(ticks)))
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+
+    def test_queue(self):
+        source = queue.Queue()
+        for item in range(3):
+            source.put(item)
+        source.put(stream.STREAM_END)
+        self.assertEqual(list(stream.iter_batches(source, batch_size=2)), [[0, 1], [2]])
+
+    def test_queue_latency_flush(self):
+        source = queue.Queue()
+        source.put(0)
+        batches = stream.iter_batches(source, batch_size=10, max_latency=0.01)
+        self.assertEqual(next(batches), [0])
+        source.put(stream.STREAM_END)
+        self.assertEqual(list(batches), [])
+
+
+class TimelineStreamTests(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime.now(tz=timezone.utc)
+        self.timeline = classes.Timeline(username='testuser', timeframe=-1)
+
+    def test_run(self):
+        statuses = generate_stream(5, self.start)
+        live = stream.TimelineStream(self.timeline, batch_size=2)
+        live.run(iter(statuses))
+        self.assertEqual(live.batches, 3)
+        self.assertEqual(live.ingested, 5)
+        self.assertEqual(sorted(self.timeline.data), ['1', '2', '3', '4', '5'])
+
+    def test_window_trimmed(self):
+        live = stream.TimelineStream(self.timeline)
+        live.ingest(generate_stream(3, self.start), now=self.start + timedelta(minutes=3))
+        live.ingest([], now=self.start + timedelta(minutes=62))
+        self.assertEqual(sorted(self.timeline.data), ['3'])
+        self.assertEqual(self.timeline.cutoff, self.start + timedelta(minutes=2))
+
+    def test_reply_origin_from_stream(self):
+        statuses = generate_stream(2, self.start)
+        statuses[1].in_reply_to_status_id = 1
+        live = stream.TimelineStream(self.timeline)
+        live.ingest(statuses[:1], now=self.start)
+        live.ingest(statuses[1:], now=self.start)
+        self.assertIs(self.timeline.data['2'].origin, statuses[0])
+
+    def test_reply_origin_not_fetched(self):
+        statuses = generate_stream(1, self.start)
+        statuses[0].in_reply_to_status_id = 100
+        live = stream.TimelineStream(self.timeline)
+        live.ingest(statuses, now=self.start)
+        self.assertEqual(sorted(self.timeline.data), ['1'])
+        self.assertEqual(self.timeline.origin_fetches, 0)
+
+    def test_on_batch(self):
+        seen = []
+        live = stream.TimelineStream(self.timeline, batch_size=3,
+                                     on_batch=lambda timeline, batch: seen.append(len(batch)))
+        source = queue.Queue()
+        producer = threading.Thread(target=lambda: [source.put(status) for status in
+                                                    generate_stream(4, self.start) + [None]])
+        producer.start()
+        live.run(source)
+        producer.join()
+        self.assertEqual(seen, [3, 1])
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+import json
+import unittest
+from conversationalist import classes, threads
+from .adapters import ConvoParticipationAdapter
+from .mocking import MockAPI, generate_mock_status
+
+
+class CountingMockAPI(MockAPI):
+
+    def __init__(self, statuses=None):
+        super().__init__(statuses=statuses)
+        self.requested = []
+
+    def get_status(self, status_id):
+        self.requested.append(status_id)
+        return super().get_status(status_id)
+
+
+def make_reply(identifier, parent_id, minutes_ago):
+    status = generate_mock_status(
+        id=identifier, created_at=datetime.now(tz=timezone.utc) - timedelta(minutes=minutes_ago))
+    status.in_reply_to_status_id = parent_id
+    return status
+
+
+class ThreadBuilderTests(unittest.TestCase):
+
+    def setUp(self):
+        # 1 <- 2 <- 3 <- 5, 2 <- 4, 6 stands alone, 7 replies to a missing status
+        self.ancestors = [make_reply(1, None, 600), make_reply(2, 1, 500)]
+        self.statuses = [make_reply(3, 2, 30), make_reply(4, 2, 20), make_reply(5, 3, 10),
+                         make_reply(6, None, 5), make_reply(7, 99, 1)]
+        self.api = CountingMockAPI(statuses=self.ancestors + self.statuses)
+
+    def test_build(self):
+        fetched = {str(status.id): status for status in self.statuses}
+        builder = threads.ThreadBuilder(self.api, fetched, max_depth=5)
+        roots = builder.build(self.statuses)
+        self.assertEqual([root['id'] for root in roots], [1])
+        parent = roots[0]['replies'][0]
+        self.assertEqual(parent['id'], 2)
+        self.assertFalse(parent['in_timeline'])
+        self.assertEqual([reply['id'] for reply in parent['replies']], [3, 4])
+        self.assertEqual(parent['replies'][0]['replies'][0]['id'], 5)
+        self.assertTrue(parent['replies'][0]['in_timeline'])
+
+    def test_ancestors_fetched_once(self):
+        builder = threads.ThreadBuilder(self.api, max_depth=5)
+        builder.build(self.statuses)
+        self.assertEqual(sorted(self.api.requested), [1, 2, 3, 99])
+        self.assertEqual(builder.fetches, 4)
+        builder.build(self.statuses)
+        self.assertEqual(builder.fetches, 4)
+
+    def test_max_depth(self):
+        fetched = {str(status.id): status for status in self.statuses}
+        roots = threads.ThreadBuilder(self.api, fetched, max_depth=1).build(self.statuses)
+        self.assertEqual([root['id'] for root in roots], [2])
+        self.assertEqual([reply['id'] for reply in roots[0]['replies']], [3, 4])
+        self.assertEqual(roots[0]['replies'][0]['replies'][0]['id'], 5)
+        self.assertEqual(self.api.requested, [2, 99])
+
+
+class TimelineThreadsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ancestors = [make_reply(1, None, 600), make_reply(2, 1, 500)]
+        self.statuses = [make_reply(3, 2, 30), make_reply(4, 2, 20), make_reply(5, 3, 10)]
+        self.api = CountingMockAPI(statuses=self.ancestors + self.statuses)
+        self.timeline = classes.Timeline(timeframe=-2)
+        self.timeline.api = self.api
+        self.timeline.load(self.statuses)
+
+    def test_reuses_fetched_origins(self):
+        self.assertEqual(self.api.requested, [2])
+        self.timeline.build_threads(max_depth=5)
+        self.assertEqual(self.api.requested, [2, 1])
+        self.assertEqual(self.timeline.thread_fetches, 1)
+
+    def test_threads_in_conversation_data(self):
+        self.timeline.build_threads()
+        timeline_json = json.loads(json.dumps(self.timeline, cls=classes.TimelineEncoder))
+        conversation = classes.Conversation(timeline=timeline_json,
+                                            adapter=ConvoParticipationAdapter)
+        thread = conversation.data['threads'][0]
+        self.assertEqual(thread['id'], 1)
+        self.assertEqual(thread['author']['screen_name'], 'test_author')
+        window = conversation.window(0.25)
+        self.assertEqual(window.data['threads'], conversation.data['threads'])
+        self.assertEqual(conversation.window(0.1).data['threads'], [])
+
+    def test_advance_keeps_ancestors(self):
+        self.timeline.build_threads(max_depth=5)
+        self.timeline.advance(self.timeline.start)
+        self.assertEqual(sorted(self.timeline.fetched), ['1', '2', '3', '4', '5'])
+
+    def test_missing_ancestors_not_requested_again(self):
+        orphan = make_reply(6, 99, 5)
+        self.timeline.load([orphan])
+        self.timeline.build_threads(max_depth=5)
+        self.assertEqual(self.api.requested.count(99), 1)
+        self.timeline.build_threads(max_depth=5)
+        self.assertEqual(self.api.requested.count(99), 1)
+        self.assertEqual(self.timeline.missing, {'99'})
+        self.timeline.data.pop('6')
+        self.timeline.advance(self.timeline.start)
+        self.assertEqual(self.timeline.missing, set())
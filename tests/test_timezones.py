@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+import unittest
+from conversationalist import adapters, classes, timezones
+
+NEW_YORK = 'America/New_York'
+# clocks fall back from 02:00 EDT to 01:00 EST at 06:00 UTC
+FALL_BACK = datetime(2024, 11, 3, 6, tzinfo=timezone.utc)
+SPRING_FORWARD = datetime(2024, 3, 10, 7, tzinfo=timezone.utc)
+
+
+def make_status(identifier, created_at):
+    return {
+        'id': identifier,
+        'author': {'id': 1, 'screen_name': 'test_author', 'profile_image_url': ''},
+        'origin': None,
+        'text': 'Status {0}'.format(identifier),
+        'created_at': created_at.isoformat(),
+        'in_reply_to_status_id': None
+    }
+
+
+class OffsetTableTests(unittest.TestCase):
+
+    def test_transitions(self):
+        table = timezones.OffsetTable(NEW_YORK, FALL_BACK + timedelta(hours=12),
+                                      FALL_BACK - timedelta(hours=12))
+        self.assertIn(FALL_BACK.timestamp(), table.transitions)
+        self.assertEqual(table.offset(FALL_BACK.timestamp() - 1), -4 * 3600)
+        self.assertEqual(table.offset(FALL_BACK.timestamp()), -5 * 3600)
+
+    def test_repeated_hour_has_two_keys(self):
+        table = timezones.OffsetTable(NEW_YORK, FALL_BACK + timedelta(hours=12),
+                                      FALL_BACK - timedelta(hours=12))
+        first = table.time_key((FALL_BACK - timedelta(minutes=30)).timestamp())
+        second = table.time_key((FALL_BACK + timedelta(minutes=30)).timestamp())
+        self.assertEqual(first, '2024-11-03T01:00:00-04:00')
+        self.assertEqual(second, '2024-11-03T01:00:00-05:00')
+
+    def test_skipped_hour(self):
+        table = timezones.OffsetTable(NEW_YORK, SPRING_FORWARD + timedelta(hours=12),
+                                      SPRING_FORWARD - timedelta(hours=12))
+        keys = table.time_keys(SPRING_FORWARD + timedelta(hours=2),
+                               SPRING_FORWARD - timedelta(hours=2))
+        self.assertEqual(keys, ['2024-03-10T00:00:00-05:00', '2024-03-10T01:00:00-05:00',
+                                '2024-03-10T03:00:00-04:00', '2024-03-10T04:00:00-04:00'])
+
+    def test_matches_zoneinfo(self):
+        table = timezones.OffsetTable('Asia/Kathmandu', FALL_BACK, FALL_BACK - timedelta(hours=6))
+        moment = FALL_BACK - timedelta(hours=2, minutes=10)
+        local = moment.astimezone(timezones.get_timezone('Asia/Kathmandu'))
+        expected = local.replace(minute=0, second=0).isoformat()
+        self.assertEqual(table.time_key(moment.timestamp()), expected)
+
+
+class TargetTimezoneAdapterTests(unittest.TestCase):
+
+    def test_periods_in_target_timezone(self):
+        class NewYorkAdapter(adapters.ParticipationAdapter):
+            target_timezone = NEW_YORK
+
+        statuses = [make_status(1, FALL_BACK - timedelta(minutes=30)),
+                    make_status(2, FALL_BACK + timedelta(minutes=30))]
+        timeline = {
+            'start': (FALL_BACK + timedelta(hours=2)).isoformat(),
+            'cutoff': (FALL_BACK - timedelta(hours=2)).isoformat(),
+            'data': {str(status['id']): status for status in statuses}
+        }
+        conversation = classes.Conversation(timeline=timeline, adapter=NewYorkAdapter)
+        periods = conversation.data['periods']
+        self.assertEqual([period['subtitle'] for period in periods],
+                         ['Sunday, November 03, 2024  1AM'] * 2)
+        self.assertEqual([period['id'] for period in periods],
+                         [int(FALL_BACK.timestamp()) - 3600, int(FALL_BACK.timestamp())])
+        utc_conversation = classes.Conversation(timeline=timeline,
+                                                adapter=adapters.ParticipationAdapter)
+        self.assertNotEqual(periods[0]['fingerprint'],
+                            utc_conversation.data['periods'][0]['fingerprint'])
@@ -1,9 +1,11 @@
 import unittest
-from unittest.mock import create_autospec
+from unittest.mock import Mock, create_autospec
 import os
+import shutil
 from io import StringIO
 import sys
 from conversationalist import utils
+from .adapters import ConvoParticipationAdapter as ParticipationAdapter
 from .mocking import MockAPI
 
 
@@ -39,6 +41,57 @@ class MakeStoryTests(unittest.TestCase):
                 os.remove(self.story_out)
 
 
+class MakeStoriesTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.test_file_directory = os.path.join(tests_path, 'tmp_test_output/')
+        self.timeline_out = os.path.join(self.test_file_directory, 'timeline_from_test.json')
+
+    def test_make_stories(self):
+        mock_write = create_autospec(write_for_tests, return_value='a_page_location')
+        settings = {
+            'api': MockAPI(),
+            'timeline_out': self.timeline_out,
+            'username': 'test_user',
+            'windows': {24: 'story_24.html', 6: 'story_6.html', 168: 'story_168.html'},
+            'write': mock_write,
+            'adapter': ParticipationAdapter
+        }
+        try:
+            page_locations = utils.make_stories(settings)
+            self.assertEqual(len(page_locations), 3)
+            story_paths = [call[0][1] for call in mock_write.call_args_list]
+            self.assertEqual(story_paths, ['story_6.html', 'story_24.html', 'story_168.html'])
+        finally:
+            if os.path.isfile(self.timeline_out):
+                os.remove(self.timeline_out)
+
+
+    def test_make_stories_shares_make_story_settings(self):
+        api = MockAPI()
+        api.user_timeline = Mock(side_effect=api.user_timeline)
+        conversion_cache = os.path.join(self.test_file_directory, 'stories_cache')
+        settings = {
+            'api': api,
+            'timeline_out': self.timeline_out,
+            'username': 'test_user',
+            'windows': {24: 'story_24.html', 6: 'story_6.html'},
+            'write': create_autospec(write_for_tests, return_value='a_page_location'),
+            'adapter': ParticipationAdapter,
+            'page_size': 5,
+            'conversion_cache': conversion_cache
+        }
+        try:
+            utils.make_stories(settings)
+            self.assertEqual(api.user_timeline.call_args[1]['count'], 5)
+            self.assertTrue(os.listdir(conversion_cache))
+        finally:
+            shutil.rmtree(conversion_cache, ignore_errors=True)
+            if os.path.isfile(self.timeline_out):
+                os.remove(self.timeline_out)
+
+
 class PrintRateLimitInfoTests(unittest.TestCase):
 
    def test_print(self):
@@ -0,0 +1,106 @@
+import copy
+import json
+import os
+import unittest
+from unittest.mock import patch
+from conversationalist import adapters, classes, writers
+from conversationalist.cache import PeriodRenderCache
+from .adapters import ConvoParticipationAdapter
+
+DAY = 86400
+
+
+def make_periods(ids, events=None):
+    for identifier in ids:
+        if events is not None:
+            events.append('build {0}'.format(identifier))
+        yield {'id': identifier, 'fingerprint': str(identifier), 'statuses': []}
+
+
+class StreamingWriterTests(unittest.TestCase):
+
+    def setUp(self):
+        tests_path = os.path.dirname(__file__)
+        self.story_out = os.path.join(tests_path, 'tmp_test_output', 'streamed_story.html')
+        self.conversation = classes.Conversation(title='Streamed')
+        self.paths = [self.story_out]
+
+    def tearDown(self):
+        for path in self.paths:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def read(self, path):
+        with open(path) as infile:
+            return infile.read()
+
+    def test_periods_rendered_as_built(self):
+        events = []
+
+        def render_period(period):
+            events.append('render {0}'.format(period['id']))
+            return '<p>{0}</p>'.format(period['id'])
+
+        self.conversation.data = {'title': 'Streamed', 'periods': make_periods([0, 3600], events)}
+        writer = writers.StreamingWriter(
+            render_period,
+            render_header=lambda data, page: '<h1>{0}</h1>'.format(data['title']),
+            render_footer=lambda data, page: '</body>')
+        self.assertEqual(writer(self.conversation, self.story_out), self.story_out)
+        self.assertEqual(events, ['build 0', 'render 0', 'build 3600', 'render 3600'])
+        self.assertEqual(self.read(self.story_out), '<h1>Streamed</h1><p>0</p><p>3600</p></body>')
+
+    def test_paginate_by_day(self):
+        self.conversation.data = {'periods': make_periods([0, 3600, DAY, 2 * DAY + 60])}
+        writer = writers.StreamingWriter(
+            lambda period: '<p>{0}</p>'.format(period['id']),
+            render_footer=lambda data, page: '[{0}|{1}]'.format(page['previous'], page['next']),
+            paginate_by_day=True)
+        self.paths = writer(self.conversation, self.story_out)
+        self.assertEqual([os.path.basename(path) for path in self.paths],
+                         ['streamed_story-1970-01-01.html', 'streamed_story-1970-01-02.html',
+                          'streamed_story-1970-01-03.html'])
+        self.assertEqual(self.read(self.paths[0]),
+                         '<p>0</p><p>3600</p>[None|streamed_story-1970-01-02.html]')
+        self.assertEqual(self.read(self.paths[2]),
+                         '<p>172860</p>[streamed_story-1970-01-02.html|None]')
+
+    def test_render_cache(self):
+        render_cache = PeriodRenderCache()
+        writer = writers.StreamingWriter(lambda period: str(period['id']), render_cache=render_cache)
+        for ids in ([0, 3600], [0, 3600, 7200]):
+            self.conversation.data = {'periods': make_periods(ids)}
+            writer(self.conversation, self.story_out)
+        self.assertEqual(render_cache.misses, 3)
+        self.assertEqual(render_cache.hits, 2)
+        self.assertEqual(self.read(self.story_out), '036007200')
+
+    def test_streamed_conversion(self):
+        class StreamingAdapter(ConvoParticipationAdapter):
+            stream_periods = True
+
+        tests_path = os.path.dirname(__file__)
+        with open(os.path.join(tests_path, 'json/timeline.json')) as infile:
+            timeline_json = json.load(infile)
+        expected = classes.Conversation(timeline=copy.deepcopy(timeline_json),
+                                        adapter=ConvoParticipationAdapter)
+        conversation = classes.Conversation(timeline=timeline_json, adapter=StreamingAdapter)
+        self.assertTrue(isinstance(conversation.data['periods'], adapters.LazyPeriods))
+        self.assertEqual(conversation.period_index, expected.period_index)
+        events = []
+        make_period = adapters.make_period
+
+        def build(*args):
+            events.append('build')
+            return make_period(*args)
+
+        def render_period(period):
+            events.append('render')
+            return str(period['id'])
+
+        with patch('conversationalist.adapters.make_period', side_effect=build):
+            writers.StreamingWriter(render_period)(conversation, self.story_out)
+        self.assertEqual(events, ['build', 'render'] * 5)
+        self.assertEqual(self.read(self.story_out),
+                         ''.join(str(period['id']) for period in expected.data['periods']))
+        self.assertEqual(list(conversation.data['periods']), expected.data['periods'])